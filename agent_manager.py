@@ -1,6 +1,11 @@
 # agent_manager.py
 
+import queue
 import logging
+import threading
+import contextvars
+from types import GeneratorType
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Generator, Union, Optional, List
 from ollama import OllamaClient
 from agents.cluster_agent import ClusterAgent
@@ -9,22 +14,94 @@ from agents.deployment_agent import DeploymentAgent
 from agents.repository_agent import RepositoryAgent
 
 from llm_services.router_llm_service import RouterLLMService
+from llm_services.planner_llm_service import PlannerLLMService
+from llm_services.summarizer_llm_service import SummarizerLLMService
+from plan_executor import PlanExecutor
+from tools.kubex_session import get_single_flight_stats, get_scheduler_stats, get_resilience_stats
+from speculative_executor import speculative_executor
+from llm_scheduler import llm_scheduler
+from agent_session import AgentSession, current_agent_session, session_entry, GLOBAL_CONTEXT_WINDOW, AGENT_CONTEXT_WINDOW
+from cancellation import RequestCancelled, current_cancel_token
+from tracing import Span, tracer, current_span
+from conversation_store import ConversationStore, get_conversation_store, agent_channel, GLOBAL_CHANNEL
+from tools.resource_index import resource_index, resource_kind, build_inventory, ResourceInventory, DEFAULT_PARAM_RESOURCES
 
 logger = logging.getLogger(__name__)
 
 class AgentManager:
-    def __init__(self, client: OllamaClient):
+    """Agent'ları ve LLM servislerini tüm oturumlar için bir kez kurar; değişken durum AgentSession'dadır.
+
+    Public metotlar 'session=' alır; verilmezse varsayılan oturum kullanılır (tek kullanıcılı UI).
+    """
+    def __init__(self, client: OllamaClient, conversation_store: Optional[ConversationStore] = None):
         self.client = client
-        self.global_conversation_context = []
+        # Sohbetler SQLite'a eklenir; bellekte sadece sınırlı pencereler tutulur
+        self.conversation_store = conversation_store or get_conversation_store()
+        self.default_session = AgentSession()
         self.session_active = True
-        self.active_cluster_id: Optional[str] = "None"
-        self.active_cluster_name: Optional[str] = None
         
         self.router_llm_service = RouterLLMService(self.client)
+        self.planner_llm_service = PlannerLLMService(self.client)
+        self.summary_llm_service = SummarizerLLMService(self.client)
+        self.plan_executor = PlanExecutor()
         
         self.agents = self._initialize_agents()
-        self.current_agent = None
-        self.waiting_for_parameters = False
+
+    def create_session(self, session_id: Optional[str] = None) -> AgentSession:
+        """Bu manager'ı paylaşan yeni bir oturum oluşturur; session_id kayıtlıysa bağlam pencereleriyle geri yükler"""
+        if session_id is None:
+            return AgentSession()
+
+        session = AgentSession(session_id=session_id)
+        saved = self.conversation_store.load_session(session_id) if self.conversation_store else None
+        if saved is None:
+            return session
+
+        session.active_cluster_id = saved["cluster_id"] or "None"
+        session.active_cluster_name = saved["cluster_name"]
+        # Pencereler yalnızca son aktif cluster'daki etkileşimlerden doldurulur (kayıtlar aynı değerle yazılır)
+        session.global_conversation_context = self.conversation_store.recent_interactions(
+            session_id, GLOBAL_CHANNEL, GLOBAL_CONTEXT_WINDOW, cluster_id=session.active_cluster_id
+        )
+        for agent_key in self.agents:
+            session.agent_state(agent_key).conversation_context = self.conversation_store.recent_interactions(
+                session_id, agent_channel(agent_key), AGENT_CONTEXT_WINDOW, cluster_id=session.active_cluster_id
+            )
+        print(f"[AgentManager] Oturum geri yüklendi: {session_id} (cluster: {session.active_cluster_id})")
+        return session
+
+    @property
+    def session(self) -> AgentSession:
+        """İşlenen isteğin oturumu; bağlam dışında varsayılan oturum"""
+        return current_agent_session.get() or self.default_session
+
+    @property
+    def session_id(self) -> str:
+        return self.session.session_id
+
+    @property
+    def active_cluster_id(self) -> Optional[str]:
+        return self.session.active_cluster_id
+
+    @property
+    def active_cluster_name(self) -> Optional[str]:
+        return self.session.active_cluster_name
+
+    @property
+    def global_conversation_context(self) -> List[Dict[str, Any]]:
+        return self.session.global_conversation_context
+
+    @global_conversation_context.setter
+    def global_conversation_context(self, value: List[Dict[str, Any]]):
+        self.session.global_conversation_context = value
+
+    @property
+    def current_agent(self):
+        return self.agents.get(self.session.current_agent_key)
+
+    @current_agent.setter
+    def current_agent(self, agent):
+        self.session.current_agent_key = agent.tool_category if agent else None
 
     def _initialize_agents(self) -> Dict[str, Any]:
         agent_classes = {
@@ -65,13 +142,98 @@ class AgentManager:
             "timestamp": "recent"
         })
         
-        # Memory limitini koru (son 10 etkileşim)
-        if len(self.global_conversation_context) > 10:
-            self.global_conversation_context = self.global_conversation_context[-10:]
+        # Memory limitini koru (son 10 etkileşim); tam geçmiş sohbet kaydında
+        if len(self.global_conversation_context) > GLOBAL_CONTEXT_WINDOW:
+            self.global_conversation_context = self.global_conversation_context[-GLOBAL_CONTEXT_WINDOW:]
+
+        if self.conversation_store is not None:
+            self.conversation_store.append_interaction(
+                self.session_id, self.active_cluster_id, GLOBAL_CHANNEL, user_message, assistant_response, agent_name
+            )
+
+    @session_entry
+    def record_message(self, role: str, content: Any):
+        """UI'da gösterilen bir mesajı sohbet kaydına ekler"""
+        if self.conversation_store is not None:
+            self.conversation_store.append_message(self.session_id, self.active_cluster_id, role, content)
+
+    @session_entry
+    def load_messages(self, limit: int, before_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Kayıttan son 'limit' UI mesajını (before_id'den eskileri) kronolojik sırayla döndürür"""
+        if self.conversation_store is None:
+            return []
+        return self.conversation_store.recent_messages(self.session_id, limit, before_id)
+
+    @session_entry
+    def count_messages(self, before_id: Optional[int] = None) -> int:
+        if self.conversation_store is None:
+            return 0
+        return self.conversation_store.count_messages(self.session_id, before_id)
     
+    def _prepare_agent(self, agent_key: str):
+        """Router kararı akışta görünür görünmez seçilen agent'ın hazırlığını arka planda başlatır"""
+        agent = self.agents.get(agent_key)
+        if agent is None:
+            return
+        print(f"[Router] '{agent_key}' agent'ı erken seçildi, hazırlık başlatılıyor")
+        threading.Thread(target=agent.prepare, name=f"prepare-{agent_key}", daemon=True).start()
+
+    def _begin_request(self, name: str, **attributes) -> Span:
+        """Oturumda süren isteği iptal eder; yeni token bu isteğin bağlamındaki LLM ve Kubex çağrılarına taşınır.
+
+        Tur için kök span açılır; bu isteğin aşamaları (yönlendirme, araç seçimi, Kubex çağrıları, özet) altına eklenir.
+        """
+        current_cancel_token.set(self.session.begin_request())
+        turn = tracer.start_span(name, {"session.id": self.session_id, "cluster.id": self.active_cluster_id, **attributes}, root=True)
+        current_span.set(turn)
+        self.session.last_trace_id = turn.trace_id
+        return turn
+
+    @staticmethod
+    def _end_turn(turn: Span, result: Union[Dict[str, Any], Generator[str, None, None]]):
+        """Tur span'ini yanıt hazır olunca (akışsa akış bitince veya kapatılınca) kapatır"""
+        if not isinstance(result, GeneratorType):
+            turn.set_attribute("outcome", result.get("status") if isinstance(result, dict) else None)
+            turn.end()
+            return result
+
+        def traced():
+            try:
+                yield from result
+            except BaseException as e:
+                turn.record_error(e)
+                raise
+            finally:
+                turn.end()
+        return traced()
+
+    @session_entry
+    def get_last_trace(self) -> List[Dict[str, Any]]:
+        """Oturumun son turuna ait span'leri döndürür (debug paneli ve API için)"""
+        return tracer.get_trace(self.session.last_trace_id)
+
+    @session_entry
+    def cancel_request(self, reason: str = "Kullanıcı isteği iptal etti.") -> bool:
+        """Oturumda süren isteği iptal eder: LLM akışları kapatılır, bekleyen Kubex çağrıları gönderilmez"""
+        cancelled = self.session.cancel_request(reason)
+        if cancelled:
+            print(f"[AgentManager] İstek iptal edildi (oturum: {self.session_id}): {reason}")
+        return cancelled
+
+    @session_entry
     def route_request(self, prompt: str) -> Union[Dict[str, Any], Generator[str, None, None]]:
+        turn = self._begin_request("turn", prompt_chars=len(prompt))
+        try:
+            result = self._route_request(prompt)
+        except BaseException as e:
+            turn.record_error(e)
+            turn.end()
+            raise
+        return self._end_turn(turn, result)
+
+    def _route_request(self, prompt: str) -> Union[Dict[str, Any], Generator[str, None, None]]:
         print("\n" + "="*50)
-        print(f"[Router] İstek yönlendiriliyor: {prompt}")
+        print(f"[Router] İstek yönlendiriliyor: {prompt} (oturum: {self.session_id})")
         print("="*50 + "\n")
         
         # Eğer aktif bir agent var ve parametre bekleniyorsa, o agent'a devam et
@@ -80,11 +242,14 @@ class AgentManager:
             return self.current_agent.process_request(prompt)
         
         
-        routing_decision = self.router_llm_service.get_routing_decision(
-            user_prompt=prompt,
-            agents=self.agents,
-            context_summary=self._get_global_context_summary()
-        )
+        with tracer.span("routing") as span:
+            routing_decision = self.router_llm_service.get_routing_decision(
+                user_prompt=prompt,
+                agents=self.agents,
+                context_summary=self._get_global_context_summary(),
+                on_agent=self._prepare_agent
+            )
+            span.set_attribute("agent", routing_decision.get("agent"))
         selected_agent_key = routing_decision.get("agent")
         reasoning = routing_decision.get("reasoning", "")
         
@@ -100,6 +265,10 @@ class AgentManager:
                 yield response_text
             return stream_response()
         
+        if selected_agent_key == "plan":
+            self.current_agent = None
+            return self._execute_plan(prompt)
+
         if selected_agent_key in self.agents:
             self.current_agent = self.agents[selected_agent_key]
             
@@ -117,20 +286,82 @@ class AgentManager:
                 yield error_msg
             return error_response()
     
+    def _execute_plan(self, prompt: str) -> Generator[str, None, None]:
+        """Birden fazla eylem içeren talebi planlar, adımları paralel çalıştırır ve tek seferde özetler"""
+        with tracer.span("planning") as span:
+            plan = self.planner_llm_service.create_plan(prompt, self.agents, self._get_global_context_summary())
+            span.set_attribute("steps", len(plan.get("steps") or []))
+        if plan["status"] != "success":
+            error_msg = f"⚠️ {plan['message']} Lütfen işlemleri tek tek isteyin."
+            self.add_to_global_context(prompt, error_msg, "Plan")
+            yield error_msg
+            return
+
+        steps = plan["steps"]
+        plan_lines = []
+        for step in steps:
+            params = ", ".join(f"{k}={v}" for k, v in step["parameters"].items()) or "parametresiz"
+            after = f" ({', '.join(step['depends_on'])} sonrası)" if step["depends_on"] else ""
+            plan_lines.append(f"- **{step['id']}** `{step['agent']}.{step['tool_name']}` ({params}){after}")
+        yield "🗺️ **Plan:**\n" + "\n".join(plan_lines) + "\n\n"
+
+        # Adımlar arka planda yürürken tamamlananları sırayla bildir
+        progress: "queue.Queue" = queue.Queue()
+        results: List[Dict[str, Any]] = []
+
+        def run_plan():
+            try:
+                results.extend(self.plan_executor.execute(steps, self.agents, on_step_done=progress.put))
+            except RequestCancelled:
+                pass
+            finally:
+                progress.put(None)
+
+        ctx = contextvars.copy_context()
+        threading.Thread(target=ctx.run, args=(run_plan,), name="kubex-plan-runner", daemon=True).start()
+
+        icons = {"success": "✅", "error": "❌", "skipped": "⏭️"}
+        while True:
+            outcome = progress.get()
+            if outcome is None:
+                break
+            yield f"{icons.get(outcome['status'], '•')} {outcome['id']} `{outcome['tool_name']}` ({outcome['elapsed_seconds']} sn)\n"
+            if outcome["resolution_notes"]:
+                # Tek adımlı yoldaki gibi: bulanık eşleşmeyle düzeltilen isimler kullanıcıya bildirilir
+                yield "   🔎 " + ", ".join(outcome["resolution_notes"]) + "\n"
+        yield "\n"
+
+        full_response = ""
+        for chunk in self.summary_llm_service.summarize_stream(
+            tool_result={"plan_results": results},
+            original_request=prompt,
+            agent_category="Plan",
+            history=self.session.chat_history
+        ):
+            full_response += chunk
+            yield chunk
+        self.add_to_global_context(prompt, full_response, "Plan")
+
     def _sync_context_to_agent(self, agent):
         """YENI: Global context'i agent'ın local context'ine aktar"""
         if not self.global_conversation_context:
             return
             
-        # Son bir kaç etkileşimi agent'a aktar
+        # Son bir kaç etkileşimi agent'a aktar; global kanalda zaten kayıtlı oldukları için tekrar yazılmaz
         for interaction in self.global_conversation_context[-3:]:
             agent.add_to_conversation_context(
                 interaction["user"], 
-                interaction["assistant"]
+                interaction["assistant"],
+                persist=False
             )
     
+    @session_entry
     def finalize_request(self, tool_name: str, extracted_params: dict, collected_params: dict) -> Generator[str, None, None]:
         """Parametre toplama tamamlandıktan sonra mevcut agent'a devret"""
+        turn = self._begin_request("turn.finalize", tool=tool_name)
+        return self._end_turn(turn, self._finalize_request(tool_name, extracted_params, collected_params))
+
+    def _finalize_request(self, tool_name: str, extracted_params: dict, collected_params: dict) -> Generator[str, None, None]:
         if self.current_agent:
             # Tool response'u collect et ve global context'e ekle
             response_generator = self.current_agent.finalize_request(tool_name, extracted_params, collected_params)
@@ -150,41 +381,51 @@ class AgentManager:
                 yield error_msg
             return error_response()
     
+    @session_entry
     def reset_all_contexts(self):
         """Tüm agent'ların bağlamını sıfırla - iyileştirilmiş reset"""
+        self.session.cancel_request("Bağlam sıfırlandı.")
         for agent in self.agents.values():
             agent.reset_context()
         self.current_agent = None
-        self.waiting_for_parameters = False
         
         # YENI: Global context'i tamamen sıfırlama, sadece işaret et
         self.global_conversation_context = []
         
-        # YENI: Client history'yi tamamen temizle
-        self.client.clear_chat_history()
+        # Oturumun LLM mesaj geçmişini temizle (istemci oturumlar arasında paylaşılır)
+        self.session.chat_history = []
         print("\n" + "="*50)
         print("[Router] Tüm agent bağlamları ve global context sıfırlandı")
         print("="*50 + "\n")
     
+    @session_entry
     def soft_reset_contexts(self):
         """YENI: Soft reset - sadece current operations'ı sıfırla, conversation memory'yi koru"""
+        self.session.cancel_request("İşlem durumu sıfırlandı.")
         if self.current_agent:
             self.current_agent.waiting_for_parameters = False
             self.current_agent.current_tool_context = None
         
-        self.waiting_for_parameters = False
         print("\n" + "="*50)
         print("[Router] Soft reset tamamlandı - conversation memory korundu")
         print("="*50 + "\n")
     
+    @session_entry
     def get_current_status(self) -> Dict[str, Any]:
         """Mevcut durumu döndür - iyileştirilmiş status bilgisi"""
         base_status = {
+            "session_id": self.session_id,
             "active_agent": self.current_agent.category if self.current_agent else None,
             "waiting_for_parameters": self.current_agent.waiting_for_parameters if self.current_agent else False,
             "tool_context": self.current_agent.current_tool_context if self.current_agent else None,
             "global_context_size": len(self.global_conversation_context),  # YENI
-            "last_interactions": len([ctx for ctx in self.global_conversation_context if ctx.get("agent") != "Chat"])  # YENI
+            "last_interactions": len([ctx for ctx in self.global_conversation_context if ctx.get("agent") != "Chat"]),  # YENI
+            "kubex_single_flight": get_single_flight_stats(),
+            "kubex_scheduler": get_scheduler_stats(),
+            "speculative_execution": speculative_executor.stats(),
+            "llm_scheduler": llm_scheduler.stats(),
+            "llm_latency": self.client.latency_tracker.stats() if hasattr(self.client, "latency_tracker") else {},
+            "resilience": get_resilience_stats()
         }
         
         return base_status
@@ -193,6 +434,7 @@ class AgentManager:
         """Mevcut kategorileri listele"""
         return list(self.agents.keys())
     
+    @session_entry
     def get_conversation_summary(self) -> str:
         if not self.global_conversation_context:
             return "Henüz bir sohbet geçmişi bulunmamaktadır."
@@ -203,17 +445,73 @@ class AgentManager:
         
         return summary
     
+    @session_entry
     def set_active_cluster(self, cluster_id: str, cluster_name: Optional[str] = None):
-        """Aktif cluster ID'yi merkezi olarak ayarlar."""
-        self.active_cluster_id = cluster_id
-        
-        self.active_cluster_name = cluster_name
+        """Oturumun aktif cluster'ını ayarlar; agent'lar API çağrılarını bu cluster'a bağlı kopyalarla yapar."""
+        self.session.active_cluster_id = cluster_id
+        self.session.active_cluster_name = cluster_name
+        if self.conversation_store is not None:
+            self.conversation_store.save_session(self.session_id, cluster_id, cluster_name)
         print("\n" + "="*50)
-        print(f"[AgentManager] Aktif cluster UI tarafından ayarlandı: ID={cluster_id}, Adı={cluster_name}")
+        print(f"[AgentManager] Aktif cluster ayarlandı: ID={cluster_id}, Adı={cluster_name} (oturum: {self.session_id})")
         print("="*50 + "\n")
-        for agent in self.agents.values():
-            if hasattr(agent, 'update_active_cluster'):
-                agent.update_active_cluster(cluster_id)
+
+    def _load_inventory(self) -> ResourceInventory:
+        """Aktif cluster'ın deployment, namespace ve repository isimlerini paralel olarak çeker"""
+        deployment_api = self.agents["deployment"].api
+        namespace_api = self.agents["namespace"].api
+        repository_api = self.agents["repository"].api
+
+        with ThreadPoolExecutor(max_workers=3, thread_name_prefix="kubex-inventory") as pool:
+            deployments_future = pool.submit(contextvars.copy_context().run, deployment_api._fetch_deployment_records)
+            namespaces_future = pool.submit(contextvars.copy_context().run, namespace_api.list_namespaces)
+            repositories_future = pool.submit(contextvars.copy_context().run, repository_api.list_repositories)
+
+        namespaces = namespaces_future.result()
+        repositories = repositories_future.result()
+        return build_inventory(
+            deployments_future.result(),
+            namespaces.get("namespaces", []) if namespaces.get("status") == "success" else [],
+            repositories.get("repositories", []) if repositories.get("status") == "success" else []
+        )
+
+    @session_entry
+    def get_inventory(self, max_age: Optional[float] = None) -> Optional[ResourceInventory]:
+        """Aktif cluster'ın isim envanterini (gerekirse yükleyerek) döndürür; cluster seçili değilse None"""
+        if not self.active_cluster_id or self.active_cluster_id == "None":
+            return None
+        base_url = self.agents["deployment"].api.base_url
+        return resource_index.get(base_url, self.active_cluster_id, self._load_inventory, max_age=max_age)
+
+    @session_entry
+    def get_parameter_options(self, tool_name: str, param_name: str, known_params: Optional[Dict[str, Any]] = None) -> Optional[List[str]]:
+        """Eksik parametre formu için bellekteki envanterden seçenek listesi; kaynak parametresi değilse None"""
+        if self.current_agent is None:
+            return None
+        spec = next((p for p in self.current_agent.get_tools().get(tool_name, {}).get("parameters", [])
+                     if p.get("name") == param_name), {"name": param_name})
+        # chart 'repo/chart' formatında; seçenekler repository önekleridir.
+        # Düzeltmeden muaf parametreler (ör. yeni namespace) de mevcut isimleri öneri olarak alır.
+        kind = "chart" if param_name == "chart" else resource_kind(spec) or DEFAULT_PARAM_RESOURCES.get(param_name)
+        if not kind:
+            return None
+
+        inventory = self.get_inventory()
+        if inventory is None:
+            return None
+        known_params = known_params or {}
+
+        if kind == "chart":
+            return [f"{repo}/" for repo in inventory.repositories]
+        if kind == "deployment" and known_params.get("namespace"):
+            scoped = inventory.deployments_in(known_params["namespace"])
+            if scoped:
+                return scoped
+        if kind == "namespace" and known_params.get("deployment_name"):
+            scoped = inventory.namespaces_for(known_params["deployment_name"])
+            if scoped:
+                return scoped
+        return inventory.names(kind)
 
     def get_cluster_list_for_ui(self) -> List[Dict[str, Any]]:
         """LLM olmadan doğrudan cluster listesini çeker."""
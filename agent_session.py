@@ -0,0 +1,101 @@
+# agent_session.py
+
+import uuid
+import functools
+import contextvars
+from dataclasses import dataclass, field
+from types import GeneratorType
+from typing import Dict, Any, List, Optional, Callable, Generator
+
+from tools.kubex_scheduler import current_session_key
+from cancellation import CancellationToken
+
+# Bellekte tutulan bağlam pencereleri; tam geçmiş ConversationStore'dadır
+GLOBAL_CONTEXT_WINDOW = 10
+AGENT_CONTEXT_WINDOW = 5
+
+@dataclass
+class AgentState:
+    """Bir agent'ın tek bir oturumdaki değişken durumu"""
+    waiting_for_parameters: bool = False
+    current_tool_context: Optional[Dict[str, Any]] = None
+    last_user_request: Optional[str] = None
+    conversation_context: List[Dict[str, Any]] = field(default_factory=list)
+
+
+@dataclass
+class AgentSession:
+    """Bir kullanıcı oturumunun tüm durumu; AgentManager ve agent'lar paylaşılır, oturumlar paylaşılmaz"""
+    session_id: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
+    active_cluster_id: Optional[str] = "None"
+    active_cluster_name: Optional[str] = None
+    current_agent_key: Optional[str] = None
+    global_conversation_context: List[Dict[str, Any]] = field(default_factory=list)
+    # Özet LLM'inin oturuma özel mesaj geçmişi (OllamaClient'a her çağrıda verilir)
+    chat_history: List[Dict[str, str]] = field(default_factory=list)
+    agent_states: Dict[str, AgentState] = field(default_factory=dict)
+    # Oturumda süren isteğin iptal token'ı; her yeni istek bir öncekini iptal eder
+    cancel_token: CancellationToken = field(default_factory=CancellationToken, repr=False, compare=False)
+    # Son turun trace kimliği (debug panelindeki şelale görünümü için)
+    last_trace_id: Optional[str] = None
+
+    def begin_request(self) -> CancellationToken:
+        """Süren isteği iptal eder ve yeni istek için yeni bir token oluşturur"""
+        self.cancel_token.cancel("Yeni bir istek başlatıldı.")
+        self.cancel_token = CancellationToken()
+        return self.cancel_token
+
+    def cancel_request(self, reason: str = "Kullanıcı isteği iptal etti.") -> bool:
+        return self.cancel_token.cancel(reason)
+
+    def agent_state(self, agent_key: str) -> AgentState:
+        state = self.agent_states.get(agent_key)
+        if state is None:
+            state = self.agent_states.setdefault(agent_key, AgentState())
+        return state
+
+
+# O an işlenen isteğin oturumu; thread'lere contextvars.copy_context() ile taşınır
+current_agent_session: contextvars.ContextVar[Optional[AgentSession]] = contextvars.ContextVar(
+    "current_agent_session", default=None
+)
+
+
+def _activate(session: AgentSession, func: Callable, args, kwargs):
+    current_agent_session.set(session)
+    current_session_key.set(session.session_id)
+    return func(*args, **kwargs)
+
+
+def _bound_generator(ctx: contextvars.Context, generator: Generator) -> Generator:
+    """Generator'ın her adımını oturumun bağlamında çalıştırır (tüketici başka bağlamda olsa bile)"""
+    try:
+        while True:
+            try:
+                chunk = ctx.run(next, generator)
+            except StopIteration:
+                return
+            yield chunk
+    finally:
+        ctx.run(generator.close)
+
+
+def run_in_session(session: AgentSession, func: Callable, *args, **kwargs) -> Any:
+    """func'ı oturuma bağlı yeni bir bağlamda çağırır; dönen generator da aynı bağlamda yürür"""
+    ctx = contextvars.copy_context()
+    result = ctx.run(_activate, session, func, args, kwargs)
+    if isinstance(result, GeneratorType):
+        return _bound_generator(ctx, result)
+    return result
+
+
+def session_entry(method: Callable) -> Callable:
+    """AgentManager metoduna 'session=' argümanı ekler ve metodu o oturumun bağlamında çalıştırır.
+
+    session verilmezse o an aktif oturum, o da yoksa manager'ın varsayılan oturumu kullanılır.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, session: Optional[AgentSession] = None, **kwargs):
+        session = session or current_agent_session.get() or self.default_session
+        return run_in_session(session, method, self, *args, **kwargs)
+    return wrapper
@@ -1,6 +1,5 @@
-from typing import Dict, Any, Generator, Optional
+from typing import Optional, Any
 from base_agent import BaseAgent
-from tools.cluster_tools.tool_manager import ClusterToolManager
 from tools.cluster_tools.cluster_tools import ClusterAPITools
 import logging
 
@@ -8,6 +7,8 @@ logger = logging.getLogger(__name__)
 
 class ClusterAgent(BaseAgent):
     """Kubernetes Cluster işlemleri için özelleşmiş agent - İyileştirilmiş context yönetimi ile"""
+
+    tool_category = "cluster"
     
     def __init__(self, client,active_cluster_id, manager: Optional[Any] = None):
         super().__init__(
@@ -16,58 +17,5 @@ class ClusterAgent(BaseAgent):
             description="Kubernetes cluster'larını yönetir, listeler, oluşturur ve günceller.",
             manager=manager # Manager'ı BaseAgent'a aktar
         )
-        self.active_cluster_id = active_cluster_id
-        self.tool_manager = ClusterToolManager(active_cluster_id = active_cluster_id)
         base_url = getattr(client, 'base_url', 'http://10.67.67.195:8000')
-        self.cluster_api = ClusterAPITools(base_url=base_url, active_cluster_id = active_cluster_id)
-
-    def update_active_cluster(self, cluster_id: str):
-        self.active_cluster_id = cluster_id
-        self.tool_manager.active_cluster_id = cluster_id
-        self.cluster_api.active_cluster_id = cluster_id
-        # Tool'ları yeniden oluşturmaya gerek yok, çünkü path'ler dinamik olarak ID alıyor.
-        print(f"[{self.category}] Active cluster updated.")
-
-        
-    def get_tools(self) -> Dict[str, Any]:
-        """Cluster işlemleri için mevcut araçları döndürür"""
-        return self.tool_manager.tools
-    
-    def execute_tool(self, tool_name: str, parameters: Dict[str, Any], original_request: str = None) -> Generator[str, None, None]:
-        """Cluster aracını çalıştırır - iyileştirilmiş context ile"""
-        print("\n" + "="*50)
-        print(f"[{self.category}] Araç çalıştırılıyor: '{tool_name}', Parametreler: {parameters}")
-        print("="*50 + "\n")
-        
-        # Original request'i güncelle
-        if original_request:
-            self.last_user_request = original_request
-        
-        tool_function = getattr(self.cluster_api, tool_name, None)
-        if not tool_function:
-            logger.error(f"[{self.category}] '{tool_name}' aracı için fonksiyon bulunamadı.")
-            error_msg = f"'{tool_name}' adlı aracın çalıştırma metodu bulunamadı."
-            return self._create_error_response(error_msg)
-        
-        try:
-            result = tool_function(**parameters)
-            
-            response_generator = self._summarize_result_for_user(result, self.last_user_request)
-            
-            full_response = ""
-            for chunk in response_generator:
-                full_response += chunk
-                yield chunk
-            
-            if self.last_user_request:
-                self.add_to_conversation_context(self.last_user_request, full_response)
-                
-        except Exception as e:
-            logger.error(f"[{self.category}] Araç çalıştırılırken hata oluştu ({tool_name}): {e}")
-            error_msg = f"Araç çalıştırılırken hata oluştu: {str(e)}"
-            
-            # YENI: Error'u da context'e ekle
-            if self.last_user_request:
-                self.add_to_conversation_context(self.last_user_request, error_msg)
-                
-            return self._create_error_response(error_msg)
\ No newline at end of file
+        self.api = self.cluster_api = ClusterAPITools(base_url=base_url, active_cluster_id = active_cluster_id)
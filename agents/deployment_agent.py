@@ -1,13 +1,18 @@
 from typing import Dict, Any, Generator, Optional
 from base_agent import BaseAgent
 from tools.deployment_tools.deployment_tools import DeploymentAPITools
-from tools.deployment_tools.tool_manager import DeploymentToolManager
+from tools.deployment_tools.rollout_tracker import RolloutTracker
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Başarılı olduktan sonra rollout'u takip edilecek araçlar
+ROLLOUT_TRACKED_TOOLS = ("update_deployment_image", "redeploy_deployment")
+
 class DeploymentAgent(BaseAgent):
     """Kubernetes Namespace işlemleri için özelleşmiş agent - İyileştirilmiş context yönetimi ile"""
+
+    tool_category = "deployment"
     
     def __init__(self, client,active_cluster_id, manager: Optional[Any] = None):
         super().__init__(
@@ -16,62 +21,27 @@ class DeploymentAgent(BaseAgent):
             description="Kubernetes deployment'larını yönetir, listeler ve detaylarını gösterir.",
             manager=manager 
         )
-        self.active_cluster_id = active_cluster_id
-        self.tool_manager = DeploymentToolManager(active_cluster_id = active_cluster_id)
         # Client'tan base_url'i al veya default kullan
         base_url = getattr(client, 'base_url', 'http://10.67.67.195:8000')
-        self.namespace_api = DeploymentAPITools(base_url=base_url,active_cluster_id = active_cluster_id)
+        self.api = self.namespace_api = DeploymentAPITools(base_url=base_url,active_cluster_id = active_cluster_id)
 
-    def update_active_cluster(self, cluster_id: str):
-        self.active_cluster_id = cluster_id
-        self.tool_manager = DeploymentToolManager(active_cluster_id=cluster_id)
-        self.namespace_api.active_cluster_id = cluster_id
-        print(f"[{self.category}] Active cluster updated.")
-        
+    def _respond_to_result(self, tool_name: str, parameters: Dict[str, Any], result: Any) -> Generator[str, None, None]:
+        """Sonucu özetler; image güncelleme / redeploy sonrası rollout ilerlemesini de akıtır"""
+        tracked = tool_name in ROLLOUT_TRACKED_TOOLS and isinstance(result, dict) and result.get("status") == "success"
+        if not tracked:
+            yield from super()._respond_to_result(tool_name, parameters, result)
+            return
 
+        # Özet ve rollout satırları bağlama tek bir etkileşim olarak eklenir
+        full_response = ""
+        for chunk in self._summarize_result_for_user(result, self.last_user_request, record_context=False):
+            full_response += chunk
+            yield chunk
 
-    
-    def get_tools(self) -> Dict[str, Any]:
-        """Namespace işlemleri için mevcut araçları döndürür"""
-        return self.tool_manager.tools
-    
-    def execute_tool(self, tool_name: str, parameters: Dict[str, Any], original_request: str = None) -> Generator[str, None, None]:
-        """Namespace aracını çalıştırır - iyileştirilmiş context ile"""
-        print("\n" + "="*50)
-        print(f"[{self.category}] Araç çalıştırılıyor: '{tool_name}', Parametreler: {parameters}")
-        print("="*50 + "\n")        
-        # Original request'i güncelle
-        if original_request:
-            self.last_user_request = original_request
-        
-        tool_function = getattr(self.namespace_api, tool_name, None)
-        if not tool_function:
-            logger.error(f"[{self.category}] '{tool_name}' aracı için fonksiyon bulunamadı.")
-            error_msg = f"'{tool_name}' adlı aracın çalıştırma metodu bulunamadı."
-            return self._create_error_response(error_msg)
-        
-        try:
-            result = tool_function(**parameters)
-            
-            # Tool result'u context ile birlikte summarize et
-            response_generator = self._summarize_result_for_user(result, self.last_user_request)
-            
-            # Response'u collect et ve context'e ekle
-            full_response = ""
-            for chunk in response_generator:
-                full_response += chunk
-                yield chunk
-            
-            # Tool execution'ı conversation context'e ekle
-            if self.last_user_request:
-                self.add_to_conversation_context(self.last_user_request, full_response)
-                
-        except Exception as e:
-            logger.error(f"[{self.category}] Araç çalıştırılırken hata oluştu ({tool_name}): {e}")
-            error_msg = f"Araç çalıştırılırken hata oluştu: {str(e)}"
-            
-            # Error'u da context'e ekle
-            if self.last_user_request:
-                self.add_to_conversation_context(self.last_user_request, error_msg)
-                
-            return self._create_error_response(error_msg)
\ No newline at end of file
+        # Rollout ilerlemesini LLM'e gitmeden doğrudan akıt; takip bu oturumun cluster'ına bağlı API kopyasıyla yapılır
+        for line in RolloutTracker(self.api).track(parameters.get("deployment_name"), parameters.get("namespace")):
+            full_response += line
+            yield line
+
+        if self.last_user_request:
+            self.add_to_conversation_context(self.last_user_request, full_response)
@@ -1,85 +1,60 @@
 from typing import Dict, Any, Generator, Optional
 from base_agent import BaseAgent
 from tools.repository_tools.repository_tools import RepositoryAPITools
-from tools.repository_tools.tool_manager import RepositoryToolManager
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Arka plan işi kısa sürede biterse sonucu aynı yanıtta göstermek için beklenecek süre (saniye)
+JOB_STATUS_STREAM_SECONDS = 5.0
+
 class RepositoryAgent(BaseAgent):
     """Kubernetes Helm Repository işlemleri için özelleşmiş agent - İyileştirilmiş context yönetimi ile"""
+
+    tool_category = "repository"
     
     def __init__(self, client, active_cluster_id, manager: Optional[Any] = None):
         super().__init__(
             client=client,
             category="Helm Repository",
-            description="Helm repository'lerini yönetir, chart'ları listeler ve yükler.",
+            description="Helm repository'lerini yönetir, chart'ları listeler ve yükler, arka plan kurulum işlerinin durumunu gösterir.",
             manager=manager 
         )
-        self.active_cluster_id = active_cluster_id
-        self.tool_manager = RepositoryToolManager(active_cluster_id = active_cluster_id)
         # Client'tan base_url'i al veya default kullan
         base_url = getattr(client, 'base_url', 'http://10.67.67.195:8000')
-        self.repository_api = RepositoryAPITools(base_url=base_url, active_cluster_id = active_cluster_id)
-
-    def update_active_cluster(self, cluster_id: str):
-        self.active_cluster_id = cluster_id
-        self.tool_manager.active_cluster_id = cluster_id
-        self.repository_api.active_cluster_id = cluster_id
-        # Update tool definitions to reflect new cluster_id
-        self.tool_manager.tools = self.tool_manager._define_tools()
-        print(f"[{self.category}] Active cluster updated.")
+        self.api = self.repository_api = RepositoryAPITools(base_url=base_url, active_cluster_id = active_cluster_id)
 
-
-    def get_tools(self) -> Dict[str, Any]:
-        """Repository işlemleri için mevcut araçları döndürür"""
-        return self.tool_manager.tools
-    
-    def execute_tool(self, tool_name: str, parameters: Dict[str, Any], original_request: str = None) -> Generator[str, None, None]:
-        """Repository aracını çalıştırır - iyileştirilmiş context ile"""
-        print("\n" + "="*50)
-        print(f"[{self.category}] Araç çalıştırılıyor: '{tool_name}', Parametreler: {parameters}")
-        print(f"[{self.category}] Active Cluster ID: {self.active_cluster_id}")
-        print("="*50 + "\n")
-        
-        # Original request'i güncelle
-        if original_request:
-            self.last_user_request = original_request
-        
+    def _validate_tool_call(self, tool_name: str, parameters: Dict[str, Any]) -> Optional[str]:
         # Validate cluster ID
         if not self.active_cluster_id or self.active_cluster_id == "None":
-            error_msg = "Aktif cluster seçilmedi. Lütfen önce bir cluster seçin."
-            logger.error(f"[{self.category}] {error_msg}")
-            return self._create_error_response(error_msg)
-        
-        tool_function = getattr(self.repository_api, tool_name, None)
-        if not tool_function:
-            logger.error(f"[{self.category}] '{tool_name}' aracı için fonksiyon bulunamadı.")
-            error_msg = f"'{tool_name}' adlı aracın çalıştırma metodu bulunamadı."
-            return self._create_error_response(error_msg)
-        
-        try:
-            result = tool_function(**parameters)
-            
-            # Tool result'u context ile birlikte summarize et
-            response_generator = self._summarize_result_for_user(result, self.last_user_request)
-            
-            # Response'u collect et ve context'e ekle
-            full_response = ""
-            for chunk in response_generator:
-                full_response += chunk
-                yield chunk
-            
-            # Tool execution'ı conversation context'e ekle
-            if self.last_user_request:
-                self.add_to_conversation_context(self.last_user_request, full_response)
-                
-        except Exception as e:
-            logger.error(f"[{self.category}] Araç çalıştırılırken hata oluştu ({tool_name}): {e}")
-            error_msg = f"Araç çalıştırılırken hata oluştu: {str(e)}"
-            
-            # Error'u da context'e ekle
-            if self.last_user_request:
-                self.add_to_conversation_context(self.last_user_request, error_msg)
-                
-            return self._create_error_response(error_msg)
\ No newline at end of file
+            return "Aktif cluster seçilmedi. Lütfen önce bir cluster seçin."
+        return None
+
+    def _respond_to_result(self, tool_name: str, parameters: Dict[str, Any], result: Any) -> Generator[str, None, None]:
+        # Arka plana gönderilen işler için LLM özeti yerine durum satırı akıt
+        if isinstance(result, dict) and result.get("status") == "accepted":
+            yield from self._stream_job_status(result)
+            return
+        yield from super()._respond_to_result(tool_name, parameters, result)
+
+    def _stream_job_status(self, submission: Dict[str, Any]) -> Generator[str, None, None]:
+        """Arka plan işi için durum satırlarını akıtır; iş kısa sürede biterse sonucunu da ekler"""
+        job_id = submission["job_id"]
+        full_response = f"🕒 {submission['message']}.\n\n"
+        yield full_response
+
+        job = self.repository_api.job_manager.wait(job_id, timeout=JOB_STATUS_STREAM_SECONDS)
+        if job and not job.is_active:
+            icon = "✅" if job.status.value == "succeeded" else "❌"
+            message = (job.result or {}).get("message") or job.error or job.status.value
+            line = f"{icon} İş `{job_id}` tamamlandı: {message}\n"
+        else:
+            line = (
+                f"İşlem sürüyor. Durumu daha sonra 'iş {job_id} durumu nedir?' diye sorarak "
+                f"kontrol edebilirsiniz.\n"
+            )
+        full_response += line
+        yield line
+
+        if self.last_user_request:
+            self.add_to_conversation_context(self.last_user_request, full_response)
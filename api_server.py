@@ -0,0 +1,308 @@
+# api_server.py
+
+import os
+import json
+import time
+import asyncio
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Tuple
+from urllib.parse import urlsplit
+
+from ollama import OllamaClient
+from agent_manager import AgentManager
+from agent_session import AgentSession
+from cancellation import RequestCancelled
+from metrics import start_metrics_server, METRICS_PORT_ENV, DEFAULT_METRICS_PORT, METRICS_HOST_ENV, DEFAULT_METRICS_HOST
+
+logger = logging.getLogger(__name__)
+
+# Bu süre boyunca istek gelmeyen oturumlar silinir (saniye)
+SESSION_IDLE_TTL_SECONDS = 3600.0
+MAX_BODY_BYTES = 1024 * 1024
+
+_REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+_END = object()
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class _ServerSession:
+    """Sunucu tarafında tutulan oturum; aynı oturumdaki istekler sırayla işlenir"""
+
+    def __init__(self, session: AgentSession):
+        self.session = session
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+
+class KubexAPIServer:
+    """AgentManager'ı HTTP üzerinden sunar; yanıtlar Server-Sent Events (SSE) ile token token akıtılır.
+
+    Tek bir AgentManager / OllamaClient / Kubex bağlantı havuzu tüm istemciler arasında paylaşılır,
+    her istemcinin durumu sunucu tarafındaki AgentSession'da tutulur.
+    """
+
+    def __init__(self, manager: AgentManager, max_workers: int = 16, session_ttl: float = SESSION_IDLE_TTL_SECONDS):
+        self.manager = manager
+        self.session_ttl = session_ttl
+        self._sessions: Dict[str, _ServerSession] = {}
+        # Agent akışları bloklayıcı (requests); event loop'u tıkamamak için thread havuzunda ilerletilir
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kubex-api")
+
+    # --- Oturumlar ---
+
+    def _get_session(self, session_id: str) -> _ServerSession:
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            raise HttpError(404, f"Oturum bulunamadı: {session_id}")
+        entry.last_used = time.monotonic()
+        return entry
+
+    def _expire_sessions(self):
+        now = time.monotonic()
+        for session_id, entry in list(self._sessions.items()):
+            if now - entry.last_used > self.session_ttl and not entry.lock.locked():
+                del self._sessions[session_id]
+                print(f"[APIServer] Boşta kalan oturum silindi: {session_id}")
+
+    async def _call(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: func(*args, **kwargs))
+
+    # --- HTTP ---
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            method, path, body = await self._read_request(reader)
+            await self._dispatch(method, path, body, writer)
+        except HttpError as e:
+            await self._send_json(writer, e.status, {"status": "error", "message": e.message})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            logger.error(f"[APIServer] İstek işlenemedi: {e}")
+            try:
+                await self._send_json(writer, 500, {"status": "error", "message": str(e)})
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, Any]]:
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        if not request_line:
+            raise ConnectionError("Boş istek")
+        try:
+            method, target, _ = request_line.split(" ", 2)
+        except ValueError:
+            raise HttpError(400, "Geçersiz istek satırı")
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1")
+            if line in ("\r\n", "\n", ""):
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise HttpError(413, "İstek gövdesi çok büyük")
+        body: Dict[str, Any] = {}
+        if length:
+            try:
+                body = json.loads(await reader.readexactly(length))
+            except json.JSONDecodeError:
+                raise HttpError(400, "Gövde geçerli JSON değil")
+            if not isinstance(body, dict):
+                raise HttpError(400, "Gövde bir JSON objesi olmalı")
+        return method.upper(), urlsplit(target).path.rstrip("/") or "/", body
+
+    async def _dispatch(self, method: str, path: str, body: Dict[str, Any], writer: asyncio.StreamWriter):
+        parts = [p for p in path.split("/") if p]
+        self._expire_sessions()
+
+        if parts == ["health"] and method == "GET":
+            return await self._send_json(writer, 200, {"status": "success", "sessions": len(self._sessions)})
+
+        if parts == ["clusters"] and method == "GET":
+            clusters = await self._call(self.manager.get_cluster_list_for_ui)
+            return await self._send_json(writer, 200, {"status": "success", "clusters": clusters})
+
+        if parts == ["sessions"] and method == "POST":
+            # Zaten açık bir oturum istenirse kaydı ve kilidi değiştirilmeden aynen döndürülür
+            existing = self._sessions.get(body.get("session_id") or "")
+            if existing is not None:
+                existing.last_used = time.monotonic()
+                return await self._send_json(writer, 200, {"status": "success", "session_id": existing.session.session_id,
+                                                           "message": "Oturum zaten açık."})
+
+            # Kayıtlı bir session_id verilirse oturum sohbet kaydından geri yüklenir
+            session = self.manager.create_session(body.get("session_id"))
+            self._sessions[session.session_id] = _ServerSession(session)
+            if body.get("cluster_id") is not None:
+                self.manager.set_active_cluster(str(body["cluster_id"]), body.get("cluster_name"), session=session)
+            print(f"[APIServer] Yeni oturum: {session.session_id}")
+            return await self._send_json(writer, 201, {"status": "success", "session_id": session.session_id})
+
+        if len(parts) < 2 or parts[0] != "sessions":
+            raise HttpError(404, f"Bilinmeyen adres: {path}")
+
+        entry = self._get_session(parts[1])
+        session = entry.session
+        action = parts[2] if len(parts) > 2 else None
+
+        if action is None and method == "GET":
+            status = await self._call(self.manager.get_current_status, session=session)
+            return await self._send_json(writer, 200, {"status": "success", "session": status})
+
+        if action is None and method == "DELETE":
+            self._sessions.pop(session.session_id, None)
+            return await self._send_json(writer, 200, {"status": "success", "message": "Oturum silindi."})
+
+        if action == "trace" and method == "GET":
+            spans = self.manager.get_last_trace(session=session)
+            return await self._send_json(writer, 200, {"status": "success", "trace_id": session.last_trace_id, "spans": spans})
+
+        if action == "cluster" and method == "POST":
+            if body.get("cluster_id") is None:
+                raise HttpError(400, "'cluster_id' gerekli")
+            self.manager.set_active_cluster(str(body["cluster_id"]), body.get("cluster_name"), session=session)
+            return await self._send_json(writer, 200, {"status": "success", "cluster_id": str(body["cluster_id"])})
+
+        if action == "cancel" and method == "POST":
+            # Kilit beklenmez: süren akış kapatılır, akışı yürüten istek 'cancelled' olayıyla biter
+            cancelled = self.manager.cancel_request(session=session)
+            return await self._send_json(writer, 200, {"status": "success", "cancelled": cancelled})
+
+        if action == "reset" and method == "POST":
+            reset = self.manager.soft_reset_contexts if body.get("soft") else self.manager.reset_all_contexts
+            await self._call(reset, session=session)
+            return await self._send_json(writer, 200, {"status": "success", "message": "Bağlam sıfırlandı."})
+
+        if action == "messages" and method == "POST":
+            prompt = body.get("prompt")
+            if not isinstance(prompt, str) or not prompt.strip():
+                raise HttpError(400, "'prompt' gerekli")
+            return await self._stream(writer, entry, self.manager.route_request, prompt, session=session)
+
+        if action == "parameters" and method == "POST":
+            if not body.get("tool_name"):
+                raise HttpError(400, "'tool_name' gerekli")
+            return await self._stream(
+                writer, entry, self.manager.finalize_request,
+                body["tool_name"], body.get("extracted_params") or {}, body.get("collected_params") or {},
+                session=session
+            )
+
+        raise HttpError(405, f"{method} {path} desteklenmiyor")
+
+    # --- Yanıtlar ---
+
+    async def _send_json(self, writer: asyncio.StreamWriter, status: int, payload: Dict[str, Any]):
+        data = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            "Connection: close\r\n\r\n".encode("latin-1") + data
+        )
+        await writer.drain()
+
+    @staticmethod
+    def _sse(event: str, payload: Any) -> bytes:
+        return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False, default=str)}\n\n".encode("utf-8")
+
+    async def _stream(self, writer: asyncio.StreamWriter, entry: _ServerSession, func, *args, **kwargs):
+        """Agent yanıtını SSE olarak akıtır: 'token' olayları, gerekirse 'needs_parameters', sonunda 'done' (iptalde 'cancelled')"""
+        if entry.lock.locked():
+            raise HttpError(409, "Bu oturumda süren bir istek var.")
+
+        async with entry.lock:
+            writer.write(
+                "HTTP/1.1 200 OK\r\n"
+                "Content-Type: text/event-stream; charset=utf-8\r\n"
+                "Cache-Control: no-cache\r\n"
+                "Connection: close\r\n\r\n".encode("latin-1")
+            )
+            await writer.drain()
+
+            response = None
+            try:
+                response = await self._call(func, *args, **kwargs)
+                if isinstance(response, dict):
+                    writer.write(self._sse("needs_parameters", response))
+                elif response is not None:
+                    while True:
+                        chunk = await self._call(next, response, _END)
+                        if chunk is _END:
+                            break
+                        writer.write(self._sse("token", {"text": chunk}))
+                        await writer.drain()
+                status = await self._call(self.manager.get_current_status, session=entry.session)
+                writer.write(self._sse("done", {
+                    "waiting_for_parameters": status["waiting_for_parameters"],
+                    "active_agent": status["active_agent"],
+                    "trace_id": entry.session.last_trace_id
+                }))
+            except ConnectionError:
+                # İstemci bağlantıyı kesti: isteği iptal et (Ollama akışı ve bekleyen Kubex çağrıları da kapanır)
+                print(f"[APIServer] İstemci bağlantıyı kesti (oturum: {entry.session.session_id})")
+                entry.session.cancel_request("İstemci bağlantıyı kesti.")
+            except RequestCancelled as e:
+                writer.write(self._sse("cancelled", {"message": str(e) or "İstek iptal edildi."}))
+            except Exception as e:
+                logger.error(f"[APIServer] Akış hatası: {e}")
+                writer.write(self._sse("error", {"message": str(e)}))
+            finally:
+                if response is not None and not isinstance(response, dict):
+                    await self._call(response.close)
+                entry.last_used = time.monotonic()
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+    async def serve(self, host: str, port: int):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"[APIServer] Dinleniyor: http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KUBEX agent'ları için SSE akışlı HTTP API sunucusu")
+    parser.add_argument("--host", default=os.environ.get("KUBEX_API_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("KUBEX_API_PORT", "8080")))
+    parser.add_argument("--ollama-url", default=os.environ.get("OLLAMA_URL", "http://ai.ikaganacar.com"))
+    parser.add_argument("--kubex-url", default=os.environ.get("KUBEX_URL", "http://10.67.67.195:8000"))
+    parser.add_argument("--model", default=os.environ.get("MODEL_NAME", "qwen3:8b"))
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help=f"Prometheus /metrics portu (varsayılan {METRICS_PORT_ENV} veya {DEFAULT_METRICS_PORT}; 0 = kapalı)")
+    parser.add_argument("--metrics-host", default=None,
+                        help=f"/metrics dinleme adresi (varsayılan {METRICS_HOST_ENV} veya {DEFAULT_METRICS_HOST})")
+    args = parser.parse_args()
+    start_metrics_server(args.metrics_port, args.metrics_host)
+
+    client = OllamaClient(ollama_url=args.ollama_url, kubex_url=args.kubex_url, model_name=args.model)
+    client.base_url = args.kubex_url
+    if not client.test_connection():
+        print(f"[APIServer] Uyarı: Ollama'ya ulaşılamadı ({args.ollama_url})")
+
+    server = KubexAPIServer(AgentManager(client))
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("[APIServer] Kapatılıyor")
+
+
+if __name__ == "__main__":
+    main()
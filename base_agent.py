@@ -1,54 +1,206 @@
-from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Generator, Union, Optional 
+from abc import ABC
+from typing import Dict, Any, List, Generator, Union, Optional, Tuple
+import copy
 import json
+import logging
+import threading
 
 from llm_services.tool_calling_llm_service import ToolCallingLLMService
 from llm_services.summarizer_llm_service import SummarizerLLMService
+from tools.tool_registry import tool_registry
+from tools.read_cache import tool_read_cache, is_cacheable_tool
+from speculative_executor import speculative_executor
+from tools.resource_index import resource_index, resource_kind, REFRESH_ON_MISS_AGE_SECONDS
+from agent_session import AgentSession, AgentState, current_agent_session, AGENT_CONTEXT_WINDOW
+from conversation_store import agent_channel
+from tracing import tracer, current_span
+
+logger = logging.getLogger(__name__)
+
+
+class _SessionStateField:
+    """Agent özniteliğini, aktif oturumdaki AgentState alanına yönlendirir"""
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, agent, owner=None):
+        if agent is None:
+            return self
+        return getattr(agent.state, self.name)
+
+    def __set__(self, agent, value):
+        setattr(agent.state, self.name, value)
+
 
 class BaseAgent(ABC):
+    # tool_registry'deki kategori anahtarı ("cluster", "deployment" vb.)
+    tool_category: str = ""
+
+    # Oturuma özel durum: agent örneği tüm oturumlarca paylaşılır
+    waiting_for_parameters = _SessionStateField()
+    current_tool_context = _SessionStateField()
+    last_user_request = _SessionStateField()
+    conversation_context = _SessionStateField()
+
     def __init__(self, client, category: str, description: str, manager: Optional[Any] = None):
         self.client = client
         self.category = category
         self.description = description
         self.manager = manager
+        # Oturum bağlamı dışında (ör. betiklerden) kullanıldığında geçerli olan oturum
+        self._fallback_session = AgentSession()
+        self._api_lock = threading.Lock()
+        self.api = None  # Agent'a özel *APITools örneği; alt sınıflar atar
         
         self.tool_llm_service = ToolCallingLLMService(self.client)
         self.summary_llm_service = SummarizerLLMService(self.client)
-        
-        self.waiting_for_parameters = False
-        self.current_tool_context = None
-        self.last_user_request = None
-        self.conversation_context = []
 
-    @abstractmethod
+    @property
+    def session(self) -> AgentSession:
+        """İsteği işlenen oturum; bağlam yoksa manager'ın varsayılan oturumu"""
+        session = current_agent_session.get()
+        if session is not None:
+            return session
+        default_session = getattr(self.manager, "default_session", None)
+        return default_session if default_session is not None else self._fallback_session
+
+    @property
+    def state(self) -> AgentState:
+        return self.session.agent_state(self.tool_category)
+
+    @property
+    def active_cluster_id(self) -> Optional[str]:
+        return self.session.active_cluster_id
+
+    @property
+    def api(self):
+        """Aktif oturumun cluster'ına sabitlenmiş *APITools kopyası (cluster başına bir kez oluşturulur)"""
+        template = self._api_template
+        if template is None:
+            return None
+        cluster_id = self.active_cluster_id
+        with self._api_lock:
+            api = self._apis_by_cluster.get(cluster_id)
+            if api is None:
+                api = copy.copy(template)
+                api.active_cluster_id = cluster_id
+                if hasattr(template, "session"):
+                    api.session = template.session.bound_to(lambda a=api: a.active_cluster_id)
+                self._apis_by_cluster[cluster_id] = api
+        return api
+
+    @api.setter
+    def api(self, template):
+        self._api_template = template
+        self._apis_by_cluster: Dict[Any, Any] = {}
+
     def get_tools(self) -> Dict[str, Any]:
         """Agent'in kullanabileceği araçları döndürür"""
-        pass
-    
-    @abstractmethod
+        return tool_registry.get_catalog(self.tool_category)
+
+    def prepare(self):
+        """Araç seçiminden önce gereken tembel yüklemeleri yapar (katalog, prompt öneki, arama indeksi)"""
+        try:
+            tools = self.get_tools()
+            self.tool_llm_service.prepare(self.category, tools)
+        except Exception as e:
+            logger.warning(f"[{self.category}] Agent hazırlığı başarısız: {e}")
+
     def execute_tool(self, tool_name: str, parameters: Dict[str, Any], original_request: str = None) -> Generator[str, None, None]:
-        """Belirtilen aracı çalıştırır"""
-        pass
-    
-    def get_system_prompt(self) -> str:
-        """Agent için system prompt oluşturur"""
-        tools_description_lines = []
-        tools_dict = self.get_tools()
+        """Belirtilen aracı registry'deki çalıştırıcı ile çalıştırır ve sonucu akış olarak döndürür"""
+        print("\n" + "="*50)
+        print(f"[{self.category}] Araç çalıştırılıyor: '{tool_name}', Parametreler: {parameters}")
+        print("="*50 + "\n")
+
+        # Original request'i güncelle
+        if original_request:
+            self.last_user_request = original_request
+
+        error_msg = self._validate_tool_call(tool_name, parameters)
+        if error_msg:
+            logger.error(f"[{self.category}] {error_msg}")
+            return self._create_error_response(error_msg)
+
+        executor = tool_registry.get_executor(self.tool_category, tool_name)
+        if not executor:
+            logger.error(f"[{self.category}] '{tool_name}' aracı için fonksiyon bulunamadı.")
+            return self._create_error_response(f"'{tool_name}' adlı aracın çalıştırma metodu bulunamadı.")
+
+        return self._run_tool(executor, tool_name, parameters)
 
-        for name, details in tools_dict.items():
-            param_list = []
-            for p in details.get("parameters", []):
-                param_name = p.get('name', 'param')
-                if param_name != "cluster_id":
-                    param_list.append(f"{param_name} ({p.get('in', 'N/A')})")
-
-            params_str = ", ".join(param_list) if param_list else "Yok"
-            tools_description_lines.append(
-                f"  - Arac Adi: '{name}'\n"
-                f"  - Aciklama: {details.get('summary', '')}\n"
-                f"  - Gerekli Parametreler: {params_str}"
+    def _validate_tool_call(self, tool_name: str, parameters: Dict[str, Any]) -> Optional[str]:
+        """Araç çalıştırılmadan önceki agent'a özel kontroller; hata mesajı veya None döndürür"""
+        return None
+
+    def _run_tool(self, executor, tool_name: str, parameters: Dict[str, Any]) -> Generator[str, None, None]:
+        try:
+            with tracer.span("tool", tool=tool_name, agent=self.category):
+                result = self._invoke_tool(executor, tool_name, parameters)
+        except Exception as e:
+            logger.error(f"[{self.category}] Araç çalıştırılırken hata oluştu ({tool_name}): {e}")
+            yield from self._create_error_response(f"Araç çalıştırılırken hata oluştu: {str(e)}")
+            return
+
+        yield from self._respond_to_result(tool_name, parameters, result)
+
+    def _invoke_tool(self, executor, tool_name: str, parameters: Dict[str, Any]) -> Any:
+        """Aracı çalıştırır; cacheable işaretli parametresiz okumalar önden çalıştırmadan veya cache'ten karşılanır"""
+        spec = self.get_tools().get(tool_name, {})
+        cluster_id = getattr(self.api, "active_cluster_id", None)
+        cacheable = is_cacheable_tool(spec) and not any(k != "cluster_id" for k in parameters)
+
+        if not cacheable:
+            result = executor(self.api, **parameters)
+            if spec.get("method") != "GET":
+                # Yazma işlemi: bu cluster için saklanan okuma sonuçları artık eski
+                tool_read_cache.invalidate_cluster(cluster_id)
+                resource_index.invalidate(getattr(self.api, "base_url", ""), cluster_id)
+            return result
+
+        result = speculative_executor.claim(self.tool_category, cluster_id, tool_name)
+        if result is None:
+            result = tool_read_cache.get(tool_read_cache.make_key(self.tool_category, cluster_id, tool_name))
+        if result is not None:
+            print(f"[{self.category}] '{tool_name}' sonucu önden çalıştırmadan / cache'ten kullanıldı")
+            span = current_span.get()
+            if span is not None:
+                span.set_attribute("cached", True)
+            return result
+
+        generation = tool_read_cache.generation(cluster_id)
+        result = executor(self.api, **parameters)
+        tool_read_cache.put(tool_read_cache.make_key(self.tool_category, cluster_id, tool_name), result, generation=generation)
+        return result
+
+    def _speculate(self, tool_name: str):
+        """Cacheable işaretli parametresiz okuma aracını, araç seçimi sürerken arka planda başlatır"""
+        tools = self.get_tools()
+        if self.api is None or not is_cacheable_tool(tools.get(tool_name, {})):
+            return
+        if self._validate_tool_call(tool_name, {}):
+            return
+        executor = tool_registry.get_executor(self.tool_category, tool_name)
+        if executor:
+            api = self.api
+            speculative_executor.speculate(
+                self.tool_category, getattr(api, "active_cluster_id", None), tool_name, lambda: executor(api)
             )
-        tools_prompt = "\n".join(tools_description_lines)
+
+    def _start_speculation(self, prompt: str):
+        tools = self.get_tools()
+        ranked = self.tool_llm_service.retriever.rank(prompt, tools)
+        predicted = speculative_executor.predict(self.tool_category, tools, ranked)
+        if predicted:
+            self._speculate(predicted)
+
+    def _respond_to_result(self, tool_name: str, parameters: Dict[str, Any], result: Any) -> Generator[str, None, None]:
+        """Araç sonucunu kullanıcıya sunar; varsayılan olarak LLM ile özetler"""
+        yield from self._summarize_result_for_user(result, self.last_user_request)
+
+    def get_system_prompt(self) -> str:
+        """Agent için system prompt oluşturur"""
+        tools_prompt = tool_registry.render_tools_prompt(self.get_tools())
 
         context_info = ""
         if self.conversation_context:
@@ -96,16 +248,23 @@ class BaseAgent(ABC):
         self.current_tool_context = None
         self.last_user_request = None
     
-    def add_to_conversation_context(self, user_message: str, assistant_response: str):
+    def add_to_conversation_context(self, user_message: str, assistant_response: str, persist: bool = True):
+        """Etkileşimi agent penceresine ekler; persist=False ise (ör. global bağlamdan kopya) sohbet kaydına yazılmaz"""
         self.conversation_context.append({
             "user": user_message,
             "assistant": assistant_response,
             "timestamp": "recent"
         })
         
-        # Memory limitini koru (son 5 etkileşim)
-        if len(self.conversation_context) > 5:
-            self.conversation_context = self.conversation_context[-5:]
+        # Memory limitini koru (son 5 etkileşim); tam geçmiş sohbet kaydında
+        if len(self.conversation_context) > AGENT_CONTEXT_WINDOW:
+            self.conversation_context = self.conversation_context[-AGENT_CONTEXT_WINDOW:]
+
+        store = getattr(self.manager, "conversation_store", None)
+        if store is not None and persist:
+            session = self.session
+            store.append_interaction(session.session_id, session.active_cluster_id,
+                                     agent_channel(self.tool_category), user_message, assistant_response)
     
     def _get_conversation_summary(self) -> str:
         if not self.conversation_context:
@@ -123,20 +282,29 @@ class BaseAgent(ABC):
         self.last_user_request = prompt
 
         context_reminder = None
+        pinned_tools = []
         if self.waiting_for_parameters and self.current_tool_context:
+            pinned_tools.append(self.current_tool_context['tool_name'])
             context_reminder = (
                 f"BAGLAM: Daha once '{self.current_tool_context['tool_name']}' aracini sectim. "
                 f"Eksik parametreler: {', '.join(self.current_tool_context['missing_params'])}. "
                 f"ORIJINAL ISTEK: {self.current_tool_context.get('original_request', 'bilinmiyor')}"
             )
         
-        llm_decision = self.tool_llm_service.select_tool(
-            user_prompt=prompt,
-            agent_category=self.category,
-            tools=self.get_tools(),
-            conversation_summary=self._get_conversation_summary(),
-            context_reminder=context_reminder
-        )
+        if not pinned_tools:
+            self._start_speculation(prompt)
+
+        with tracer.span("tool_selection", agent=self.category) as span:
+            llm_decision = self.tool_llm_service.select_tool(
+                user_prompt=prompt,
+                agent_category=self.category,
+                tools=self.get_tools(),
+                conversation_summary=self._get_conversation_summary(),
+                context_reminder=context_reminder,
+                pinned_tools=pinned_tools,
+                on_tool_name=self._speculate
+            )
+            span.set_attribute("tool", llm_decision.get("tool_name"))
         
         tool_name = llm_decision.get("tool_name")
         parameters = llm_decision.get("parameters", {})
@@ -155,6 +323,8 @@ class BaseAgent(ABC):
 
         tools_dict = self.get_tools()
         tool_info = tools_dict.get(tool_name)
+        if tool_info:
+            speculative_executor.record_choice(self.tool_category, tool_name)
         
         if not tool_info:
             print(f"[{self.category}] LLM var olmayan bir araç seçti: {tool_name}")
@@ -162,6 +332,9 @@ class BaseAgent(ABC):
             self.current_tool_context = None
             return self._create_error_response(f"'{tool_name}' adinda bir arac bulunamadi.")
 
+        # İsimleri envantere göre düzelt, tek namespace'te olan deployment'ın namespace'ini doldur
+        parameters, resolution_notes = self._resolve_resource_parameters(tool_info, parameters)
+
         # Geliştirilmiş eksik parametre kontrolü
         missing_params = self._identify_missing_parameters(tool_info, parameters)
 
@@ -189,7 +362,52 @@ class BaseAgent(ABC):
 
         self.waiting_for_parameters = False
         self.current_tool_context = None
-        return self.execute_tool(tool_name, parameters, original_request=prompt)
+        response = self.execute_tool(tool_name, parameters, original_request=prompt)
+        return self._with_resolution_notes(resolution_notes, response)
+
+    def _resolve_resource_parameters(self, tool_info: Dict[str, Any], parameters: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+        """Kaynak adı parametrelerini cluster envanterine göre düzeltir ve tek anlamlı namespace'i doldurur"""
+        get_inventory = getattr(self.manager, "get_inventory", None)
+        inventory = get_inventory() if get_inventory else None
+        if inventory is None:
+            return parameters, []
+
+        resolved = dict(parameters)
+        notes = []
+        kinds = {p["name"]: resource_kind(p) for p in tool_info.get("parameters", []) if p.get("name")}
+
+        for name, kind in kinds.items():
+            value = resolved.get(name)
+            if not kind or not isinstance(value, str) or not value.strip():
+                continue
+            match, _ = inventory.matcher(kind).resolve(value.strip())
+            if match is None and inventory.age > REFRESH_ON_MISS_AGE_SECONDS:
+                # İsim yeni oluşturulmuş olabilir: envanteri bir kez tazele
+                inventory = get_inventory(max_age=REFRESH_ON_MISS_AGE_SECONDS) or inventory
+                match, _ = inventory.matcher(kind).resolve(value.strip())
+            if match and match != value:
+                print(f"[{self.category}] {name}: '{value}' -> '{match}' olarak düzeltildi")
+                notes.append(f"{name}: '{value}' → '{match}'")
+                resolved[name] = match
+
+        deployment_name = resolved.get("deployment_name")
+        namespaces = inventory.namespaces_for(deployment_name) if isinstance(deployment_name, str) else []
+        if len(namespaces) == 1:
+            for name, kind in kinds.items():
+                if kind == "namespace" and not str(resolved.get(name) or "").strip():
+                    resolved[name] = namespaces[0]
+                    notes.append(f"{name}: '{namespaces[0]}' (otomatik)")
+
+        return resolved, notes
+
+    def _with_resolution_notes(self, notes: List[str], response: Generator[str, None, None]) -> Generator[str, None, None]:
+        if not notes:
+            return response
+
+        def stream_response():
+            yield "🔎 " + ", ".join(notes) + "\n\n"
+            yield from response
+        return stream_response()
 
     def _identify_missing_parameters(self, tool_info: Dict[str, Any], provided_params: Dict[str, Any]) -> List[str]:
         """Eksik parametreleri tespit eder - geliştirilmiş versiyon"""
@@ -268,7 +486,10 @@ class BaseAgent(ABC):
         print(f"[{self.category}] Original Request context: {original_request}")
             
         self.current_tool_context = None
-        return self.execute_tool(tool_name, all_params, original_request=original_request)
+        tool_info = self.get_tools().get(tool_name, {})
+        all_params, resolution_notes = self._resolve_resource_parameters(tool_info, all_params)
+        response = self.execute_tool(tool_name, all_params, original_request=original_request)
+        return self._with_resolution_notes(resolution_notes, response)
    
     def _create_error_response(self, error_message: str) -> Generator[str, None, None]:
         """Hata yanıtı oluştur"""
@@ -279,7 +500,9 @@ class BaseAgent(ABC):
             yield error_message
         return stream_response()
     
-    def _summarize_result_for_user(self, result: Any, original_request: str = None) -> Generator[str, None, None]:
+    def _summarize_result_for_user(self, result: Any, original_request: str = None,
+                                   record_context: bool = True) -> Generator[str, None, None]:
+        """Sonucu LLM ile özetler; record_context=False ise bağlama eklemeyi çağıran (ek çıktıyla birlikte) yapar"""
         if not original_request:
             original_request = self.last_user_request or "Bilinmeyen istek"
 
@@ -288,7 +511,8 @@ class BaseAgent(ABC):
         response_generator = self.summary_llm_service.summarize_stream(
             tool_result=result,
             original_request=original_request,
-            agent_category=self.category
+            agent_category=self.category,
+            history=self.session.chat_history
         )
         
         full_response = ""
@@ -303,5 +527,5 @@ class BaseAgent(ABC):
         #print(f"[DEBUG] Streaming completed. Total chunks: {chunk_count}, Total length: {len(full_response)}")
             
         # Context'e ekleme streaming bittikten sonra
-        if original_request:
+        if original_request and record_context:
             self.add_to_conversation_context(original_request, full_response)
\ No newline at end of file
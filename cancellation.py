@@ -0,0 +1,89 @@
+# cancellation.py
+
+import logging
+import threading
+import contextvars
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RequestCancelled(BaseException):
+    """İstek iptal edildi.
+
+    asyncio.CancelledError gibi BaseException'dan türer: araç ve LLM katmanlarındaki
+    'except Exception' blokları iptali hata yanıtına çevirmeden yukarı iletir.
+    """
+
+
+class CancellationToken:
+    """Bir kullanıcı isteğinin iptal sinyali; iptalde kayıtlı geri çağrılar (akış kapatma vb.) çalıştırılır"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._event = threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+        self.reason: Optional[str] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "İstek iptal edildi.") -> bool:
+        """Token'ı iptal eder; ilk iptalde True döner"""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"[Cancellation] İptal geri çağrısı başarısız: {e}")
+        return True
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """İptalde çağrılacak fonksiyonu kaydeder (zaten iptal edildiyse hemen çağırır); kaydı silen fonksiyonu döndürür"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._unregister(callback)
+        callback()
+        return lambda: None
+
+    def _unregister(self, callback: Callable[[], None]):
+        with self._lock:
+            try:
+                self._callbacks.remove(callback)
+            except ValueError:
+                pass
+
+    def child(self) -> "CancellationToken":
+        """Bu token iptal edilince iptal edilen, ama tek başına da iptal edilebilen bir alt token"""
+        child = CancellationToken()
+        unregister = self.on_cancel(lambda: child.cancel(self.reason or "İstek iptal edildi."))
+        child.on_cancel(unregister)
+        return child
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise RequestCancelled(self.reason)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """İptal edilene veya süre dolana kadar bekler; iptal edildiyse True"""
+        return self._event.wait(timeout)
+
+
+# O an işlenen isteğin iptal token'ı; thread'lere contextvars.copy_context() ile taşınır
+current_cancel_token: contextvars.ContextVar[Optional[CancellationToken]] = contextvars.ContextVar(
+    "current_cancel_token", default=None
+)
+
+
+def raise_if_cancelled(token: Optional[CancellationToken] = None):
+    """Verilen (yoksa aktif) token iptal edildiyse RequestCancelled fırlatır"""
+    token = token or current_cancel_token.get()
+    if token is not None:
+        token.raise_if_cancelled()
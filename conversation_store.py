@@ -0,0 +1,189 @@
+# conversation_store.py
+
+import os
+import time
+import json
+import sqlite3
+import logging
+import threading
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CONVERSATION_DB_ENV = "KUBEX_CONVERSATION_DB"
+DEFAULT_CONVERSATION_DB = "kubex_conversations.db"
+
+# Sohbet kanalları: UI mesajları, router'ın global bağlamı, agent başına bağlam ("agent:deployment" vb.)
+GLOBAL_CHANNEL = "global"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    cluster_id TEXT,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, id);
+
+CREATE TABLE IF NOT EXISTS interactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    cluster_id TEXT,
+    channel TEXT NOT NULL,
+    agent TEXT,
+    user_message TEXT NOT NULL,
+    assistant_response TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_interactions_session ON interactions (session_id, channel, id);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    cluster_id TEXT,
+    cluster_name TEXT,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def agent_channel(agent_key: str) -> str:
+    return f"agent:{agent_key}"
+
+
+class ConversationStore:
+    """Oturum ve cluster bazında, yalnızca ekleme yapılan SQLite sohbet kaydı.
+
+    Okumalar her zaman sınırlı pencereler döndürür; bellekte tam geçmiş tutulmaz.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        # ":memory:" veritabanı bağlantıya özeldir: tüm thread'ler tek bağlantıyı (kilitle) paylaşır
+        self._shared: Optional[sqlite3.Connection] = None
+        if path == ":memory:":
+            self._shared = sqlite3.connect(path, check_same_thread=False)
+            self._shared.row_factory = sqlite3.Row
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._shared is not None:
+            return self._shared
+        # sqlite3 bağlantıları thread'ler arasında paylaşılmaz: thread başına bir bağlantı
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _write(self, sql: str, params: tuple):
+        try:
+            with self._write_lock:
+                conn = self._connection()
+                with conn:
+                    conn.execute(sql, params)
+        except sqlite3.Error as e:
+            # Kayıt hatası sohbeti durdurmamalı
+            logger.warning(f"[ConversationStore] Yazma başarısız: {e}")
+
+    def _read(self, sql: str, params: tuple) -> List[sqlite3.Row]:
+        try:
+            if self._shared is not None:
+                with self._write_lock:
+                    return self._shared.execute(sql, params).fetchall()
+            return self._connection().execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"[ConversationStore] Okuma başarısız: {e}")
+            return []
+
+    # --- UI mesajları ---
+
+    def append_message(self, session_id: str, cluster_id: Optional[str], role: str, content: Any):
+        if not isinstance(content, str):
+            content = json.dumps(content, ensure_ascii=False, default=str)
+        self._write(
+            "INSERT INTO messages (session_id, cluster_id, role, content, created_at) VALUES (?, ?, ?, ?, ?)",
+            (session_id, cluster_id, role, content, time.time())
+        )
+
+    def recent_messages(self, session_id: str, limit: int, before_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Son 'limit' mesajı (before_id verilirse ondan eskileri) kronolojik sırayla döndürür"""
+        rows = self._read(
+            "SELECT id, role, content, cluster_id FROM messages WHERE session_id = ? AND id < ? "
+            "ORDER BY id DESC LIMIT ?",
+            (session_id, before_id if before_id is not None else 2 ** 63 - 1, limit)
+        )
+        return [dict(row) for row in reversed(rows)]
+
+    def count_messages(self, session_id: str, before_id: Optional[int] = None) -> int:
+        rows = self._read(
+            "SELECT COUNT(*) AS n FROM messages WHERE session_id = ? AND id < ?",
+            (session_id, before_id if before_id is not None else 2 ** 63 - 1)
+        )
+        return rows[0]["n"] if rows else 0
+
+    # --- Agent / router bağlamı ---
+
+    def append_interaction(self, session_id: str, cluster_id: Optional[str], channel: str,
+                           user_message: str, assistant_response: str, agent: Optional[str] = None):
+        self._write(
+            "INSERT INTO interactions (session_id, cluster_id, channel, agent, user_message, assistant_response, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (session_id, cluster_id, channel, agent, user_message or "", assistant_response or "", time.time())
+        )
+
+    def recent_interactions(self, session_id: str, channel: str, limit: int,
+                            cluster_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Kanalın son 'limit' etkileşimini, bağlam listesi formatında ({"user", "assistant", "agent"}) döndürür"""
+        sql = "SELECT user_message, assistant_response, agent FROM interactions WHERE session_id = ? AND channel = ?"
+        params: tuple = (session_id, channel)
+        if cluster_id is not None:
+            sql += " AND cluster_id = ?"
+            params += (cluster_id,)
+        rows = self._read(sql + " ORDER BY id DESC LIMIT ?", params + (limit,))
+        return [
+            {"user": row["user_message"], "assistant": row["assistant_response"],
+             "agent": row["agent"], "timestamp": "recent"}
+            for row in reversed(rows)
+        ]
+
+    # --- Oturumlar ---
+
+    def save_session(self, session_id: str, cluster_id: Optional[str], cluster_name: Optional[str]):
+        self._write(
+            "INSERT INTO sessions (session_id, cluster_id, cluster_name, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET cluster_id = excluded.cluster_id, "
+            "cluster_name = excluded.cluster_name, updated_at = excluded.updated_at",
+            (session_id, cluster_id, cluster_name, time.time())
+        )
+
+    def load_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._read("SELECT session_id, cluster_id, cluster_name FROM sessions WHERE session_id = ?", (session_id,))
+        return dict(rows[0]) if rows else None
+
+
+_conversation_store: Optional[ConversationStore] = None
+_conversation_store_lock = threading.Lock()
+
+
+def get_conversation_store() -> Optional[ConversationStore]:
+    """Süreç genelinde paylaşılan sohbet kaydı; KUBEX_CONVERSATION_DB boş string ise kayıt kapalıdır"""
+    global _conversation_store
+    path = os.environ.get(CONVERSATION_DB_ENV, DEFAULT_CONVERSATION_DB)
+    if not path:
+        return None
+    with _conversation_store_lock:
+        if _conversation_store is None:
+            try:
+                _conversation_store = ConversationStore(path)
+                print(f"[ConversationStore] Sohbet kaydı: {path}")
+            except sqlite3.Error as e:
+                logger.error(f"[ConversationStore] Veritabanı açılamadı ({path}): {e}")
+                return None
+        return _conversation_store
@@ -0,0 +1,178 @@
+# job_manager.py
+
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, Any, List, Optional, Callable
+
+from cancellation import RequestCancelled, current_cancel_token
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+@dataclass
+class Job:
+    job_id: str
+    cluster_id: str
+    operation: str
+    description: str
+    status: JobStatus = JobStatus.QUEUED
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in (JobStatus.QUEUED, JobStatus.RUNNING)
+
+    def to_dict(self) -> Dict[str, Any]:
+        end = self.finished_at or time.time()
+        return {
+            "job_id": self.job_id,
+            "cluster_id": self.cluster_id,
+            "operation": self.operation,
+            "description": self.description,
+            "status": self.status.value,
+            "elapsed_seconds": round(end - (self.started_at or self.submitted_at), 1),
+            "result": self.result,
+            "error": self.error
+        }
+
+
+class JobManager:
+    """Uzun süren işlemleri (Helm install/update vb.) arka planda çalıştıran iş yöneticisi"""
+
+    def __init__(self, max_workers: int = 4, max_jobs_per_cluster: int = 2, max_history: int = 200):
+        self.max_jobs_per_cluster = max_jobs_per_cluster
+        self.max_history = max_history
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kubex-job")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, cluster_id: str, operation: str, func: Callable[..., Dict[str, Any]],
+               *args, description: str = "", on_finish: Optional[Callable[[Job], None]] = None,
+               **kwargs) -> Dict[str, Any]:
+        """İşi kuyruğa ekler ve hemen döner; cluster başına aktif iş limiti aşılırsa reddeder.
+
+        on_finish, iş (başarılı ya da başarısız) bittiğinde iş nesnesiyle çağrılır.
+        """
+        cluster_id = str(cluster_id)
+        with self._lock:
+            active = [j for j in self._jobs.values() if j.cluster_id == cluster_id and j.is_active]
+            if len(active) >= self.max_jobs_per_cluster:
+                return {
+                    "status": "error",
+                    "message": (
+                        f"Bu cluster için zaten {len(active)} arka plan işi çalışıyor "
+                        f"(limit: {self.max_jobs_per_cluster}). Lütfen biri tamamlanınca tekrar deneyin."
+                    ),
+                    "cluster_id": cluster_id,
+                    "active_jobs": [j.job_id for j in active]
+                }
+
+            job = Job(
+                job_id=uuid.uuid4().hex[:8],
+                cluster_id=cluster_id,
+                operation=operation,
+                description=description or operation
+            )
+            self._jobs[job.job_id] = job
+            self._prune_locked()
+
+        print(f"[JobManager] İş kuyruğa alındı: {job.job_id} ({operation}, cluster={cluster_id})")
+        self._executor.submit(self._run, job, func, args, kwargs, on_finish)
+
+        return {
+            "status": "accepted",
+            "job_id": job.job_id,
+            "cluster_id": cluster_id,
+            "operation": operation,
+            "message": f"{job.description} işlemi arka planda başlatıldı (iş ID: {job.job_id})"
+        }
+
+    def _run(self, job: Job, func: Callable[..., Dict[str, Any]], args: tuple, kwargs: Dict[str, Any],
+             on_finish: Optional[Callable[[Job], None]] = None):
+        job.status = JobStatus.RUNNING
+        job.started_at = time.time()
+        try:
+            result = func(*args, **kwargs)
+            job.result = result
+            succeeded = not isinstance(result, dict) or result.get("status") == "success"
+            job.status = JobStatus.SUCCEEDED if succeeded else JobStatus.FAILED
+            if not succeeded:
+                job.error = result.get("message")
+        except Exception as e:
+            logger.error(f"[JobManager] İş başarısız oldu ({job.job_id}): {e}")
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            print(f"[JobManager] İş tamamlandı: {job.job_id} -> {job.status.value}")
+            if on_finish is not None:
+                try:
+                    on_finish(job)
+                except Exception as e:
+                    logger.warning(f"[JobManager] İş sonrası işlem başarısız ({job.job_id}): {e}")
+
+    def _prune_locked(self):
+        """Geçmiş limitini aşan en eski bitmiş işleri siler"""
+        finished = [j for j in self._jobs.values() if not j.is_active]
+        overflow = len(self._jobs) - self.max_history
+        for job in sorted(finished, key=lambda j: j.submitted_at)[:max(0, overflow)]:
+            del self._jobs[job.job_id]
+
+    def get_job(self, job_id: str, cluster_id: Optional[str] = None) -> Optional[Job]:
+        """İşi döndürür; cluster_id verilirse başka cluster'ın işi bulunamamış sayılır"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None and cluster_id is not None and job.cluster_id != str(cluster_id):
+            return None
+        return job
+
+    def list_jobs(self, cluster_id: Optional[str] = None) -> List[Job]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        if cluster_id is not None:
+            jobs = [j for j in jobs if j.cluster_id == str(cluster_id)]
+        return sorted(jobs, key=lambda j: j.submitted_at, reverse=True)
+
+    def wait(self, job_id: str, timeout: float, poll_interval: float = 0.25) -> Optional[Job]:
+        """İş bitene veya süre dolana kadar bekler; işin son halini döndürür.
+
+        Bekleme isteğin iptal token'ına bağlıdır: iptal edilirse RequestCancelled fırlatılır (iş arka planda sürer).
+        """
+        deadline = time.monotonic() + timeout
+        cancel_token = current_cancel_token.get()
+        job = self.get_job(job_id)
+        while job and job.is_active and time.monotonic() < deadline:
+            if cancel_token is None:
+                time.sleep(poll_interval)
+            elif cancel_token.wait(poll_interval):
+                raise RequestCancelled(cancel_token.reason)
+        return job
+
+
+_job_manager: Optional[JobManager] = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """Süreç genelinde paylaşılan JobManager örneğini döndürür"""
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = JobManager()
+        return _job_manager
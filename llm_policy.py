@@ -0,0 +1,120 @@
+# llm_policy.py
+
+import os
+import json
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Servis bazında politika: JSON, ör. {"routing": [{"model": "qwen3:4b"}, {"url": "http://replica-2:11434"}]}
+LLM_POLICIES_ENV = "KUBEX_LLM_POLICIES"
+
+# Gecikme penceresi (model + servis başına son N karar süresi)
+LATENCY_WINDOW = 200
+
+
+@dataclass(frozen=True)
+class HedgeTarget:
+    """Yedek istek hedefi: daha küçük bir model ve/veya başka bir Ollama replikası"""
+    model: Optional[str] = None
+    url: Optional[str] = None
+
+
+@dataclass
+class LLMCallPolicy:
+    """Bir LLM servisinin gecikme bütçesi ve yedek (hedge) istek hedefleri"""
+    hedge_targets: List[HedgeTarget] = field(default_factory=list)
+    # Ana çağrı bu yüzdelik dilimi aşınca sıradaki hedefe yedek istek gönderilir
+    budget_percentile: float = 0.95
+    min_budget_seconds: float = 1.0
+    max_budget_seconds: float = 20.0
+    # Yeterli örnek birikene kadar kullanılan bütçe
+    default_budget_seconds: float = 8.0
+    min_samples: int = 20
+
+
+# Kısa karar çağrıları hedge edilir; özet akışları kullanıcıya aktığı için edilmez
+DEFAULT_LLM_POLICIES: Dict[str, LLMCallPolicy] = {
+    "routing": LLMCallPolicy(hedge_targets=[HedgeTarget(model="qwen3:4b"), HedgeTarget(model="qwen3:1.7b")]),
+    "tool_selection": LLMCallPolicy(hedge_targets=[HedgeTarget(model="qwen3:4b")]),
+}
+
+
+def _parse_policy(value: Any) -> LLMCallPolicy:
+    if isinstance(value, list):
+        value = {"hedge_targets": value}
+    if not isinstance(value, dict):
+        raise ValueError(f"Geçersiz politika: {value!r}")
+    options = dict(value)
+    targets = [HedgeTarget(model=t.get("model"), url=t.get("url")) for t in options.pop("hedge_targets", [])]
+    return LLMCallPolicy(hedge_targets=targets, **options)
+
+
+def load_llm_policies() -> Dict[str, LLMCallPolicy]:
+    """Varsayılan politikalar; KUBEX_LLM_POLICIES verilen servisleri ezer (boş liste = hedge kapalı)"""
+    policies = dict(DEFAULT_LLM_POLICIES)
+    raw = os.environ.get(LLM_POLICIES_ENV)
+    if not raw:
+        return policies
+    try:
+        for service, value in json.loads(raw).items():
+            policies[service] = _parse_policy(value)
+    except (ValueError, TypeError, AttributeError) as e:
+        logger.error(f"[LLMPolicy] {LLM_POLICIES_ENV} okunamadı, varsayılanlar kullanılıyor: {e}")
+        return dict(DEFAULT_LLM_POLICIES)
+    return policies
+
+
+class LatencyTracker:
+    """Servis ve model bazında son karar sürelerini tutar; yüzdelik dilimleri ve hedge sayaçlarını verir"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._samples: Dict[Tuple[str, str], deque] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, service: str, model: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get((service, model))
+            if samples is None:
+                samples = self._samples.setdefault((service, model), deque(maxlen=self.window))
+            samples.append(seconds)
+
+    def count(self, service: str, event: str):
+        """Hedge olaylarını sayar: 'calls', 'hedged', 'hedge_wins', 'fallbacks'"""
+        with self._lock:
+            counters = self._counters.setdefault(service, {})
+            counters[event] = counters.get(event, 0) + 1
+
+    def percentile(self, service: str, model: str, p: float, min_samples: int = 1) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get((service, model), ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        index = min(len(samples) - 1, max(0, int(round(p * len(samples))) - 1))
+        return samples[index]
+
+    def budget(self, service: str, model: str, policy: LLMCallPolicy) -> float:
+        """Ana çağrının yedek istek gönderilmeden önce bekleneceği süre"""
+        observed = self.percentile(service, model, policy.budget_percentile, policy.min_samples)
+        budget = policy.default_budget_seconds if observed is None else observed
+        return min(policy.max_budget_seconds, max(policy.min_budget_seconds, budget))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            keys = list(self._samples)
+            counters = {service: dict(c) for service, c in self._counters.items()}
+        latency = {}
+        for service, model in keys:
+            latency[f"{service}/{model}"] = {
+                "samples": len(self._samples[(service, model)]),
+                "p50": round(self.percentile(service, model, 0.50) or 0.0, 3),
+                "p95": round(self.percentile(service, model, 0.95) or 0.0, 3),
+                "p99": round(self.percentile(service, model, 0.99) or 0.0, 3),
+            }
+        return {"latency_seconds": latency, "hedging": counters}
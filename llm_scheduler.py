@@ -0,0 +1,156 @@
+# llm_scheduler.py
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+from cancellation import CancellationToken, RequestCancelled
+
+logger = logging.getLogger(__name__)
+
+# Öncelik sınıfları, en yüksekten en düşüğe: kısa karar çağrıları uzun özet akışlarının önüne geçer
+PRIORITY_ROUTING = "routing"
+PRIORITY_TOOL_SELECTION = "tool_selection"
+PRIORITY_SUMMARIZATION = "summarization"
+PRIORITY_BACKGROUND = "background"
+PRIORITY_ORDER = (PRIORITY_ROUTING, PRIORITY_TOOL_SELECTION, PRIORITY_SUMMARIZATION, PRIORITY_BACKGROUND)
+
+# Ollama'ya aynı anda gönderilen en fazla istek (sunucudaki OLLAMA_NUM_PARALLEL ile uyumlu olmalı)
+LLM_CONCURRENCY_ENV = "KUBEX_LLM_CONCURRENCY"
+DEFAULT_LLM_CONCURRENCY = 4
+
+# Sınıf başına eşzamanlılık üst sınırı; özet ve arka plan işleri toplam kapasitenin tamamını tutamaz,
+# böylece yönlendirme / araç seçimi için her zaman boş bir slot kalır
+LLM_CLASS_LIMITS: Dict[str, int] = {
+    PRIORITY_ROUTING: 4,
+    PRIORITY_TOOL_SELECTION: 4,
+    PRIORITY_SUMMARIZATION: 3,
+    PRIORITY_BACKGROUND: 1,
+}
+
+
+class _Waiter:
+    def __init__(self):
+        self.event = threading.Event()
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+
+
+class _ClassStats:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self.queue: deque = deque()
+        self.completed = 0
+        self.cancelled = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+
+class LLMScheduler:
+    """OllamaClient önündeki öncelikli kuyruk: toplam ve sınıf başına eşzamanlılık sınırı, kuyruk süresi metrikleri.
+
+    Slot boşaldığında kuyruktaki en yüksek öncelikli (ve sınıf sınırına ulaşmamış) istek gönderilir;
+    aynı sınıf içinde sıra korunur.
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None, class_limits: Optional[Dict[str, int]] = None):
+        if max_concurrency is None:
+            max_concurrency = int(os.environ.get(LLM_CONCURRENCY_ENV) or DEFAULT_LLM_CONCURRENCY)
+        self.max_concurrency = max(1, max_concurrency)
+        limits = class_limits or LLM_CLASS_LIMITS
+        self._classes = {name: _ClassStats(min(limits.get(name, 1), self.max_concurrency)) for name in PRIORITY_ORDER}
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    def _class(self, priority: str) -> _ClassStats:
+        stats = self._classes.get(priority)
+        if stats is None:
+            logger.warning(f"[LLMScheduler] Bilinmeyen öncelik sınıfı '{priority}', arka plan olarak işleniyor")
+            stats = self._classes[PRIORITY_BACKGROUND]
+        return stats
+
+    def _dispatch_locked(self):
+        while self._in_flight < self.max_concurrency:
+            for stats in self._classes.values():
+                if stats.queue and stats.in_flight < stats.limit:
+                    waiter = stats.queue.popleft()
+                    stats.in_flight += 1
+                    self._in_flight += 1
+                    waiter.granted = True
+                    waiter.event.set()
+                    break
+            else:
+                return
+
+    def acquire(self, priority: str, cancel_token: Optional[CancellationToken] = None) -> float:
+        """Slot alınana kadar bekler; kuyrukta geçen süreyi döndürür. Token iptal edilirse kuyruktan çıkar"""
+        stats = self._class(priority)
+        waiter = _Waiter()
+        with self._lock:
+            stats.queue.append(waiter)
+            self._dispatch_locked()
+
+        if not waiter.granted:
+            unregister = cancel_token.on_cancel(waiter.event.set) if cancel_token else None
+            waiter.event.wait()
+            if unregister:
+                unregister()
+
+        waited = time.monotonic() - waiter.enqueued_at
+        with self._lock:
+            if not waiter.granted:
+                try:
+                    stats.queue.remove(waiter)
+                except ValueError:
+                    pass
+                stats.cancelled += 1
+                raise RequestCancelled(cancel_token.reason)
+            stats.waited += 1
+            stats.total_wait += waited
+            stats.max_wait = max(stats.max_wait, waited)
+        if waited > 1.0:
+            logger.info(f"[LLMScheduler] '{priority}' isteği {waited:.2f} sn kuyrukta bekledi")
+        return waited
+
+    def release(self, priority: str):
+        stats = self._class(priority)
+        with self._lock:
+            stats.in_flight -= 1
+            stats.completed += 1
+            self._in_flight -= 1
+            self._dispatch_locked()
+
+    @contextmanager
+    def slot(self, priority: str, cancel_token: Optional[CancellationToken] = None):
+        """Bir LLM çağrısı için slot ayırır; akışlı çağrılarda slot akış kapanana kadar tutulur"""
+        self.acquire(priority, cancel_token)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            classes = {
+                name: {
+                    "limit": stats.limit,
+                    "in_flight": stats.in_flight,
+                    "queue_depth": len(stats.queue),
+                    "completed": stats.completed,
+                    "cancelled_in_queue": stats.cancelled,
+                    "avg_wait_seconds": round(stats.total_wait / stats.waited, 3) if stats.waited else 0.0,
+                    "max_wait_seconds": round(stats.max_wait, 3),
+                }
+                for name, stats in self._classes.items()
+            }
+            return {"max_concurrency": self.max_concurrency, "in_flight": self._in_flight, "classes": classes}
+
+
+# Süreç genelinde tüm OllamaClient'lar tarafından paylaşılır
+llm_scheduler = LLMScheduler()
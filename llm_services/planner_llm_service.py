@@ -0,0 +1,122 @@
+# llm_services/planner_llm_service.py
+
+from typing import Dict, Any, Optional, Tuple
+
+from tools.tool_registry import tool_registry
+from llm_scheduler import PRIORITY_TOOL_SELECTION
+
+# Tek bir planda izin verilen en fazla adım sayısı
+MAX_PLAN_STEPS = 6
+
+
+class PlannerLLMService:
+    """
+    Birden fazla eylem içeren talepleri, agent'lar arası araç çağrılarından oluşan küçük bir DAG'a çeviren LLM servisi.
+    """
+    def __init__(self, client: Any):
+        self.client = client
+        # agent seti + araç parmak izleri -> planlayıcı prompt'u
+        self._prompt_cache: Dict[Tuple, str] = {}
+
+    def _build_system_prompt(self, agents: Dict[str, Any]) -> str:
+        """Planlayıcı için tüm agent'ların araç setlerini içeren sabit sistem komutunu oluşturur."""
+        catalogs = {key: agent.get_tools() for key, agent in agents.items()}
+        cache_key = tuple((key, getattr(tools, "fingerprint", None)) for key, tools in catalogs.items())
+        cached = self._prompt_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        sections = [
+            f"### AGENT: {key} ({agents[key].category}) ###\n{tool_registry.render_tools_prompt(tools)}"
+            for key, tools in catalogs.items()
+        ]
+        prompt = (
+            "### GÖREV ###\n"
+            "Sen, KUBEX platformunda birden fazla eylem içeren kullanıcı taleplerini adımlara bölen bir planlayıcısın. "
+            "Her adım, aşağıdaki agent'lardan birinin tek bir aracını çağırır.\n\n"
+            "### KURALLAR ###\n"
+            f"1. En fazla {MAX_PLAN_STEPS} adım üret; sadece kullanıcının istediği eylemleri planla.\n"
+            "2. Her adımın benzersiz bir 'id' değeri olsun (s1, s2, ...).\n"
+            "3. Bir adım, başka bir adımın sonucunu görmeden çalışamıyorsa (ör. önce ölçekle, sonra durumunu göster) "
+            "'depends_on' listesine o adımın id'sini yaz. Birbirinden bağımsız adımlarda 'depends_on' boş olmalı; "
+            "bunlar paralel çalıştırılır.\n"
+            "4. Kullanıcının verdiği bilgilerden parametreleri çıkar; 'cluster_id' yazma, otomatik eklenir.\n\n"
+            "### ÇIKTI FORMATI ###\n"
+            "SADECE aşağıdaki JSON objesini döndür:\n"
+            '{"steps": [{"id": "s1", "agent": "deployment", "tool_name": "scale_deployment", '
+            '"parameters": {"deployment_name": "redis", "replicas": 3}, "depends_on": []}, '
+            '{"id": "s2", "agent": "deployment", "tool_name": "get_deployment_config", '
+            '"parameters": {"deployment_name": "nginx"}, "depends_on": []}]}\n\n'
+            "### ARAÇLAR ###\n" + "\n\n".join(sections) + "\n"
+        )
+        self._prompt_cache[cache_key] = prompt
+        return prompt
+
+    def create_plan(self, user_prompt: str, agents: Dict[str, Any], context_summary: str = "") -> Dict[str, Any]:
+        """LLM'den plan ister ve doğrular; {"status": "success", "steps": [...]} veya hata döndürür"""
+        system_prompt = self._build_system_prompt(agents)
+        if context_summary:
+            system_prompt = f"{system_prompt}\n### SON SOHBET OZETI ###\n{context_summary}\n"
+
+        try:
+            parser = self.client.chat_decision(
+                user_prompt=user_prompt,
+                system_prompt=system_prompt,
+                required_key="steps",
+                priority=PRIORITY_TOOL_SELECTION,
+                service="planning"
+            )
+        except Exception as e:
+            return {"status": "error", "message": f"Plan oluşturulamadı: {e}"}
+
+        print(f"[PlannerLLMService] Raw LLM Output: {parser.text}")
+        if parser.decision is None:
+            return {"status": "error", "message": "Planlayıcı geçerli bir plan üretemedi."}
+
+        error = self.validate_plan(parser.decision.get("steps"), agents)
+        if error:
+            return {"status": "error", "message": error}
+        return {"status": "success", "steps": parser.decision["steps"]}
+
+    @staticmethod
+    def validate_plan(steps: Any, agents: Dict[str, Any]) -> Optional[str]:
+        """Plan adımlarını doğrular; hata mesajı veya None döndürür"""
+        if not isinstance(steps, list) or not steps:
+            return "Plan boş veya geçersiz."
+        if len(steps) > MAX_PLAN_STEPS:
+            return f"Plan en fazla {MAX_PLAN_STEPS} adım içerebilir."
+
+        ids = set()
+        for step in steps:
+            if not isinstance(step, dict) or not step.get("id"):
+                return "Plan adımlarının her birinin bir 'id' değeri olmalı."
+            if step["id"] in ids:
+                return f"'{step['id']}' adımı birden fazla kez tanımlanmış."
+            ids.add(step["id"])
+
+            agent = agents.get(step.get("agent"))
+            if agent is None:
+                return f"'{step['id']}' adımı için bilinmeyen agent: {step.get('agent')}"
+            if step.get("tool_name") not in agent.get_tools():
+                return f"'{step['id']}' adımı için '{step.get('agent')}' agent'ında '{step.get('tool_name')}' aracı yok."
+            step.setdefault("parameters", {})
+            step.setdefault("depends_on", [])
+            if not isinstance(step["parameters"], dict) or not isinstance(step["depends_on"], list):
+                return f"'{step['id']}' adımının parametre veya bağımlılık formatı geçersiz."
+
+        for step in steps:
+            unknown = [d for d in step["depends_on"] if d not in ids]
+            if unknown:
+                return f"'{step['id']}' adımı tanımsız adımlara bağlı: {unknown}"
+
+        # Döngü kontrolü (Kahn)
+        remaining = {s["id"]: set(s["depends_on"]) for s in steps}
+        while remaining:
+            ready = [i for i, deps in remaining.items() if not deps]
+            if not ready:
+                return f"Plan adımları arasında döngüsel bağımlılık var: {sorted(remaining)}"
+            for i in ready:
+                del remaining[i]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return None
@@ -1,7 +1,9 @@
 # llm_services/router_llm_service.py
 
 import json
-from typing import Dict, Any,Optional
+from typing import Dict, Any, Callable, Optional
+
+from llm_scheduler import PRIORITY_ROUTING
 
 class RouterLLMService:
     """
@@ -10,54 +12,75 @@ class RouterLLMService:
     def __init__(self, client: Any):
         self.client = client
         self.system_prompt = ""
+        # agent listesi metni -> prompt'un değişmeyen kısmı
+        self._static_prompts: Dict[str, str] = {}
 
-    def _build_system_prompt(self, agents: Dict[str, Any], context_summary: str) -> str:
-        """Router LLM için sistem komutunu dinamik olarak oluşturur."""
+    def _get_static_prompt(self, agents: Dict[str, Any]) -> str:
+        """Agent setine bağlı sabit prompt'u bir kez oluşturur; aynı agent seti için bayt bayt aynıdır"""
         agent_descriptions = [
             f"- {key}: {agent.category} - {agent.description}" 
             for key, agent in agents.items()
         ]
         agents_text = "\n".join(agent_descriptions)
 
-        context_info = f"\n\n### SON SOHBET OZETI ###\n{context_summary}\n" if context_summary else ""
+        static_prompt = self._static_prompts.get(agents_text)
+        if static_prompt is None:
+            static_prompt = (
+                "### GÖREV VE KİMLİK ###\n"
+                "Sen, KUBEX Kubernetes Yönetim Platformu'nun ana yönlendiricisi olan bir \"Triage Uzmanı\"sın. "
+                "Temel görevin, kullanıcıdan gelen talebi derinlemesine analiz ederek, bu talebi en doğru şekilde karşılayacak "
+                "uzmanlık alanını (agent) belirlemektir.\n\n"
+                f"### UZMANLIK ALANLARI (AGENT'LAR) ###\n{agents_text}\n\n"
+                "### KARAR VERME SÜRECİ ###\n"
+                "1. **Amacı Anlama:** Kullanıcının talebini incele (listeleme, oluşturma, silme, genel sohbet vb.).\n"
+                "2. **Kaynak Türü:** Talebin merkezindeki kaynağı belirle (Cluster, Deployment, Namespace vb.).\n"
+                "3. **Bağlamı Değerlendirme:** Sohbet geçmişini (varsa en sondaki SON SOHBET OZETI) kullanarak kullanıcının bir önceki adıma devam edip etmediğini anla.\n"
+                "4. **Birden Fazla Eylem:** Talep birden fazla ayrı eylem içeriyorsa (ör. 'redis'i 3 replicaya çıkar ve nginx'in config'ini göster'), agent olarak 'plan' seç.\n\n"
+                "### ÇIKTI FORMATI ###\n"
+                "Kararını ve mantığını (`reasoning`) içeren, **SADECE** aşağıdaki formatta bir JSON objesi döndür. "
+                "Yanıtına başka hiçbir metin ekleme.\n\n"
+                "```json\n"
+                "{\n"
+                '  "agent": "ilgili_agent_adi | plan | chat",\n'
+                '  "reasoning": "Kararın arkasındaki kısa mantık.",\n'
+                '  "response": "Eğer agent \'chat\' ise, kullanıcıya verilecek sohbet cevabı."\n'
+                "}\n"
+                "```"
+            )
+            self._static_prompts[agents_text] = static_prompt
+        return static_prompt
+
+    def _build_system_prompt(self, agents: Dict[str, Any], context_summary: str) -> str:
+        """Router LLM için sistem komutunu oluşturur; değişen sohbet özeti en sona eklenir."""
+        static_prompt = self._get_static_prompt(agents)
+        if not context_summary:
+            return static_prompt
+        return f"{static_prompt}\n\n### SON SOHBET OZETI ###\n{context_summary}\n"
 
-        return (
-            "### GÖREV VE KİMLİK ###\n"
-            "Sen, KUBEX Kubernetes Yönetim Platformu'nun ana yönlendiricisi olan bir \"Triage Uzmanı\"sın. "
-            "Temel görevin, kullanıcıdan gelen talebi derinlemesine analiz ederek, bu talebi en doğru şekilde karşılayacak "
-            "uzmanlık alanını (agent) belirlemektir.\n\n"
-            f"### UZMANLIK ALANLARI (AGENT'LAR) ###\n{agents_text}\n"
-            f"{context_info}"
-            "### KARAR VERME SÜRECİ ###\n"
-            "1. **Amacı Anlama:** Kullanıcının talebini incele (listeleme, oluşturma, silme, genel sohbet vb.).\n"
-            "2. **Kaynak Türü:** Talebin merkezindeki kaynağı belirle (Cluster, Deployment, Namespace vb.).\n"
-            "3. **Bağlamı Değerlendirme:** Sohbet geçmişini kullanarak kullanıcının bir önceki adıma devam edip etmediğini anla.\n\n"
-            "### ÇIKTI FORMATI ###\n"
-            "Kararını ve mantığını (`reasoning`) içeren, **SADECE** aşağıdaki formatta bir JSON objesi döndür. "
-            "Yanıtına başka hiçbir metin ekleme.\n\n"
-            "```json\n"
-            "{\n"
-            '  "agent": "ilgili_agent_adi | chat",\n'
-            '  "reasoning": "Kararın arkasındaki kısa mantık.",\n'
-            '  "response": "Eğer agent \'chat\' ise, kullanıcıya verilecek sohbet cevabı."\n'
-            "}\n"
-            "```"
-        )
+    def get_routing_decision(self, user_prompt: str, agents: Dict[str, Any], context_summary: str,
+                             on_agent: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """LLM'den agent yönlendirme kararını akış üzerinden alır; karar JSON'u tamamlanınca akışı keser.
 
-    def get_routing_decision(self, user_prompt: str, agents: Dict[str, Any], context_summary: str) -> Dict[str, Any]:
-        """LLM'den agent yönlendirme kararını alır."""
+        on_agent, 'agent' değeri akışta görünür görünmez çağrılır; sonraki aşama hazırlığa erken başlayabilir.
+        """
         system_prompt = self._build_system_prompt(agents, context_summary)
         try:
-            response = self.client.chat(
-                user_prompt=user_prompt, 
-                system_prompt=system_prompt, 
-                use_history=False  # Router için history kullanma
+            # Gecikme bütçesi aşılırsa politika daha küçük modele / başka replikaya yedek istek gönderir
+            parser = self.client.chat_decision(
+                user_prompt=user_prompt,
+                system_prompt=system_prompt,  # Router için history kullanılmaz
+                required_key="agent",
+                on_key=on_agent,
+                priority=PRIORITY_ROUTING,
+                service="routing"
             )
-            content = response.get("message", {}).get("content", "{}")
+            content = parser.text
             
             print(f"[RouterLLMService] Raw LLM Output: {content}")
+            if parser.decision is not None:
+                return parser.decision
             
-            # Geliştirilmiş JSON çıkarma
+            # Akışta dengeli bir karar nesnesi bulunamadı; toleranslı çıkarmaya düş
             json_result = self._extract_json_safely(content)
             if json_result:
                 return json_result
@@ -0,0 +1,141 @@
+# llm_services/stream_decision_parser.py
+
+import re
+import json
+from typing import Any, Callable, Dict, Iterable, Optional
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+
+
+class StreamingDecisionParser:
+    """LLM akışını parça parça okuyup ilk geçerli karar JSON'unu tamamlandığı anda döndürür.
+
+    Dengeli süslü parantez tarayıcısı string içindeki parantezleri ve kaçış karakterlerini
+    dikkate alır, <think> bloklarını atlar. `required_key` içeren ilk nesne karar kabul edilir.
+    `on_key` verilirse, bu anahtarın değeri nesne tamamlanmadan, görüldüğü anda bildirilir.
+    """
+
+    def __init__(self, required_key: str, on_key: Optional[Callable[[str], None]] = None):
+        self.required_key = required_key
+        self.on_key = on_key
+        self._key_pattern = re.compile(r'"%s"\s*:\s*"((?:[^"\\]|\\.)*)"' % re.escape(required_key))
+        self._key_reported = False
+
+        self.text = ""
+        self._pos = 0
+        self._in_think = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._start: Optional[int] = None
+        self.decision: Optional[Dict[str, Any]] = None
+
+    def feed(self, chunk: str) -> Optional[Dict[str, Any]]:
+        """Yeni parçayı işler; karar tamamlandıysa karar sözlüğünü döndürür"""
+        if self.decision is not None:
+            return self.decision
+        self.text += chunk
+
+        while self._pos < len(self.text):
+            if self._start is None:
+                think_state = self._skip_think()
+                if think_state == "wait":
+                    break
+                if think_state == "skipped":
+                    continue
+
+            char = self.text[self._pos]
+            self._pos += 1
+
+            if self._start is None:
+                if char == "{":
+                    self._start = self._pos - 1
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    decision = self._try_decode(self.text[self._start:self._pos])
+                    self._start = None
+                    if decision is not None:
+                        self.decision = decision
+                        if self.on_key and not self._key_reported:
+                            self._key_reported = True
+                            self.on_key(decision[self.required_key])
+                        return decision
+
+        self._report_key()
+        return None
+
+    def _skip_think(self) -> Optional[str]:
+        """Nesne dışındayken <think> bloklarını atlar: 'skipped', 'wait' (sonraki parça gerekli) veya None"""
+        if self._in_think:
+            end = self.text.find(THINK_CLOSE, self._pos)
+            if end == -1:
+                # Kapanış etiketi parçalar arasında bölünmüş olabilir
+                self._pos = max(self._pos, len(self.text) - len(THINK_CLOSE) + 1)
+                return "wait"
+            self._pos = end + len(THINK_CLOSE)
+            self._in_think = False
+            return "skipped"
+
+        rest = self.text[self._pos:self._pos + len(THINK_OPEN)]
+        if rest == THINK_OPEN:
+            self._pos += len(THINK_OPEN)
+            self._in_think = True
+            return "skipped"
+        if rest.startswith("<") and THINK_OPEN.startswith(rest):
+            # Açılış etiketinin sadece başı geldi
+            return "wait"
+        return None
+
+    def _try_decode(self, candidate: str) -> Optional[Dict[str, Any]]:
+        try:
+            decoded = json.loads(candidate)
+        except json.JSONDecodeError:
+            return None
+        if isinstance(decoded, dict) and self.required_key in decoded:
+            return decoded
+        return None
+
+    def _report_key(self):
+        if self.on_key is None or self._key_reported or self._start is None:
+            return
+        match = self._key_pattern.search(self.text, self._start)
+        if match:
+            self._key_reported = True
+            try:
+                value = json.loads(f'"{match.group(1)}"')
+            except json.JSONDecodeError:
+                value = match.group(1)
+            self.on_key(value)
+
+
+def parse_stream(chunks: Iterable[str], required_key: str,
+                 on_key: Optional[Callable[[str], None]] = None) -> StreamingDecisionParser:
+    """Akışı karar tamamlanana kadar tüketir, ardından akışı kapatır (kalan token'lar üretilmez)"""
+    parser = StreamingDecisionParser(required_key, on_key=on_key)
+    try:
+        for chunk in chunks:
+            if parser.feed(chunk) is not None:
+                break
+    finally:
+        close = getattr(chunks, "close", None)
+        if close:
+            close()
+    return parser
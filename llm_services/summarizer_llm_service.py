@@ -1,7 +1,10 @@
 # llm_services/summarizer_llm_service.py
 
 import json
-from typing import Any, Generator
+from typing import Any, Dict, Generator, List, Optional
+
+from llm_scheduler import PRIORITY_SUMMARIZATION
+from tracing import tracer
 
 class SummarizerLLMService:
     """
@@ -10,37 +13,53 @@ class SummarizerLLMService:
     def __init__(self, client: Any):
         self.client = client
 
+    # Özetleme talimatları her çağrıda aynıdır; system prompt olarak en başta gönderilir
+    SUMMARY_SYSTEM_PROMPT = (
+        "### GÖREV VE PERSONA ###\n"
+        "Senin görevin, bir API aracından gelen teknik JSON verisini analiz etmek ve sonucu kullanıcıya sunmaktır. "
+        "Sen, teknik bilgiyi basitleştiren, kullanıcı dostu ve proaktif bir tercümansın.\n\n"
+        "### TALİMATLAR ###\n"
+        "1. **Bağlamı Koru:** Kullanıcının orijinal isteğini (`ORIJINAL KULLANICI ISTEGI`) dikkate alarak yanıt ver.\n"
+        "2. **Başarı Durumu Yorumlama:** Eğer işlem başarılıysa (`status: success`), sonucu özetle. Liste boşsa bunu netçe belirt.\n"
+        "3. **Hata Durumu Yorumlama (Proaktif Yaklaşım):** Eğer işlem başarısızsa (`status: error`), hatayı kullanıcı diline çevir, olası nedeni tahmin et ve bir sonraki adım için öneride bulun.\n\n"
+        "### ÇIKIŞ ###\nKullanıcı mesajındaki verilere göre, yukarıdaki talimatlara uygun, akıcı ve doğal dilde (Türkçe) yanıtı üret."
+    )
+
     def _build_summary_prompt(self, tool_result: Any, original_request: str) -> str:
-        """Özetleme LLM'i için sistem komutunu oluşturur."""
+        """Özetlenecek verileri içeren kullanıcı mesajını oluşturur."""
         json_data = json.dumps(tool_result, indent=2, ensure_ascii=False)
 
         return (
-            "### GÖREV VE PERSONA ###\n"
-            "Senin görevin, bir API aracından gelen teknik JSON verisini analiz etmek ve sonucu kullanıcıya sunmaktır. "
-            "Sen, teknik bilgiyi basitleştiren, kullanıcı dostu ve proaktif bir tercümansın.\n\n"
-            "### TALİMATLAR ###\n"
-            "1. **Bağlamı Koru:** Kullanıcının orijinal isteğini (`ORIJINAL KULLANICI ISTEGI`) dikkate alarak yanıt ver.\n"
-            "2. **Başarı Durumu Yorumlama:** Eğer işlem başarılıysa (`status: success`), sonucu özetle. Liste boşsa bunu netçe belirt.\n"
-            "3. **Hata Durumu Yorumlama (Proaktif Yaklaşım):** Eğer işlem başarısızsa (`status: error`), hatayı kullanıcı diline çevir, olası nedeni tahmin et ve bir sonraki adım için öneride bulun.\n\n"
             "### VERİLER ###\n"
             f"**ORIJINAL KULLANICI ISTEGI:** {original_request}\n\n"
-            f"**İŞLENECEK TEKNİK JSON VERİSİ:**\n{json_data}\n\n"
-            f"### ÇIKIŞ ###\nYukarıdaki talimatlara göre oluşturulmuş, akıcı ve doğal dilde (Türkçe) yanıtı üret."
+            f"**İŞLENECEK TEKNİK JSON VERİSİ:**\n{json_data}"
         )
 
-    def summarize_stream(self, tool_result: Any, original_request: str, agent_category: str) -> Generator[str, None, None]:
+    def summarize_stream(self, tool_result: Any, original_request: str, agent_category: str,
+                         history: Optional[List[Dict[str, str]]] = None) -> Generator[str, None, None]:
         """LLM'den bir araç sonucunu akış olarak özetlemesini ister."""
         summary_prompt = self._build_summary_prompt(tool_result, original_request)
         print("\n" + "="*50)
         print(f"[{agent_category}] Araç sonucu için LLM'den özet isteniyor (orijinal istek: {original_request[:50]}...)")
         print("="*50 + "\n")
 
-        # chat_stream metodu doğrudan user_prompt'u işler, system_prompt ayrı bir parametre olarak verilmeyebilir
-        # Bu yüzden tüm prompt'u tek bir string olarak gönderiyoruz.
-        # Eğer client'ınız system ve user prompt'ları ayrı alıyorsa, ona göre düzenleyin.
+        # Sabit talimatlar system prompt'ta, değişen veriler kullanıcı mesajında: prompt öneki turlar arasında aynı kalır
         response_generator = self.client.chat_stream(
             user_prompt=summary_prompt,
-            use_history=True 
+            system_prompt=self.SUMMARY_SYSTEM_PROMPT,
+            use_history=True,
+            history=history,
+            priority=PRIORITY_SUMMARIZATION
         )
-        
-        yield from response_generator
\ No newline at end of file
+
+        with tracer.span("summarization", agent=agent_category) as span:
+            try:
+                for chunk in response_generator:
+                    if "ttft_ms" not in span.attributes:
+                        # İlk parçaya kadar geçen süre: LLM kuyruğu + prompt değerlendirme
+                        span.set_attribute("ttft_ms", round(span.elapsed_ms, 1))
+                        span.add_event("first_token")
+                    yield chunk
+            finally:
+                # Akış erken kapatılırsa Ollama bağlantısı da hemen kapanır
+                response_generator.close()
\ No newline at end of file
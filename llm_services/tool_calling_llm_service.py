@@ -2,69 +2,87 @@
 
 import json
 import re
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Callable, Iterable, Optional
+
+from tools.tool_registry import tool_registry
+from llm_services.tool_retriever import ToolRetriever
+from llm_scheduler import PRIORITY_TOOL_SELECTION
 
 class ToolCallingLLMService:
     """
     Bir agent'ın araç setinden kullanıcı talebine en uygun aracı seçmekle sorumlu LLM servisi.
     """
-    def __init__(self, client: Any):
+    def __init__(self, client: Any, retriever: Optional[ToolRetriever] = None):
         self.client = client
+        # Prompt'a sadece isteğe en alakalı araçları koyar; prompt boyutu katalog büyüdükçe sabit kalır
+        self.retriever = retriever or ToolRetriever()
+        # agent kategorisi -> prompt'un değişmeyen baş kısmı (kimlik + kurallar)
+        self._static_prefixes: Dict[str, str] = {}
 
-    def _build_system_prompt(self, agent_category: str, tools: Dict[str, Any], conversation_summary: str) -> str:
-        """Araç seçimi LLM'i için sistem komutunu oluşturur."""
-        tools_description_lines = []
-        for name, details in tools.items():
-            param_list = [f"{p['name']} ({p.get('in', 'N/A')})" for p in details.get("parameters", []) if p.get('name') != "cluster_id"]
-            params_str = ", ".join(param_list) if param_list else "Yok"
-            tools_description_lines.append(
-                f"  - Arac Adi: '{name}'\n"
-                f"  - Aciklama: {details.get('summary', '')}\n"
-                f"  - Gerekli Parametreler: {params_str}"
+    def _get_static_prefix(self, agent_category: str) -> str:
+        """Prompt'un sadece kategoriye bağlı sabit kısmını bir kez oluşturur ve önbellekten döner.
+
+        Ollama aynı önekle başlayan prompt'larda önceki değerlendirmeyi yeniden kullanır; bu yüzden
+        sıra en sabitten en değişkene doğrudur: kurallar, seçilen araçlar, sohbet özeti.
+        """
+        prefix = self._static_prefixes.get(agent_category)
+        if prefix is None:
+            prefix = (
+                f"### KİMLİK VE UZMANLIK ALANI ###\n"
+                f"Sen, KUBEX platformunda **{agent_category}** konusunda uzmanlaşmış bir asistansın. "
+                "Görevin, kullanıcı talebini analiz ederek en uygun ARAÇ'ı seçmek ve mümkün olan parametreleri çıkarmaktır.\n\n"
+                "### GÖREV AKIŞI VE KURALLAR ###\n"
+                "1. **Talep Analizi:** Kullanıcı talebini analiz et ve hangi eylemi yapmak istediğini belirle.\n"
+                "2. **Araç Seçimi:** Eğer talep ARAÇ SETİ'ndeki bir araçla yapılabiliyorsa, o aracı seç.\n"
+                "3. **Parametre Çıkarma:** Kullanıcının verdiği bilgilerden mümkün olan parametreleri çıkar.\n"
+                "4. **Sohbet İstisnası:** SADECE eylem yapmayan genel sohbet için 'chat' kullan.\n\n"
+                "### ÖNEMLİ: PARAMETRE EKSİKLİĞİ İLE İLGİLİ ###\n"
+                "- Eğer bir araç için BAZI parametreler eksikse, yine o aracı seç ve mevcut parametreleri çıkar.\n"
+                "- Eksik parametreler için 'chat' kullanma - sistem sonra eksik parametreleri soracak.\n"
+                "- Örnek: 'nginx deploymentını 5 pod yap' → scale_deployment aracını seç, replicas=5 ver, deployment_name eksik olsa bile.\n\n"
+                "### ÇIKTI FORMATI ###\n"
+                "Yanıtını SADECE aşağıdaki JSON formatında ver. Başka hiçbir metin ekleme:\n\n"
+                '{"tool_name": "GERCEK_ARAC_ADI", "parameters": {"parametre_adi": "deger"}}\n\n'
+                "### GERÇEK ARAÇ ÖRNEKLERI ###\n"
+                "- Deployment listesi: get_deployment_config\n"
+                "- Config alma: get_deployment_config  \n"
+                "- Ölçeklendirme: scale_deployment\n"
+                "- Yeniden başlatma: redeploy_deployment\n"
+                "- Toplu ölçeklendirme / yeniden başlatma: bulk_scale_deployments, bulk_redeploy_deployments\n"
+                "- Namespace bilgisi: show_namespace\n"
+                "- Sohbet: chat\n\n"
+                "### GERÇEK SENARYOLAR ###\n"
+                "Kullanıcı: 'metrics-server deploymentının configini istiyorum'\n"
+                'Yanıt: {"tool_name": "get_deployment_config", "parameters": {"deployment_name": "metrics-server"}}\n\n'
+                "Kullanıcı: 'nginx deploymentını 3 pod yap'\n"
+                'Yanıt: {"tool_name": "scale_deployment", "parameters": {"deployment_name": "nginx", "replicas": 3}}\n\n'
+                "Kullanıcı: 'monitoring namespace'indeki bütün deploymentları yeniden başlat'\n"
+                'Yanıt: {"tool_name": "bulk_redeploy_deployments", "parameters": {"namespace": "monitoring"}}\n\n'
+                "### KESİN KURAL ###\n"
+                "- ASLA 'secilen_aracin_adi' yazma, gerçek araç adını kullan\n"
+                "- ASLA 'param1', 'deger1' yazma, gerçek parametre adlarını kullan\n"
+                "- Parametre eksikliği nedeniyle 'chat' kullanma\n"
+                "- Sadece JSON yanıtı ver, açıklama ekleme\n\n"
             )
-        tools_prompt = "\n".join(tools_description_lines)
+            self._static_prefixes[agent_category] = prefix
+        return prefix
 
-        context_info = f"\n\n### SON SOHBET OZETI ###\n{conversation_summary}\n" if conversation_summary else ""
+    def prepare(self, agent_category: str, tools: Dict[str, Any]):
+        """Sabit prompt önekini, araç prompt metnini ve arama indeksini önceden oluşturur"""
+        self._get_static_prefix(agent_category)
+        tool_registry.render_tools_prompt(tools)
+        self.retriever.rank("", tools)
 
-        return (
-            f"### KİMLİK VE UZMANLIK ALANI ###\n"
-            f"Sen, KUBEX platformunda **{agent_category}** konusunda uzmanlaşmış bir asistansın. "
-            "Görevin, kullanıcı talebini analiz ederek en uygun ARAÇ'ı seçmek ve mümkün olan parametreleri çıkarmaktır.\n\n"
-            f"### ARAÇ SETİ: {agent_category} ###\n{tools_prompt}\n"
-            f"{context_info}\n"
-            "### GÖREV AKIŞI VE KURALLAR ###\n"
-            "1. **Talep Analizi:** Kullanıcı talebini analiz et ve hangi eylemi yapmak istediğini belirle.\n"
-            "2. **Araç Seçimi:** Eğer talep ARAÇ SETİ'ndeki bir araçla yapılabiliyorsa, o aracı seç.\n"
-            "3. **Parametre Çıkarma:** Kullanıcının verdiği bilgilerden mümkün olan parametreleri çıkar.\n"
-            "4. **Sohbet İstisnası:** SADECE eylem yapmayan genel sohbet için 'chat' kullan.\n\n"
-            "### ÖNEMLİ: PARAMETRE EKSİKLİĞİ İLE İLGİLİ ###\n"
-            "- Eğer bir araç için BAZI parametreler eksikse, yine o aracı seç ve mevcut parametreleri çıkar.\n"
-            "- Eksik parametreler için 'chat' kullanma - sistem sonra eksik parametreleri soracak.\n"
-            "- Örnek: 'nginx deploymentını 5 pod yap' → scale_deployment aracını seç, replicas=5 ver, deployment_name eksik olsa bile.\n\n"
-            "### ÇIKTI FORMATI ###\n"
-            "Yanıtını SADECE aşağıdaki JSON formatında ver. Başka hiçbir metin ekleme:\n\n"
-            '{"tool_name": "GERCEK_ARAC_ADI", "parameters": {"parametre_adi": "deger"}}\n\n'
-            "### GERÇEK ARAÇ ÖRNEKLERI ###\n"
-            "- Deployment listesi: get_deployment_config\n"
-            "- Config alma: get_deployment_config  \n"
-            "- Ölçeklendirme: scale_deployment\n"
-            "- Yeniden başlatma: redeploy_deployment\n"
-            "- Namespace bilgisi: show_namespace\n"
-            "- Sohbet: chat\n\n"
-            "### GERÇEK SENARYOLAR ###\n"
-            "Kullanıcı: 'metrics-server deploymentının configini istiyorum'\n"
-            'Yanıt: {"tool_name": "get_deployment_config", "parameters": {"deployment_name": "metrics-server"}}\n\n'
-            "Kullanıcı: 'nginx deploymentını 3 pod yap'\n"
-            'Yanıt: {"tool_name": "scale_deployment", "parameters": {"deployment_name": "nginx", "replicas": 3}}\n\n'
-            "### KESİN KURAL ###\n"
-            "- ASLA 'secilen_aracin_adi' yazma, gerçek araç adını kullan\n"
-            "- ASLA 'param1', 'deger1' yazma, gerçek parametre adlarını kullan\n"
-            "- Parametre eksikliği nedeniyle 'chat' kullanma\n"
-            "- Sadece JSON yanıtı ver, açıklama ekleme"
-        )
+    def _build_system_prompt(self, agent_category: str, tools: Dict[str, Any], conversation_summary: str) -> str:
+        """Araç seçimi LLM'i için sistem komutunu oluşturur."""
+        prefix = self._get_static_prefix(agent_category)
+        tools_prompt = tool_registry.render_tools_prompt(tools)
+        context_info = f"\n### SON SOHBET OZETI ###\n{conversation_summary}\n" if conversation_summary else ""
+        return f"{prefix}### ARAÇ SETİ: {agent_category} ###\n{tools_prompt}\n{context_info}"
 
-    def select_tool(self, user_prompt: str, agent_category: str, tools: Dict[str, Any], conversation_summary: str, context_reminder: Optional[str] = None) -> Dict[str, Any]:
-        """LLM'den araç seçimi yapmasını ister."""
+    def select_tool(self, user_prompt: str, agent_category: str, tools: Dict[str, Any], conversation_summary: str, context_reminder: Optional[str] = None, pinned_tools: Iterable[str] = (), on_tool_name: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """LLM'den araç seçimi yapmasını ister; on_tool_name, araç adı akışta görünür görünmez çağrılır."""
+        tools = self.retriever.select(user_prompt, tools, pinned=pinned_tools)
         system_prompt = self._build_system_prompt(agent_category, tools, conversation_summary)
         
         final_user_prompt = user_prompt
@@ -76,12 +94,18 @@ class ToolCallingLLMService:
         print("="*50 + "\n")
 
         try:
-            response = self.client.chat(
-                user_prompt=final_user_prompt, 
-                system_prompt=system_prompt, 
-                use_history=False  # Tool seçimi için history kullanmayalım
+            # Karar JSON'u tamamlanınca akış kapatılır; <think> sonrası ve JSON'dan sonraki token'lar beklenmez
+            parser = self.client.chat_decision(
+                user_prompt=final_user_prompt,
+                system_prompt=system_prompt,  # Tool seçimi için history kullanılmaz
+                required_key="tool_name",
+                on_key=on_tool_name,
+                priority=PRIORITY_TOOL_SELECTION,
+                service="tool_selection"
             )
-            content = response.get("message", {}).get("content", "{}")
+            if parser.decision is not None:
+                return parser.decision
+            content = parser.text or "{}"
 
             # Geliştirilmiş JSON çıkarma mantığı
             json_obj = self._extract_json_from_content(content)
@@ -0,0 +1,153 @@
+# llm_services/tool_retriever.py
+
+import math
+import re
+import hashlib
+import threading
+from collections import Counter
+from typing import Dict, Any, List, Iterable, Tuple
+
+from tools.tool_registry import ToolCatalog, catalog_fingerprint
+
+# Türkçe karakterleri ASCII karşılıklarına indirger (ı/i, ş/s vb. yazım farklarını yok sayar)
+_TURKISH_FOLD = str.maketrans("ıİşŞğĞüÜöÖçÇâÂîÎûÛ", "iissgguuooccaaiiuu")
+
+# Eklemeli dilde "deploymentları", "deployment'ın" gibi çekimleri aynı köke indirmek için önek uzunluğu
+STEM_PREFIX_LENGTH = 5
+
+EMBEDDING_DIM = 512
+
+# İçerik taşımayan, her araçta geçen kelimeler
+STOP_WORDS = {"bir", "ve", "ile", "icin", "bu", "tum", "olan", "the", "and", "for", "of", "a", "an"}
+
+
+def _fold(text: str) -> str:
+    return text.translate(_TURKISH_FOLD).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    """Metni normalize edip önek tabanlı köklere ayırır"""
+    words = re.findall(r"[a-z0-9]+", _fold(text).replace("_", " "))
+    return [w[:STEM_PREFIX_LENGTH] for w in words if w not in STOP_WORDS and len(w) > 1]
+
+
+def embed(text: str) -> List[float]:
+    """Karakter trigram'larının hash'lenmiş, L2 normalize edilmiş vektörü (hafif 'embedding')"""
+    vector = [0.0] * EMBEDDING_DIM
+    for word in re.findall(r"[a-z0-9]+", _fold(text).replace("_", " ")):
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            bucket = int(hashlib.md5(padded[i:i + 3].encode("utf-8")).hexdigest()[:8], 16) % EMBEDDING_DIM
+            vector[bucket] += 1.0
+    norm = math.sqrt(sum(v * v for v in vector))
+    return [v / norm for v in vector] if norm else vector
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    return sum(x * y for x, y in zip(a, b))
+
+
+class _CatalogIndex:
+    """Tek bir araç seti için BM25 istatistikleri ve trigram vektörleri"""
+
+    def __init__(self, tools: Dict[str, Any], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.names = list(tools.keys())
+        self.term_freqs: List[Counter] = []
+        self.vectors: List[List[float]] = []
+        for name, spec in tools.items():
+            text = self._document_text(name, spec)
+            self.term_freqs.append(Counter(tokenize(text)))
+            self.vectors.append(embed(text))
+
+        self.lengths = [sum(tf.values()) for tf in self.term_freqs]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        doc_freq: Counter = Counter()
+        for tf in self.term_freqs:
+            doc_freq.update(tf.keys())
+        n = len(self.names)
+        self.idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+
+    @staticmethod
+    def _document_text(name: str, spec: Dict[str, Any]) -> str:
+        param_names = " ".join(p.get("name", "") for p in spec.get("parameters", []) if p.get("name") != "cluster_id")
+        keywords = " ".join(spec.get("keywords", []))
+        return f"{name} {spec.get('summary', '')} {spec.get('description', '')} {keywords} {param_names}"
+
+    def bm25(self, query_terms: Iterable[str]) -> List[float]:
+        scores = []
+        for tf, length in zip(self.term_freqs, self.lengths):
+            score = 0.0
+            for term in query_terms:
+                freq = tf.get(term)
+                if not freq:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * length / (self.avg_length or 1))
+                score += self.idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            scores.append(score)
+        return scores
+
+    def cosine(self, query_vector: List[float]) -> List[float]:
+        return [_cosine(query_vector, v) for v in self.vectors]
+
+
+class ToolRetriever:
+    """Kullanıcı isteğine göre araçları sıralar ve prompt'a sadece en alakalı top-k aracı koyar.
+
+    Skor, BM25 (kelime kökü eşleşmesi) ile karakter trigram kosinüs benzerliğinin ağırlıklı
+    toplamıdır. Hiçbir araç yeterince eşleşmezse tam liste döner; böylece seçici asla
+    doğru aracı göremez duruma düşmez.
+    """
+
+    def __init__(self, top_k: int = 4, lexical_weight: float = 0.6,
+                 min_lexical_score: float = 0.5, min_similarity: float = 0.25):
+        self.top_k = top_k
+        self.lexical_weight = lexical_weight
+        self.min_lexical_score = min_lexical_score
+        self.min_similarity = min_similarity
+        self._indexes: Dict[str, _CatalogIndex] = {}
+        self._lock = threading.Lock()
+
+    def _index(self, tools: Dict[str, Any]) -> _CatalogIndex:
+        fingerprint = getattr(tools, "fingerprint", None) or catalog_fingerprint(tools)
+        with self._lock:
+            index = self._indexes.get(fingerprint)
+            if index is None:
+                index = _CatalogIndex(tools)
+                self._indexes[fingerprint] = index
+            return index
+
+    def rank(self, query: str, tools: Dict[str, Any]) -> List[Tuple[str, float, float, float]]:
+        """(araç adı, birleşik skor, BM25, kosinüs) listesini azalan skora göre döndürür"""
+        index = self._index(tools)
+        lexical = index.bm25(set(tokenize(query)))
+        semantic = index.cosine(embed(query))
+        max_lexical = max(lexical) if lexical and max(lexical) > 0 else 1.0
+        ranked = [
+            (name, self.lexical_weight * (lex / max_lexical) + (1 - self.lexical_weight) * sem, lex, sem)
+            for name, lex, sem in zip(index.names, lexical, semantic)
+        ]
+        ranked.sort(key=lambda item: item[1], reverse=True)
+        return ranked
+
+    def select(self, query: str, tools: Dict[str, Any], pinned: Iterable[str] = ()) -> Dict[str, Any]:
+        """Top-k araçtan oluşan alt kataloğu döndürür; düşük güvende tam kataloğu döndürür"""
+        if len(tools) <= self.top_k:
+            return tools
+
+        ranked = self.rank(query, tools)
+        best_lexical = max(item[2] for item in ranked)
+        best_similarity = max(item[3] for item in ranked)
+        if best_lexical < self.min_lexical_score and best_similarity < self.min_similarity:
+            print(f"[ToolRetriever] Düşük güven (bm25={best_lexical:.2f}, cos={best_similarity:.2f}), tüm araçlar kullanılıyor")
+            return tools
+
+        selected = {name for name, _, _, _ in ranked[:self.top_k]}
+        selected.update(name for name in pinned if name in tools)
+
+        # Orijinal sırayı koru: aynı seçim her seferinde aynı prompt metnini üretir
+        subset = {name: spec for name, spec in tools.items() if name in selected}
+        category = getattr(tools, "category", "")
+        print(f"[ToolRetriever] {len(tools)} araçtan {len(subset)} tanesi seçildi: {list(subset)}")
+        return ToolCatalog(category, subset)
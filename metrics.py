@@ -0,0 +1,372 @@
+# metrics.py
+
+import os
+import time
+import logging
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, Callable, List, Optional, Sequence, Tuple
+
+from tracing import Span, tracer
+from llm_scheduler import llm_scheduler
+from resilience import resilience
+from speculative_executor import speculative_executor
+from tools.read_cache import tool_read_cache
+from tools.single_flight import kubex_single_flight
+
+logger = logging.getLogger(__name__)
+
+# /metrics uç noktasının portu; boş string veya 0 ise sunucu başlatılmaz
+METRICS_PORT_ENV = "KUBEX_METRICS_PORT"
+DEFAULT_METRICS_PORT = 9464
+# Uç nokta kimlik doğrulamasızdır ve iç adresleri içerir; varsayılan olarak yalnızca yerelden erişilir
+METRICS_HOST_ENV = "KUBEX_METRICS_HOST"
+DEFAULT_METRICS_HOST = "127.0.0.1"
+
+# Son turu bu kadar saniye içinde olan oturumlar aktif sayılır
+ACTIVE_SESSION_SECONDS = 15 * 60
+
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0)
+API_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUEUE_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Span adı -> aşama etiketi; 'api' bir aracın Kubex çağrılarıyla birlikte toplam süresidir
+SPAN_STAGES = {
+    "routing": "routing",
+    "planning": "planning",
+    "tool_selection": "tool_selection",
+    "tool": "api",
+    "summarization": "summarization",
+}
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    """Etiket kombinasyonu başına artan sayaç"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram:
+    """Sabit kovalı histogram (Prometheus _bucket / _sum / _count serileri)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = STAGE_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            # [kova sayıları..., toplam, adet]
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        lines = []
+        for key, series in items:
+            for bound, count in zip(self.buckets, series):
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(count)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {_format_value(series[-1])}")
+        return lines
+
+
+class CallbackMetric:
+    """Değeri her okumada mevcut istatistiklerden hesaplanan gauge/counter"""
+
+    def __init__(self, name: str, help_text: str, collect: Callable[[], Dict[LabelValues, float]],
+                 labelnames: Sequence[str] = (), kind: str = "gauge"):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self._collect = collect
+
+    def render(self) -> List[str]:
+        try:
+            values = self._collect()
+        except Exception as e:
+            logger.warning(f"[Metrics] {self.name} okunamadı: {e}")
+            return []
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in sorted(values.items())]
+
+
+class MetricsRegistry:
+    """Kayıtlı metrikleri Prometheus metin biçiminde (0.0.4) sunar"""
+
+    def __init__(self):
+        self._metrics: List[Any] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = STAGE_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def callback(self, name: str, help_text: str, collect: Callable[[], Dict[LabelValues, float]],
+                 labelnames: Sequence[str] = (), kind: str = "gauge") -> CallbackMetric:
+        return self.register(CallbackMetric(name, help_text, collect, labelnames, kind))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _api_error_reason(span: Span) -> Optional[str]:
+    """Kubex çağrısının hata nedeni; başarılıysa None"""
+    if span.status == "cancelled":
+        return "cancelled"
+    error_type = span.attributes.get("error.type")
+    if error_type == "CircuitOpenError":
+        return "circuit_open"
+    if error_type in ("ConnectTimeout", "ReadTimeout", "Timeout"):
+        return "timeout"
+    if error_type:
+        return "connection"
+    status_code = span.attributes.get("http.status_code") or 0
+    if status_code >= 500:
+        return "http_5xx"
+    if status_code >= 400:
+        return "http_4xx"
+    return None
+
+
+class KubexMetrics:
+    """Asistanın metrikleri: biten span'lerden aşama / LLM / Kubex metrikleri, okumada cache ve kuyruk durumları"""
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        self.registry = registry or MetricsRegistry()
+        r = self.registry
+        self.turns = r.counter("kubex_turns_total", "Tamamlanan kullanıcı turları", ["status"])
+        self.turn_duration = r.histogram("kubex_turn_duration_seconds", "Turun baştan sona süresi (akış dahil)", ["status"])
+        self.stage_duration = r.histogram(
+            "kubex_stage_duration_seconds", "Aşama süreleri: routing, planning, tool_selection, api, summarization", ["stage"]
+        )
+        self.llm_requests = r.counter("kubex_llm_requests_total", "Ollama çağrıları", ["model", "priority", "status"])
+        self.llm_tokens = r.counter("kubex_llm_tokens_total", "Ollama token sayıları (direction=in: prompt, out: üretilen)",
+                                    ["model", "priority", "direction"])
+        self.llm_queue_wait = r.histogram("kubex_llm_queue_wait_seconds", "Ollama öncelik kuyruğunda bekleme süresi",
+                                          ["priority"], QUEUE_BUCKETS)
+        self.llm_ttft = r.histogram("kubex_llm_ttft_seconds", "Ollama ilk parça süresi (kuyruk dahil)",
+                                    ["model", "priority"], STAGE_BUCKETS)
+        self.llm_duration = r.histogram("kubex_llm_request_duration_seconds", "Ollama çağrısının toplam süresi",
+                                        ["model", "priority"], STAGE_BUCKETS)
+        self.api_requests = r.counter("kubex_api_requests_total", "Kubex HTTP çağrıları (tekrar denemeler tek çağrı sayılır)",
+                                      ["tool", "method", "endpoint_class", "code"])
+        self.api_errors = r.counter("kubex_api_errors_total", "Başarısız Kubex çağrıları (neden: http_5xx, http_4xx, timeout, "
+                                    "connection, circuit_open, cancelled)", ["tool", "reason"])
+        self.api_duration = r.histogram("kubex_api_request_duration_seconds", "Kubex HTTP çağrı süresi",
+                                        ["tool", "endpoint_class"], API_BUCKETS)
+
+        self._sessions: Dict[str, float] = {}
+        self._sessions_lock = threading.Lock()
+
+        r.callback("kubex_active_sessions", f"Son {ACTIVE_SESSION_SECONDS // 60} dakikada tur yapan oturumlar",
+                   lambda: {(): self.active_sessions()})
+        r.callback("kubex_read_cache_requests_total", "Araç okuma cache'i sorguları", self._read_cache_requests,
+                   ["result"], kind="counter")
+        r.callback("kubex_read_cache_hit_ratio", "Araç okuma cache'i isabet oranı", self._read_cache_ratio)
+        r.callback("kubex_single_flight_requests_total", "Kubex GET single-flight istekleri (result=shared: paylaşılan)",
+                   self._single_flight_requests, ["result"], kind="counter")
+        r.callback("kubex_single_flight_hit_ratio", "Paylaşılan Kubex GET oranı", self._single_flight_ratio)
+        r.callback("kubex_speculative_runs_total", "Önden çalıştırılan araçlar (result=claimed: çalışırken sahiplenilen)",
+                   self._speculative_runs, ["result"], kind="counter")
+        r.callback("kubex_llm_in_flight", "Ollama'da süren çağrılar", lambda: self._llm_scheduler_field("in_flight"), ["priority"])
+        r.callback("kubex_llm_queue_depth", "Ollama kuyruğunda bekleyen çağrılar", lambda: self._llm_scheduler_field("queue_depth"),
+                   ["priority"])
+        r.callback("kubex_circuit_breaker_open", "Açık (1) veya yarı açık (0.5) devre kesiciler", self._breakers, ["endpoint"])
+
+    def observe_span(self, span: Span):
+        seconds = span.elapsed_ms / 1000.0
+        attrs = span.attributes
+
+        if span.name in ("turn", "turn.finalize"):
+            self.turns.inc(status=span.status)
+            self.turn_duration.observe(seconds, status=span.status)
+            if attrs.get("session.id"):
+                with self._sessions_lock:
+                    self._sessions[attrs["session.id"]] = time.monotonic()
+            return
+
+        stage = SPAN_STAGES.get(span.name)
+        if stage is not None:
+            # Önden çalıştırmalar kullanıcının beklediği süreye doğrudan girmez
+            if not attrs.get("speculative"):
+                self.stage_duration.observe(seconds, stage=stage)
+            return
+
+        if span.name == "llm.chat":
+            model, priority = attrs.get("model", ""), attrs.get("priority", "")
+            self.llm_requests.inc(model=model, priority=priority, status=span.status)
+            self.llm_duration.observe(seconds, model=model, priority=priority)
+            if attrs.get("queue_wait_ms") is not None:
+                self.llm_queue_wait.observe(attrs["queue_wait_ms"] / 1000.0, priority=priority)
+            if attrs.get("ttft_ms") is not None:
+                self.llm_ttft.observe(attrs["ttft_ms"] / 1000.0, model=model, priority=priority)
+            if attrs.get("prompt_tokens"):
+                self.llm_tokens.inc(attrs["prompt_tokens"], model=model, priority=priority, direction="in")
+            if attrs.get("completion_tokens"):
+                self.llm_tokens.inc(attrs["completion_tokens"], model=model, priority=priority, direction="out")
+            return
+
+        if span.name == "kubex.http":
+            tool = attrs.get("tool") or "none"
+            endpoint_class = attrs.get("endpoint.class", "")
+            reason = _api_error_reason(span)
+            self.api_requests.inc(tool=tool, method=attrs.get("http.method", ""), endpoint_class=endpoint_class,
+                                  code=attrs.get("http.status_code") or reason)
+            self.api_duration.observe(seconds, tool=tool, endpoint_class=endpoint_class)
+            if reason is not None:
+                self.api_errors.inc(tool=tool, reason=reason)
+
+    def active_sessions(self) -> int:
+        cutoff = time.monotonic() - ACTIVE_SESSION_SECONDS
+        with self._sessions_lock:
+            for session_id in [s for s, seen in self._sessions.items() if seen < cutoff]:
+                del self._sessions[session_id]
+            return len(self._sessions)
+
+    @staticmethod
+    def _read_cache_requests() -> Dict[LabelValues, float]:
+        stats = tool_read_cache.stats()
+        return {("hit",): stats["hits"], ("miss",): stats["misses"]}
+
+    @staticmethod
+    def _read_cache_ratio() -> Dict[LabelValues, float]:
+        stats = tool_read_cache.stats()
+        total = stats["hits"] + stats["misses"]
+        return {(): round(stats["hits"] / total, 4) if total else 0.0}
+
+    @staticmethod
+    def _single_flight_requests() -> Dict[LabelValues, float]:
+        stats = kubex_single_flight.stats()
+        return {("executed",): stats["executed"], ("shared",): stats["saved"]}
+
+    @staticmethod
+    def _single_flight_ratio() -> Dict[LabelValues, float]:
+        stats = kubex_single_flight.stats()
+        return {(): round(stats["saved"] / stats["requests"], 4) if stats["requests"] else 0.0}
+
+    @staticmethod
+    def _speculative_runs() -> Dict[LabelValues, float]:
+        stats = speculative_executor.stats()
+        return {("claimed",): stats["claimed_in_flight"], ("unclaimed",): stats["finished_unclaimed"]}
+
+    @staticmethod
+    def _llm_scheduler_field(field: str) -> Dict[LabelValues, float]:
+        return {(name,): stats[field] for name, stats in llm_scheduler.stats()["classes"].items()}
+
+    @staticmethod
+    def _breakers() -> Dict[LabelValues, float]:
+        states = {"closed": 0.0, "half_open": 0.5, "open": 1.0}
+        return {(key,): states[stats["state"]] for key, stats in resilience.stats()["breakers"].items()}
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = kubex_metrics.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Süreç genelinde paylaşılır; span'ler bittikçe güncellenir
+kubex_metrics = KubexMetrics()
+tracer.add_listener(kubex_metrics.observe_span)
+
+_metrics_server: Optional[ThreadingHTTPServer] = None
+_metrics_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: Optional[int] = None, host: Optional[str] = None) -> Optional[ThreadingHTTPServer]:
+    """/metrics uç noktasını arka plan thread'inde başlatır; süreç başına bir kez (Streamlit yeniden çalıştırmaları dahil)"""
+    global _metrics_server
+    host = host or os.environ.get(METRICS_HOST_ENV) or DEFAULT_METRICS_HOST
+    if port is None:
+        raw = os.environ.get(METRICS_PORT_ENV, str(DEFAULT_METRICS_PORT))
+        port = int(raw) if raw else 0
+    if not port:
+        return None
+    with _metrics_server_lock:
+        if _metrics_server is None:
+            try:
+                _metrics_server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError as e:
+                logger.error(f"[Metrics] Metrik sunucusu başlatılamadı ({host}:{port}): {e}")
+                return None
+            _metrics_server.daemon_threads = True
+            threading.Thread(target=_metrics_server.serve_forever, name="kubex-metrics", daemon=True).start()
+            print(f"[Metrics] Prometheus metrikleri: http://{host}:{port}/metrics")
+        return _metrics_server
@@ -1,12 +1,28 @@
 import requests
 import json
-from typing import Optional, Dict, Any, List, Generator, Union
+import time
+import queue
+import socket
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Generator, Union, Callable
 from dataclasses import dataclass
 from enum import Enum
 import logging
 
+from cancellation import CancellationToken, RequestCancelled, current_cancel_token, raise_if_cancelled
+from llm_scheduler import LLMScheduler, llm_scheduler, PRIORITY_BACKGROUND
+from llm_policy import LLMCallPolicy, HedgeTarget, LatencyTracker, load_llm_policies
+from resilience import resilience, endpoint_keys
+from tracing import Span, tracer
+from llm_services.stream_decision_parser import StreamingDecisionParser, parse_stream
+
 logger = logging.getLogger(__name__)
 
+# Ollama okuma zaman aşımı alt sınırı: ilk parça, kuyruk ve prompt değerlendirmesinden sonra gelir
+OLLAMA_MIN_READ_TIMEOUT = 15.0
+
 class ModelType(Enum):
     QWEN3_8B = "qwen3:8b"
     QWEN3_4B = "qwen3:4b"
@@ -34,13 +50,28 @@ class OllamaClient:
         self,
         ollama_url: str,
         kubex_url: str,
-        model_name: str = ModelType.QWEN3_8B.value
+        model_name: str = ModelType.QWEN3_8B.value,
+        max_history_messages: int = 20,
+        scheduler: Optional[LLMScheduler] = None
     ):
         self.ollama_url = ollama_url.rstrip('/')
         self.model_name = model_name
         self.kubex_url = kubex_url
         self.api_chat = f"{self.ollama_url}/api/chat"
         self.chat_history = []
+        # Geçmişe eklenen yanıtlardan sadece son bu kadarı tutulur (uzun oturumlarda bellek sabit kalır)
+        self.max_history_messages = max_history_messages
+        # Son tamamlanan isteğin Ollama metrikleri (prompt_eval_count, prompt_eval_duration vb.)
+        self.last_metrics: Dict[str, Any] = {}
+        # Tüm çağrılar öncelik sınıfına göre bu kuyruktan slot alır
+        self.scheduler = scheduler or llm_scheduler
+        # Servis bazında gecikme bütçesi ve yedek (hedge) hedefleri; chat_decision kullanır
+        self.policies: Dict[str, LLMCallPolicy] = load_llm_policies()
+        self.latency_tracker = LatencyTracker()
+        # İptal edilebilir istekler yanıt başlıkları gelene kadar burada bekler (Ollama kuyruğu / prompt değerlendirme)
+        self._post_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="ollama-post")
+        # Hedge edilen karar çağrılarının denemeleri
+        self._hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="ollama-hedge")
 
     def test_connection(self) -> bool:
         try:
@@ -55,10 +86,16 @@ class OllamaClient:
         system_prompt: Optional[str] = None,
         temperature: float = 0.7,
         use_history: bool = True,
+        history: Optional[List[Dict[str, str]]] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        priority: str = PRIORITY_BACKGROUND,
         **kwargs
     ) -> Dict[str, Any]:
         """Sends a single, non-streaming chat request."""
-        messages = self._prepare_messages(user_prompt, system_prompt, use_history)
+        token = cancel_token or current_cancel_token.get()
+        raise_if_cancelled(token)
+        target_history = self._history_target(use_history, history)
+        messages = self._prepare_messages(user_prompt, system_prompt, target_history)
 
         payload = {
             "model": self.model_name,
@@ -69,11 +106,16 @@ class OllamaClient:
         payload["options"].update(kwargs)
 
         try:
-            response = requests.post(self.api_chat, json=payload, timeout=60)
-            response.raise_for_status()
-            result = response.json()
-            if use_history:
-                self.chat_history.append(result["message"])
+            with tracer.span("llm.chat", model=self.model_name, priority=priority, stream=False) as span:
+                with self.scheduler.slot(priority, token):
+                    response = self._post(payload, token, stream=False, timeout=60)
+                response.raise_for_status()
+                result = response.json()
+                self._record_metrics(result)
+                span.set_attribute("prompt_tokens", result.get("prompt_eval_count"))
+                span.set_attribute("completion_tokens", result.get("eval_count"))
+            if target_history is not None:
+                self._append_history(target_history, result["message"])
             return result
         except requests.RequestException as e:
             logger.error(f"Failed to chat: {str(e)}")
@@ -85,56 +127,323 @@ class OllamaClient:
         system_prompt: Optional[str] = None,
         temperature: float = 0.7,
         use_history: bool = True,
+        history: Optional[List[Dict[str, str]]] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        priority: str = PRIORITY_BACKGROUND,
+        model: Optional[str] = None,
+        ollama_url: Optional[str] = None,
         **kwargs
     ) -> Generator[str, None, None]:
-        """Sends a streaming chat request and yields content chunks."""
-        messages = self._prepare_messages(user_prompt, system_prompt, use_history)
+        """Sends a streaming chat request and yields content chunks.
+
+        cancel_token verilmezse aktif isteğin token'ı kullanılır; iptalde bağlantı kapatılır ve
+        RequestCancelled fırlatılır (Ollama, bağlantı kapanınca üretimi durdurur).
+        priority, isteğin LLM kuyruğundaki sınıfıdır; slot akış kapanana kadar tutulur.
+        model / ollama_url verilirse istek varsayılan model yerine o modele / replikaya gider.
+        Her çağrı aktif trace'e kuyruk süresi, ilk parça süresi (TTFT) ve token sayılarıyla bir 'llm.chat' span'i ekler.
+        """
+        span = tracer.start_span("llm.chat", {"model": model or self.model_name, "priority": priority,
+                                              "ollama.url": ollama_url or self.ollama_url})
+        try:
+            yield from self._chat_stream(span, user_prompt, system_prompt, temperature, use_history, history,
+                                         cancel_token, priority, model, ollama_url, **kwargs)
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            span.end()
+
+    def _chat_stream(self, span: Span, user_prompt: str, system_prompt: Optional[str], temperature: float,
+                     use_history: bool, history: Optional[List[Dict[str, str]]],
+                     cancel_token: Optional[CancellationToken], priority: str, model: Optional[str],
+                     ollama_url: Optional[str], **kwargs) -> Generator[str, None, None]:
+        token = cancel_token or current_cancel_token.get()
+        raise_if_cancelled(token)
+        target_history = self._history_target(use_history, history)
+        messages = self._prepare_messages(user_prompt, system_prompt, target_history)
 
         payload = {
-            "model": self.model_name,
+            "model": model or self.model_name,
             "messages": messages,
             "stream": True,
             "options": {"temperature": temperature}
         }
         payload["options"].update(kwargs)
 
+        response = None
+        unregister = None
+        span.set_attribute("queue_wait_ms", round(self.scheduler.acquire(priority, token) * 1000, 1))
         try:
-            response = requests.post(
-                self.api_chat,
-                json=payload,
-                stream=True,
-                timeout=60
-            )
+            url = self._chat_url(ollama_url)
+            started = time.monotonic()
+            response = self._post(payload, token, url=url, stream=True, timeout=60)
+            if token is not None:
+                # Akış sırasında iptal: soketi kapat, bloklayan okuma hemen döner
+                unregister = token.on_cancel(lambda: self._abort(response))
             response.raise_for_status()
 
             full_response = ""
+            first_line = True
             for line in response.iter_lines():
+                if first_line:
+                    first_line = False
+                    resilience.timeouts.record(endpoint_keys("ollama", "POST", url)[1], time.monotonic() - started)
+                    span.set_attribute("ttft_ms", round(span.elapsed_ms, 1))
                 if line:
                     try:
                         data = json.loads(line)
                         if data.get("done") == True:
+                            self._record_metrics(data)
+                            span.set_attribute("prompt_tokens", data.get("prompt_eval_count"))
+                            span.set_attribute("completion_tokens", data.get("eval_count"))
                             break # Streaming finished
 
                         if "message" in data and "content" in data["message"]:
                             chunk = data["message"]["content"]
                             full_response += chunk
+                            # Ollama her token için bir satır gönderir; akış 'done'dan önce kapatılırsa bu sayı kalır
+                            span.set_attribute("completion_tokens", span.attributes.get("completion_tokens", 0) + 1)
                             yield chunk
                     except json.JSONDecodeError:
                         logger.warning(f"Failed to decode stream line: {line}")
 
-            if use_history:
-                self.chat_history.append({"role": "assistant", "content": full_response})
+            raise_if_cancelled(token)
+            if target_history is not None:
+                self._append_history(target_history, {"role": "assistant", "content": full_response})
 
         except requests.RequestException as e:
+            raise_if_cancelled(token)
             logger.error(f"Failed to generate streaming response: {str(e)}")
+            span.record_error(e)
             yield f"Stream hatası: {str(e)}"
+        except (OSError, ValueError, AttributeError):
+            # Kapatılan soketten okuma
+            raise_if_cancelled(token)
+            raise
+        finally:
+            if unregister:
+                unregister()
+            # Tüketici akışı erken kapatırsa (generator.close) bağlantıyı da kapat; Ollama üretimi durdurur
+            if response is not None:
+                response.close()
+            self.scheduler.release(priority)
+
+    def _chat_url(self, ollama_url: Optional[str]) -> str:
+        return f"{ollama_url.rstrip('/')}/api/chat" if ollama_url else self.api_chat
 
-    def _prepare_messages(self, user_prompt: str, system_prompt: Optional[str], use_history: bool) -> List[Dict[str, str]]:
-        """Helper function to construct message list."""
-        if use_history:
-            messages = self.chat_history.copy()
+    def _post(self, payload: Dict[str, Any], token: Optional[CancellationToken], url: Optional[str] = None,
+              timeout: float = 60, **kwargs) -> requests.Response:
+        """/api/chat'e POST eder; token varsa yanıt başlıkları beklenirken de iptal edilebilir.
+
+        İstek ortak dayanıklılık katmanından geçer: replika başına devre kesici, gözlenen ilk yanıt
+        süresinden türetilen okuma zaman aşımı (timeout üst sınırdır) ve bağlantı hatalarında tekrar deneme
+        (sohbet isteği yan etkisizdir). İptalde çağıran hemen RequestCancelled alır; geç gelen yanıt açıldığı anda kapatılır.
+        """
+        url = url or self.api_chat
+        breaker_key, timeout_key = endpoint_keys("ollama", "POST", url)
+
+        def send(request_timeout):
+            return requests.post(url, json=payload, timeout=request_timeout, **kwargs)
+
+        def post():
+            # Akışlı isteklerde gecikme örneği ilk parça geldiğinde chat_stream tarafından kaydedilir
+            return resilience.call(breaker_key, timeout_key, send, idempotent=True, timeout=timeout,
+                                   record_latency=not kwargs.get("stream"), min_read_timeout=OLLAMA_MIN_READ_TIMEOUT,
+                                   cancel_token=token)
+
+        if token is None:
+            return post()
+
+        future = self._post_executor.submit(post)
+        finished = threading.Event()
+        future.add_done_callback(lambda f: finished.set())
+        unregister = token.on_cancel(finished.set)
+        try:
+            finished.wait()
+        finally:
+            unregister()
+
+        if not future.done():
+            future.add_done_callback(self._close_late_response)
+            raise RequestCancelled(token.reason)
+        response = future.result()
+        if token.cancelled:
+            response.close()
+            raise RequestCancelled(token.reason)
+        return response
+
+    @staticmethod
+    def _close_late_response(future):
+        if future.exception() is None:
+            future.result().close()
+
+    @staticmethod
+    def _abort(response: requests.Response):
+        """Başka bir thread'den akışı keser: soketi kapatmak, recv'de bekleyen okumayı uyandırır"""
+        connection = getattr(response.raw, "_connection", None)
+        sock = getattr(connection, "sock", None)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
         else:
-            messages = []
+            response.close()
+
+    def chat_decision(
+        self,
+        user_prompt: str,
+        system_prompt: Optional[str],
+        required_key: str,
+        on_key: Optional[Callable[[str], None]] = None,
+        priority: str = PRIORITY_BACKGROUND,
+        service: Optional[str] = None
+    ) -> StreamingDecisionParser:
+        """Geçmişsiz bir karar çağrısını akışla yapar ve karar JSON'u tamamlanınca akışı kapatır.
+
+        Servisin politikasında hedge hedefleri varsa, ana çağrı gecikme bütçesini (ör. p95) aşınca
+        sıradaki hedefe yedek istek gönderilir; ilk geçerli karar kazanır, diğer akışlar iptal edilir.
+        """
+        policy = self.policies.get(service) if service else None
+        targets = [t for t in (policy.hedge_targets if policy else []) if not self._is_primary(t)]
+        if not targets:
+            started = time.monotonic()
+            parser = parse_stream(
+                self.chat_stream(user_prompt=user_prompt, system_prompt=system_prompt, use_history=False, priority=priority),
+                required_key=required_key,
+                on_key=on_key
+            )
+            if service and parser.decision is not None:
+                self.latency_tracker.record(service, self.model_name, time.monotonic() - started)
+            return parser
+        return self._hedged_decision(user_prompt, system_prompt, required_key, on_key, priority, service, policy, targets)
+
+    def _is_primary(self, target: HedgeTarget) -> bool:
+        same_url = not target.url or target.url.rstrip('/') == self.ollama_url
+        return same_url and (target.model or self.model_name) == self.model_name
+
+    def _hedged_decision(self, user_prompt: str, system_prompt: Optional[str], required_key: str,
+                         on_key: Optional[Callable[[str], None]], priority: str, service: str,
+                         policy: LLMCallPolicy, targets: List[HedgeTarget]) -> StreamingDecisionParser:
+        parent = current_cancel_token.get()
+        finished: "queue.Queue" = queue.Queue()
+        attempts: List[Dict[str, Any]] = []
+        key_lock = threading.Lock()
+        key_reported = []
+
+        def report_key(value: str):
+            # Erken anahtar bildirimi (agent hazırlığı, önden çalıştırma) tüm denemeler için bir kez yapılır
+            with key_lock:
+                if key_reported:
+                    return
+                key_reported.append(value)
+            if on_key:
+                on_key(value)
+
+        def launch(target: HedgeTarget):
+            token = parent.child() if parent is not None else CancellationToken()
+            attempt = {"index": len(attempts), "model": target.model or self.model_name, "url": target.url,
+                       "token": token, "started": time.monotonic()}
+            attempts.append(attempt)
+
+            def run():
+                try:
+                    parser = parse_stream(
+                        self.chat_stream(user_prompt=user_prompt, system_prompt=system_prompt, use_history=False,
+                                         priority=priority, cancel_token=token, model=target.model, ollama_url=target.url),
+                        required_key=required_key,
+                        on_key=report_key
+                    )
+                    finished.put((attempt, parser, None))
+                except BaseException as e:
+                    finished.put((attempt, None, e))
+
+            ctx = contextvars.copy_context()
+            self._hedge_executor.submit(ctx.run, run)
+
+        self.latency_tracker.count(service, "calls")
+        launch(HedgeTarget())
+        pending_targets = list(targets)
+        budget = self.latency_tracker.budget(service, self.model_name, policy)
+        deadline = time.monotonic() + budget
+        done_count = 0
+        fallback_parser: Optional[StreamingDecisionParser] = None
+        first_error: Optional[BaseException] = None
+
+        try:
+            while True:
+                timeout = max(0.0, deadline - time.monotonic()) if pending_targets else None
+                try:
+                    attempt, parser, error = finished.get(timeout=timeout)
+                except queue.Empty:
+                    target = pending_targets.pop(0)
+                    print(f"[OllamaClient] '{service}' {budget:.2f} sn bütçeyi aştı, yedek istek: "
+                          f"{target.model or self.model_name} @ {target.url or self.ollama_url}")
+                    self.latency_tracker.count(service, "hedged")
+                    launch(target)
+                    deadline = time.monotonic() + budget
+                    continue
+
+                done_count += 1
+                attempt["done"] = True
+                elapsed = time.monotonic() - attempt["started"]
+                if parser is not None and parser.decision is not None:
+                    self.latency_tracker.record(service, attempt["model"], elapsed)
+                    if attempt["index"] > 0:
+                        self.latency_tracker.count(service, "hedge_wins")
+                        print(f"[OllamaClient] '{service}' kararı yedek istekten geldi ({attempt['model']}, {elapsed:.2f} sn)")
+                    return parser
+
+                if parent is not None and parent.cancelled:
+                    parent.raise_if_cancelled()
+                if error is not None and not isinstance(error, RequestCancelled):
+                    first_error = first_error or error
+                if parser is not None and fallback_parser is None:
+                    fallback_parser = parser
+
+                if pending_targets:
+                    # Ana çağrı geçerli karar üretmeden bitti: sıradaki hedefe hemen geç
+                    self.latency_tracker.count(service, "fallbacks")
+                    launch(pending_targets.pop(0))
+                    deadline = time.monotonic() + budget
+                elif done_count == len(attempts):
+                    if fallback_parser is not None:
+                        return fallback_parser
+                    if first_error is not None:
+                        raise first_error
+                    return StreamingDecisionParser(required_key)
+        finally:
+            now = time.monotonic()
+            for attempt in attempts:
+                # Kaybeden akışları kapat; bitmiş denemeler için iptal sadece kaydı temizler
+                if attempt["token"].cancel("Başka bir deneme karar verdi.") and not attempt.get("done"):
+                    # Yarıda kesilen denemenin süresi, o modelin gecikmesi için bir alt sınırdır
+                    self.latency_tracker.record(service, attempt["model"], now - attempt["started"])
+
+    def _record_metrics(self, data: Dict[str, Any]):
+        """Ollama'nın 'done' yanıtındaki süre ve token sayaçlarını saklar (süreler nanosaniye)"""
+        self.last_metrics = {
+            key: data.get(key)
+            for key in ("total_duration", "load_duration", "prompt_eval_count",
+                        "prompt_eval_duration", "eval_count", "eval_duration")
+            if data.get(key) is not None
+        }
+
+    def _history_target(self, use_history: bool, history: Optional[List[Dict[str, str]]]) -> Optional[List[Dict[str, str]]]:
+        """Yanıtın ekleneceği geçmiş: çağıranın (oturumun) listesi, yoksa istemcinin kendi geçmişi"""
+        if not use_history:
+            return None
+        return history if history is not None else self.chat_history
+
+    def _append_history(self, history: List[Dict[str, str]], message: Dict[str, str]):
+        history.append(message)
+        if len(history) > self.max_history_messages:
+            del history[:-self.max_history_messages]
+
+    def _prepare_messages(self, user_prompt: str, system_prompt: Optional[str],
+                          history: Optional[List[Dict[str, str]]]) -> List[Dict[str, str]]:
+        """Her çağrı için geçmişin anlık kopyasından yeni bir mesaj listesi oluşturur; geçmiş değiştirilmez"""
+        messages = [dict(msg) for msg in tuple(history or ())]
 
         if system_prompt and not any(msg.get("role") == "system" for msg in messages):
             messages.insert(0, {"role": "system", "content": system_prompt})
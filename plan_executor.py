@@ -0,0 +1,116 @@
+# plan_executor.py
+
+import time
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, List, Callable, Optional, Tuple
+
+from tools.tool_registry import tool_registry
+from cancellation import RequestCancelled, current_cancel_token
+
+logger = logging.getLogger(__name__)
+
+
+class PlanExecutor:
+    """Plan DAG'ındaki araç çağrılarını bağımlılıklara uyarak çalıştırır; bağımsız adımlar paralel yürür"""
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+
+    def _run_step(self, step: Dict[str, Any], agent: Any) -> Tuple[Dict[str, Any], Dict[str, Any], List[str]]:
+        """Adımı çalıştırır; (sonuç, envantere göre düzeltilmiş parametreler, düzeltme notları) döndürür"""
+        tool_name = step["tool_name"]
+        parameters = dict(step.get("parameters", {}))
+        tool_info = agent.get_tools().get(tool_name, {})
+        parameters, notes = agent._resolve_resource_parameters(tool_info, parameters)
+
+        missing = agent._identify_missing_parameters(tool_info, parameters)
+        if missing:
+            return {"status": "error", "message": f"Eksik parametreler: {', '.join(missing)}"}, parameters, notes
+
+        error_msg = agent._validate_tool_call(tool_name, parameters)
+        if error_msg:
+            return {"status": "error", "message": error_msg}, parameters, notes
+
+        executor = tool_registry.get_executor(agent.tool_category, tool_name)
+        if executor is None:
+            return {"status": "error", "message": f"'{tool_name}' aracının çalıştırma metodu bulunamadı."}, parameters, notes
+        return agent._invoke_tool(executor, tool_name, parameters), parameters, notes
+
+    def execute(self, steps: List[Dict[str, Any]], agents: Dict[str, Any],
+                on_step_done: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+        """Tüm adımları çalıştırır ve plan sırasıyla adım sonuçlarını döndürür; istek iptal edilirse yeni adım başlatılmaz"""
+        cancel_token = current_cancel_token.get()
+        outcomes: Dict[str, Dict[str, Any]] = {}
+        pending = {s["id"]: s for s in steps}
+        failed = set()
+
+        def record(step, status, result, elapsed=0.0, parameters=None, notes=None):
+            outcome = {
+                "id": step["id"],
+                "agent": step["agent"],
+                "tool_name": step["tool_name"],
+                "parameters": step.get("parameters", {}) if parameters is None else parameters,
+                "resolution_notes": notes or [],
+                "depends_on": step.get("depends_on", []),
+                "status": status,
+                "elapsed_seconds": round(elapsed, 2),
+                "result": result
+            }
+            outcomes[step["id"]] = outcome
+            if status != "success":
+                failed.add(step["id"])
+            if on_step_done:
+                on_step_done(outcome)
+
+        def timed(step):
+            started = time.monotonic()
+            result, parameters, notes = self._run_step(step, agents[step["agent"]])
+            return result, parameters, notes, time.monotonic() - started
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="kubex-plan") as pool:
+            running = {}
+            while pending or running:
+                progressed = False
+                for step_id, step in list(pending.items()):
+                    deps = step.get("depends_on", [])
+                    if cancel_token is not None and cancel_token.cancelled:
+                        del pending[step_id]
+                        progressed = True
+                        record(step, "skipped", {"status": "error", "message": "İstek iptal edildi."})
+                    elif any(d in failed for d in deps):
+                        del pending[step_id]
+                        progressed = True
+                        record(step, "skipped", {"status": "error", "message": "Bağlı olduğu adım başarısız oldu."})
+                    elif all(d in outcomes for d in deps):
+                        del pending[step_id]
+                        progressed = True
+                        print(f"[PlanExecutor] Adım başlatılıyor: {step_id} ({step['agent']}.{step['tool_name']})")
+                        future = pool.submit(contextvars.copy_context().run, timed, step)
+                        running[future] = step
+
+                if not running:
+                    if not progressed:
+                        # Çözülemeyen bağımlılık (doğrulanmış planda olmamalı)
+                        for step in pending.values():
+                            record(step, "skipped", {"status": "error", "message": "Bağımlılıkları çözülemedi."})
+                        pending.clear()
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = running.pop(future)
+                    try:
+                        result, parameters, notes, elapsed = future.result()
+                    except RequestCancelled:
+                        record(step, "skipped", {"status": "error", "message": "İstek iptal edildi."})
+                        continue
+                    except Exception as e:
+                        logger.error(f"[PlanExecutor] Adım başarısız ({step['id']}): {e}")
+                        record(step, "error", {"status": "error", "message": str(e)})
+                        continue
+                    failed_result = isinstance(result, dict) and result.get("status") == "error"
+                    record(step, "error" if failed_result else "success", result, elapsed, parameters, notes)
+
+        return [outcomes[s["id"]] for s in steps]
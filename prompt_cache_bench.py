@@ -0,0 +1,169 @@
+# prompt_cache_bench.py
+"""
+Prompt önek kararlılığı kontrolü ve Ollama prompt-cache ölçümü.
+
+    python prompt_cache_bench.py                       # sadece önek kontrolü (sunucu gerekmez)
+    python prompt_cache_bench.py --ollama-url http://localhost:11434 --turns 5
+
+Önek kontrolü, router ve araç seçimi prompt'larını çalışma anındaki gibi oluşturur: farklı
+sohbet özetleri ve (araç seçiminde) farklı kullanıcı istekleri için retriever'ın seçtiği top-k
+araç alt kümesiyle. Sabit önekin (router'da özete kadar her şey, araç seçiminde yalnızca kurallar)
+tüm varyantların bayt bayt öneki olduğunu doğrular ve gerçekte ortak kalan önek uzunluğunu raporlar.
+Araç listesi isteğe göre değiştiğinden cache'lenen önekin parçası değildir.
+Ölçüm modu aynı turları eski yerleşimle (özet ortada) ve yeni yerleşimle (özet sonda)
+gönderir ve Ollama'nın döndürdüğü prompt_eval_count / prompt_eval_duration değerlerini karşılaştırır.
+"""
+
+import io
+import sys
+import argparse
+from contextlib import redirect_stdout
+from types import SimpleNamespace
+from typing import Callable, Dict, Any, List, Tuple
+
+from ollama import OllamaClient
+from llm_services.router_llm_service import RouterLLMService
+from llm_services.tool_calling_llm_service import ToolCallingLLMService
+from tools.tool_registry import tool_registry
+
+SUMMARIES = [
+    "1. Kullanici: clusterlari listele\n   Asistan: 2 cluster bulundu.",
+    "1. Kullanici: clusterlari listele\n   Asistan: 2 cluster bulundu.\n"
+    "2. Kullanici: nginx deploymentini 3 pod yap\n   Asistan: nginx 3 replikaya olceklendi.",
+    "1. Kullanici: monitoring namespace detaylari\n   Asistan: monitoring namespace'i aktif, 12 pod calisiyor.",
+]
+
+# Araç seçiminde retriever'ın farklı alt kümeler seçmesi için farklı kategorilere yönelik istekler
+QUERIES = [
+    "deploymentlari listele",
+    "nginx deploymentini 3 pod yap",
+    "monitoring namespace detaylarini goster",
+    "prometheus helm reposunu ekle",
+    "cluster ozetini goster",
+]
+
+ROUTER_AGENTS = {
+    "cluster": SimpleNamespace(category="Kubernetes Cluster", description="Kubernetes cluster'larını yönetir, listeler, oluşturur ve günceller."),
+    "namespace": SimpleNamespace(category="Kubernetes Namespace", description="Kubernetes namespace'lerini listeler ve detaylarını gösterir."),
+    "deployment": SimpleNamespace(category="Kubernetes Deployment", description="Kubernetes deployment'larını yönetir, listeler ve detaylarını gösterir."),
+    "repository": SimpleNamespace(category="Helm Repository", description="Helm repository'lerini ve chart kurulumlarını yönetir."),
+}
+
+# Eski yerleşimde sohbet özeti bu başlıktan hemen önce yer alıyordu
+LEGACY_CONTEXT_MARKERS = {
+    "router": "### KARAR VERME SÜRECİ ###",
+    "tool_calling": "### GÖREV AKIŞI VE KURALLAR ###",
+}
+
+CONTEXT_HEADER = "### SON SOHBET OZETI ###"
+
+
+def _prompt_builders() -> Dict[str, Tuple[str, Callable[[str, str], str]]]:
+    """İsim -> (sabit önek, (kullanıcı isteği, sohbet özeti) -> system prompt) eşlemesi"""
+    router = RouterLLMService(client=None)
+    tool_service = ToolCallingLLMService(client=None)
+    builders = {"router": (
+        router._build_system_prompt(ROUTER_AGENTS, ""),
+        lambda query, summary: router._build_system_prompt(ROUTER_AGENTS, summary)
+    )}
+    for category in tool_registry.categories():
+        catalog = tool_registry.get_catalog(category)
+        builders[f"tool_calling/{category}"] = (
+            tool_service._get_static_prefix(category),
+            # select_tool ile aynı yol: isteğe göre seçilen top-k alt küme prompt'a girer
+            lambda query, summary, c=category, t=catalog: tool_service._build_system_prompt(
+                c, tool_service.retriever.select(query, t), summary
+            )
+        )
+    return builders
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    limit = min(len(a), len(b))
+    i = 0
+    while i < limit and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def check_prefix_stability() -> bool:
+    """Sabit önek, farklı istek ve özetlerle oluşan tüm prompt'ların bayt bayt öneki mi kontrol eder"""
+    ok = True
+    print(f"{'prompt':<28} {'sabit (byte)':>12} {'ortak önek':>11} {'toplam':>8} {'varyant':>8} {'durum':>6}")
+    for name, (static_text, build) in _prompt_builders().items():
+        static = static_text.encode("utf-8")
+        # Retriever seçim satırlarını tabloya karıştırma
+        with redirect_stdout(io.StringIO()):
+            variants = [build(query, summary).encode("utf-8") for query in QUERIES for summary in [""] + SUMMARIES]
+        stable = all(v.startswith(static) for v in variants)
+        common = min(_common_prefix_length(variants[0], v) for v in variants[1:])
+        longest = max(len(v) for v in variants)
+        ok = ok and stable
+        print(f"{name:<28} {len(static):>12} {common:>11} {longest:>8} {len(set(variants)):>8} {'OK' if stable else 'HATA':>6}")
+    return ok
+
+
+def _legacy_layout(prompt: str, kind: str) -> str:
+    """Yeni yerleşimdeki sondaki özeti, eski yerleşimdeki gibi kuralların önüne taşır"""
+    if CONTEXT_HEADER not in prompt:
+        return prompt
+    static, context = prompt.split(CONTEXT_HEADER, 1)
+    marker = LEGACY_CONTEXT_MARKERS[kind]
+    head, tail = static.rstrip("\n").split(marker, 1)
+    return f"{head}{CONTEXT_HEADER}{context}\n{marker}{tail}"
+
+
+def _run_turns(client: OllamaClient, prompts: List[str], user_prompt: str) -> List[Tuple[int, float]]:
+    samples = []
+    for system_prompt in prompts:
+        client.chat(user_prompt=user_prompt, system_prompt=system_prompt, use_history=False,
+                    temperature=0, num_predict=1)
+        metrics = client.last_metrics
+        samples.append((metrics.get("prompt_eval_count", 0), metrics.get("prompt_eval_duration", 0) / 1e6))
+    return samples
+
+
+def measure(ollama_url: str, model: str, turns: int) -> Dict[str, Any]:
+    """Eski ve yeni yerleşimle aynı turları gönderip prompt değerlendirme maliyetini karşılaştırır"""
+    client = OllamaClient(ollama_url=ollama_url, kubex_url="", model_name=model)
+    if not client.test_connection():
+        raise RuntimeError(f"Ollama'ya bağlanılamadı: {ollama_url}")
+
+    router = RouterLLMService(client)
+    summaries = [SUMMARIES[i % len(SUMMARIES)] + f"\n   (tur {i})" for i in range(turns)]
+    stable_prompts = [router._build_system_prompt(ROUTER_AGENTS, s) for s in summaries]
+    legacy_prompts = [_legacy_layout(p, "router") for p in stable_prompts]
+
+    results = {}
+    for layout, prompts in (("eski", legacy_prompts), ("yeni", stable_prompts)):
+        # İlk tur önbelleği ısıtır; karşılaştırma sonraki turlar üzerinden yapılır
+        samples = _run_turns(client, prompts, "deploymentlari listele")[1:]
+        results[layout] = {
+            "avg_prompt_eval_count": sum(c for c, _ in samples) / len(samples),
+            "avg_prompt_eval_ms": sum(ms for _, ms in samples) / len(samples),
+        }
+        print(f"[{layout}] ort. prompt_eval_count={results[layout]['avg_prompt_eval_count']:.0f} "
+              f"ort. prompt_eval_duration={results[layout]['avg_prompt_eval_ms']:.1f} ms")
+
+    legacy_ms = results["eski"]["avg_prompt_eval_ms"]
+    if legacy_ms:
+        results["savings_percent"] = 100 * (1 - results["yeni"]["avg_prompt_eval_ms"] / legacy_ms)
+        print(f"Prompt değerlendirme süresinde kazanç: %{results['savings_percent']:.1f}")
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Prompt önek kararlılığı ve Ollama prompt-cache ölçümü")
+    parser.add_argument("--ollama-url", help="Verilirse prompt_eval_duration ölçümü de yapılır")
+    parser.add_argument("--model", default="qwen3:8b")
+    parser.add_argument("--turns", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    ok = check_prefix_stability()
+    if args.ollama_url:
+        measure(args.ollama_url, args.model, max(args.turns, 2))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+# resilience.py
+
+import time
+import random
+import logging
+import threading
+from collections import deque
+from typing import Dict, Any, Callable, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+
+from cancellation import CancellationToken, RequestCancelled, current_cancel_token
+
+logger = logging.getLogger(__name__)
+
+# Bağlantı kurma süresi sınırı; kapalı bir sunucu için istek başına 30-120 sn beklenmez
+CONNECT_TIMEOUT_SECONDS = 3.05
+
+# Okuma süresi = gözlenen p99 x çarpan, [alt sınır, çağıranın verdiği süre] aralığında
+TIMEOUT_PERCENTILE = 0.99
+TIMEOUT_MULTIPLIER = 3.0
+MIN_READ_TIMEOUT_SECONDS = 5.0
+TIMEOUT_MIN_SAMPLES = 20
+LATENCY_WINDOW = 200
+
+# Sadece idempotent çağrılar tekrar denenir; bekleme süresi tam jitter'lı üstel geri çekilme
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.2
+RETRY_MAX_DELAY = 2.0
+RETRYABLE_STATUS_CODES = (429, 502, 503, 504)
+
+# Devre için hata sayılan yanıtlar: arka ucun (veya önündeki proxy'nin) ulaşılamadığını gösterir.
+# 429 ve diğer 5xx'ler sunucunun çalıştığını gösterir, devreyi açmaz
+BREAKER_FAILURE_STATUS_CODES = (502, 503, 504)
+
+# Art arda bu kadar hatada devre açılır; açıkken çağrılar beklemeden hata döner
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 15.0
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Devre açık: arka uç çöktüğü için çağrı gönderilmeden reddedildi.
+
+    requests.ConnectionError'dan türer; araçların mevcut RequestException blokları hata sözlüğünü hemen döndürür.
+    """
+
+
+class CircuitBreaker:
+    """Uç nokta başına devre kesici: closed -> (art arda hata) open -> (bekleme) half-open -> tek deneme"""
+
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.rejected = 0
+        self.opened = 0
+
+    def before_call(self):
+        """Çağrıya izin verir veya CircuitOpenError fırlatır; half-open durumda yalnızca tek deneme geçer"""
+        with self._lock:
+            if self.state == "closed":
+                return
+            remaining = self._opened_at + self.reset_seconds - time.monotonic()
+            if self.state == "open" and remaining <= 0:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            self.rejected += 1
+        raise CircuitOpenError(
+            f"{self.name} geçici olarak devre dışı (art arda {self._failures} hata); "
+            f"{max(0.0, remaining):.0f} sn sonra yeniden denenecek"
+        )
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                print(f"[Resilience] Devre kapandı: {self.name}")
+            self.state = "closed"
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self.state == "half_open" or (self.state == "closed" and self._failures >= self.failure_threshold):
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                self.opened += 1
+                logger.warning(f"[Resilience] Devre açıldı: {self.name} ({self._failures} hata)")
+
+    def release_probe(self):
+        """Sonucu belirsiz kalan (ör. iptal edilen) half-open denemesinin kilidini bırakır"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self._failures,
+                    "opened": self.opened, "rejected": self.rejected}
+
+
+class AdaptiveTimeouts:
+    """Anahtar (uç nokta) başına gecikme penceresi; okuma zaman aşımını gözlenen yüzdelik dilimden türetir"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples.setdefault(key, deque(maxlen=self.window))
+            samples.append(seconds)
+
+    def percentile(self, key: str, p: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, max(0, int(round(p * len(samples))) - 1))]
+
+    def read_timeout(self, key: str, ceiling: Optional[float],
+                     floor: float = MIN_READ_TIMEOUT_SECONDS) -> Optional[float]:
+        """Yeterli örnek varsa p99 x çarpan (çağıranın süresini aşmadan), yoksa çağıranın süresi"""
+        with self._lock:
+            count = len(self._samples.get(key, ()))
+        if count < TIMEOUT_MIN_SAMPLES:
+            return ceiling
+        derived = max(floor, self.percentile(key, TIMEOUT_PERCENTILE) * TIMEOUT_MULTIPLIER)
+        return min(derived, ceiling) if ceiling else derived
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            keys = {key: len(samples) for key, samples in self._samples.items()}
+        return {
+            key: {"samples": count, "p99": round(self.percentile(key, TIMEOUT_PERCENTILE) or 0.0, 3),
+                  "read_timeout": round(self.read_timeout(key, None) or 0.0, 2) if count >= TIMEOUT_MIN_SAMPLES else None}
+            for key, count in keys.items()
+        }
+
+
+def endpoint_keys(service: str, method: str, url: str, endpoint_class: str = "",
+                  cluster_id: Optional[str] = None) -> Tuple[str, str]:
+    """(devre anahtarı, zaman aşımı anahtarı): devre host + ilk yol parçası (+ cluster) başına, zaman aşımı ayrıca method ve uç nokta sınıfı başına.
+
+    Cluster verilirse devre o cluster'a özeldir; çöken bir cluster diğerlerinin çağrılarını reddettirmez.
+    """
+    parts = urlsplit(url)
+    segments = [s for s in parts.path.split("/") if s]
+    endpoint = f"{parts.netloc}/{segments[0] if segments else ''}"
+    timeout_key = f"{service} {method.upper()} {endpoint}"
+    if endpoint_class:
+        timeout_key += f" [{endpoint_class}]"
+    breaker_key = f"{service} {endpoint}"
+    if cluster_id is not None:
+        breaker_key += f" cluster={cluster_id}"
+    return breaker_key, timeout_key
+
+
+class ResilienceLayer:
+    """Ollama ve Kubex istemcilerinin ortak dayanıklılık katmanı: uyarlanır zaman aşımı, tekrar deneme, devre kesici"""
+
+    def __init__(self):
+        self.timeouts = AdaptiveTimeouts()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self._retries = 0
+
+    def breaker(self, key: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = self._breakers[key] = CircuitBreaker(key)
+            return breaker
+
+    def timeout_for(self, timeout_key: str, ceiling: Optional[Timeout], adaptive: bool = True,
+                    min_read_timeout: float = MIN_READ_TIMEOUT_SECONDS) -> Tuple[float, Optional[float]]:
+        """(connect, read) zaman aşımı; yazma çağrılarında okuma süresi çağıranın verdiği süre olarak kalır"""
+        if isinstance(ceiling, tuple):
+            return ceiling
+        connect = min(CONNECT_TIMEOUT_SECONDS, ceiling) if ceiling else CONNECT_TIMEOUT_SECONDS
+        read = self.timeouts.read_timeout(timeout_key, ceiling, min_read_timeout) if adaptive else ceiling
+        return connect, read
+
+    def _backoff(self, attempt: int, cancel_token: Optional[CancellationToken]):
+        delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)))
+        if cancel_token is not None:
+            if cancel_token.wait(delay):
+                raise RequestCancelled(cancel_token.reason)
+        else:
+            time.sleep(delay)
+
+    def call(self, breaker_key: str, timeout_key: str, send: Callable[[Timeout], requests.Response],
+             idempotent: bool, timeout: Optional[Timeout] = None, record_latency: bool = True,
+             min_read_timeout: float = MIN_READ_TIMEOUT_SECONDS,
+             cancel_token: Optional[CancellationToken] = None) -> requests.Response:
+        """send(timeout) çağrısını devre kesici, uyarlanır zaman aşımı ve (idempotent ise) tekrar deneme ile yapar.
+
+        Bağlantı hataları, zaman aşımları ve 502/503/504 yanıtlar devre için hata sayılır; diğer yanıtlar sayılmaz.
+        Bağlantı hataları ve 429/502/503/504 tekrar denenir. Okuma zaman aşımı yalnızca süreyi uyarlanır sınır
+        kestiyse çağıranın süresiyle bir kez denenir; bu durum kesinti sayılmaz ve kullanılan süre gecikme örneği
+        (alt sınır) olarak kaydedilir, böylece yavaşlama sonrası türetilen süre yeniden büyüyebilir.
+        Son denemenin yanıtı veya hatası çağırana aynen döner.
+        """
+        breaker = self.breaker(breaker_key)
+        cancel_token = cancel_token or current_cancel_token.get()
+        attempts = RETRY_ATTEMPTS if idempotent else 1
+        adaptive = idempotent
+
+        for attempt in range(attempts):
+            breaker.before_call()
+            started = time.monotonic()
+            connect, read = self.timeout_for(timeout_key, timeout, adaptive, min_read_timeout)
+            capped = adaptive and not isinstance(timeout, tuple) and read != timeout
+            try:
+                response = send((connect, read))
+            except requests.exceptions.ReadTimeout:
+                if read is not None:
+                    # Kesilen çağrının süresi bu uç noktanın gecikmesi (akışlarda ilk yanıt süresi) için bir alt sınırdır
+                    self.timeouts.record(timeout_key, read)
+                if not capped:
+                    breaker.record_failure()
+                    raise
+                # Arka uç yavaş ama ayakta: kesinti sayılmaz, sonraki deneme çağıranın süresini kullanır
+                breaker.release_probe()
+                adaptive = False
+                if attempt + 1 >= attempts:
+                    raise
+                logger.warning(f"[Resilience] {timeout_key} uyarlanır okuma süresini ({read:.1f} sn) aştı, "
+                               f"çağıranın süresiyle tekrar deneniyor")
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                breaker.record_failure()
+                if attempt + 1 >= attempts or not isinstance(e, requests.exceptions.ConnectionError):
+                    raise
+                logger.warning(f"[Resilience] {timeout_key} başarısız ({type(e).__name__}), tekrar deneniyor ({attempt + 1}/{attempts - 1})")
+            except BaseException:
+                breaker.release_probe()
+                raise
+            else:
+                if record_latency:
+                    self.timeouts.record(timeout_key, time.monotonic() - started)
+                if response.status_code in BREAKER_FAILURE_STATUS_CODES:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt + 1 >= attempts:
+                    return response
+                logger.warning(f"[Resilience] {timeout_key} HTTP {response.status_code}, tekrar deneniyor ({attempt + 1}/{attempts - 1})")
+                response.close()
+
+            with self._lock:
+                self._retries += 1
+            self._backoff(attempt, cancel_token)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            breakers = dict(self._breakers)
+            retries = self._retries
+        return {
+            "retries": retries,
+            "breakers": {key: breaker.stats() for key, breaker in breakers.items()},
+            "timeouts": self.timeouts.stats(),
+        }
+
+
+# Süreç genelinde Ollama ve Kubex istemcileri tarafından paylaşılır
+resilience = ResilienceLayer()
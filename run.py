@@ -6,6 +6,13 @@ def install_requirements():
     subprocess.check_call([sys.executable, "-m", "pip", "install", "streamlit", "requests"])
 
 if __name__ == "__main__":
+    # --api: Streamlit yerine başsız HTTP/SSE API sunucusunu başlat (kalan argümanlar api_server'a gider)
+    if "--api" in sys.argv:
+        sys.argv.remove("--api")
+        import api_server
+        api_server.main()
+        sys.exit(0)
+
     try:
         import streamlit
     except ImportError:
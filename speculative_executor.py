@@ -0,0 +1,131 @@
+# speculative_executor.py
+
+import logging
+import threading
+import contextvars
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, Any, Callable, Optional, Tuple
+
+from tools.read_cache import tool_read_cache, is_cacheable_tool
+from cancellation import RequestCancelled
+from tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Tahmin için en az bu kadar onaylanmış seçim gerekir (prior)
+MIN_PRIOR_CONFIRMATIONS = 2
+
+
+class SpeculativeExecutor:
+    """Araç seçimi LLM'i çalışırken en olası parametresiz okuma aracını önden çalıştırır.
+
+    Sonuç her durumda okuma cache'ine yazılır: LLM aracı onaylarsa çalıştırma sırasında
+    bekleyen çağrı sahiplenilir, onaylamazsa sonuç TTL süresince cache'te kalır.
+    """
+
+    def __init__(self, max_workers: int = 2, claim_timeout: float = 30.0):
+        self.claim_timeout = claim_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kubex-speculative")
+        self._in_flight: Dict[Tuple, Future] = {}
+        self._priors: Dict[str, Counter] = {}
+        self._lock = threading.Lock()
+        self._started = 0
+        self._claimed = 0
+        self._finished_unclaimed = 0
+
+    def predict(self, category: str, tools: Dict[str, Any], ranked: Optional[list] = None) -> Optional[str]:
+        """Arama sıralaması veya geçmiş seçimlerden (prior) en olası parametresiz aracı tahmin eder"""
+        if ranked:
+            top_name, _, top_lexical, _ = ranked[0]
+            if top_lexical > 0 and is_cacheable_tool(tools.get(top_name, {})):
+                return top_name
+            if top_lexical > 0:
+                return None
+
+        with self._lock:
+            prior = self._priors.get(category)
+            if not prior:
+                return None
+            name, count = prior.most_common(1)[0]
+        if count >= MIN_PRIOR_CONFIRMATIONS and is_cacheable_tool(tools.get(name, {})):
+            return name
+        return None
+
+    def record_choice(self, category: str, tool_name: str):
+        """LLM'in onayladığı aracı prior'a ekler"""
+        with self._lock:
+            self._priors.setdefault(category, Counter())[tool_name] += 1
+
+    def speculate(self, category: str, cluster_id: Any, tool_name: str, run: Callable[[], Any]) -> bool:
+        """Aracı arka planda başlatır; aynı araç zaten çalışıyor veya cache'te ise tekrar başlatmaz"""
+        key = tool_read_cache.make_key(category, cluster_id, tool_name)
+        with self._lock:
+            if key in self._in_flight:
+                return False
+        if tool_read_cache.peek(key):
+            return False
+
+        ctx = contextvars.copy_context()
+        generation = tool_read_cache.generation(cluster_id)
+
+        def traced_run():
+            with tracer.span("tool", tool=tool_name, speculative=True):
+                return run()
+
+        def task():
+            result = ctx.run(traced_run)
+            tool_read_cache.put(key, result, generation=generation)
+            return result
+
+        with self._lock:
+            if key in self._in_flight:
+                return False
+            future = self._executor.submit(task)
+            self._in_flight[key] = future
+            self._started += 1
+        future.add_done_callback(lambda f, k=key: self._finish(k, f))
+        print(f"[SpeculativeExecutor] '{tool_name}' önden çalıştırılıyor (cluster: {cluster_id})")
+        return True
+
+    def _finish(self, key, future: Future):
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+                # Çalışırken sahiplenilmeyen çağrının sonucu cache'ten okunur veya TTL ile düşer
+                if not getattr(future, "claimed", False):
+                    self._finished_unclaimed += 1
+        if future.exception() is not None:
+            logger.warning(f"[SpeculativeExecutor] Önden çalıştırma başarısız {key[2]}: {future.exception()}")
+
+    def claim(self, category: str, cluster_id: Any, tool_name: str) -> Any:
+        """Aynı araç için uçuştaki önden çalıştırma varsa sonucunu bekleyip döndürür, yoksa None"""
+        key = tool_read_cache.make_key(category, cluster_id, tool_name)
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is None:
+                return None
+            future.claimed = True
+            self._claimed += 1
+        try:
+            return future.result(timeout=self.claim_timeout)
+        except (FutureTimeout, RequestCancelled):
+            # Önden çalıştırmayı başlatan istek iptal edilmiş olabilir: çağıran aracı kendisi çalıştırır
+            return None
+        except Exception as e:
+            logger.warning(f"[SpeculativeExecutor] Sahiplenilen çağrı başarısız ({tool_name}): {e}")
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "started": self._started,
+                "claimed_in_flight": self._claimed,
+                "finished_unclaimed": self._finished_unclaimed,
+                "in_flight": len(self._in_flight),
+                "read_cache": tool_read_cache.stats()
+            }
+
+
+# Süreç genelinde tek örnek
+speculative_executor = SpeculativeExecutor()
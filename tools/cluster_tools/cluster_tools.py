@@ -2,6 +2,8 @@ import requests
 import logging
 from typing import Dict, Any, List
 
+from tools.kubex_session import KubexSession
+
 # Logger'ı yapılandırarak olası hataların ve işlemlerin takibini kolaylaştırıyoruz.
 logger = logging.getLogger(__name__)
 
@@ -10,7 +12,7 @@ class ClusterAPITools:
     
     def __init__(self, base_url: str, active_cluster_id: str = None):
         self.base_url = base_url.rstrip('/')
-        self.session = requests.Session()
+        self.session = KubexSession(cluster_id_provider=lambda: self.active_cluster_id)
         self.active_cluster_id = active_cluster_id
 
     def list_clusters(self) -> Dict[str, Any]:
@@ -1,8 +1,16 @@
 import requests
 import logging
-from typing import Dict, Any, List
+import fnmatch
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Union, Callable
+
+from tools.kubex_session import KubexSession
 
 logger = logging.getLogger(__name__)
+
+# Toplu işlemlerde Kubex'e aynı anda gönderilecek en fazla istek sayısı
+BULK_MAX_CONCURRENCY = 5
 def _summarize_deployments(deployments: List[Dict[str, Any]]) -> Dict[str, Any]:
         summary = {}
         for d in deployments:
@@ -25,18 +33,21 @@ class DeploymentAPITools:
     
     def __init__(self, base_url: str, active_cluster_id):
         self.base_url = base_url.rstrip('/')
-        self.session = requests.Session()
+        self.session = KubexSession(cluster_id_provider=lambda: self.active_cluster_id)
         self.active_cluster_id = active_cluster_id
     
+    def _fetch_deployment_records(self) -> List[Dict[str, Any]]:
+        """Cluster'daki deployment kayıtlarını ham haliyle döndürür"""
+        url = f"{self.base_url}/deployments/{self.active_cluster_id}/instant"
+        print(f"[DeploymentAPI] Fetching deployment list from: {url}")
+
+        response = self.session.get(url, timeout=30)
+        response.raise_for_status()
+        return response.json()
+
     def list_deployments(self) -> Dict[str, Any]:
         try:
-            url = f"{self.base_url}/deployments/{self.active_cluster_id}/instant"
-            print(f"[DeploymentAPI] Fetching deployment list from: {url}")
-            
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            
-            raw_data = response.json()
+            raw_data = self._fetch_deployment_records()
 
             summarized_view = _summarize_deployments(raw_data)
             
@@ -287,4 +298,186 @@ class DeploymentAPITools:
                 "namespace": namespace,
                 "cluster_id": self.active_cluster_id,
                 "requested_image": image
-            }
\ No newline at end of file
+            }
+
+    def _select_deployments(
+        self,
+        deployment_names: Optional[Union[List[str], str]] = None,
+        namespace: Optional[str] = None,
+        name_pattern: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Toplu işlem için hedef deployment'ları isim listesi veya seçiciye göre belirler"""
+        if isinstance(deployment_names, str):
+            deployment_names = [n.strip() for n in deployment_names.split(",")]
+        deployment_names = [n for n in (deployment_names or []) if n]
+
+        records = self._fetch_deployment_records()
+        targets: List[Dict[str, str]] = []
+        unresolved: List[Dict[str, Any]] = []
+
+        if deployment_names:
+            for entry in deployment_names:
+                # "namespace/isim" formatı da kabul edilir
+                entry_namespace, _, entry_name = entry.rpartition("/")
+                entry_namespace = entry_namespace or namespace
+                matches = [
+                    r for r in records
+                    if r.get("name") == entry_name
+                    and (not entry_namespace or r.get("namespace") == entry_namespace)
+                ]
+                if len(matches) == 1:
+                    targets.append({"deployment_name": entry_name, "namespace": matches[0].get("namespace")})
+                elif not matches:
+                    unresolved.append({
+                        "deployment_name": entry_name,
+                        "namespace": entry_namespace,
+                        "status": "error",
+                        "message": f"'{entry}' deployment'ı bulunamadı"
+                    })
+                else:
+                    unresolved.append({
+                        "deployment_name": entry_name,
+                        "namespace": None,
+                        "status": "error",
+                        "message": f"'{entry_name}' birden fazla namespace'de var, namespace belirtin: "
+                                   f"{', '.join(sorted(str(r.get('namespace')) for r in matches))}"
+                    })
+        else:
+            for r in records:
+                if namespace and r.get("namespace") != namespace:
+                    continue
+                if name_pattern and not fnmatch.fnmatch(r.get("name", ""), name_pattern):
+                    continue
+                targets.append({"deployment_name": r.get("name"), "namespace": r.get("namespace")})
+
+        return {"targets": targets, "unresolved": unresolved}
+
+    def _run_bulk(
+        self,
+        operation: str,
+        targets: List[Dict[str, str]],
+        unresolved: List[Dict[str, Any]],
+        action: Callable[[Dict[str, str]], Dict[str, Any]],
+        max_concurrency: int
+    ) -> Dict[str, Any]:
+        """Hedefleri sınırlı eşzamanlılıkla çalıştırır ve öğe bazında sonuçları tek bir yanıtta toplar"""
+        max_concurrency = max(1, min(int(max_concurrency), BULK_MAX_CONCURRENCY))
+        print(f"[DeploymentAPI] Toplu '{operation}' başlatılıyor: {len(targets)} hedef, eşzamanlılık={max_concurrency}")
+
+        def run_item(target: Dict[str, str]) -> Dict[str, Any]:
+            result = action(target)
+            return {
+                "deployment_name": target["deployment_name"],
+                "namespace": target["namespace"],
+                "status": result.get("status"),
+                "message": result.get("message")
+            }
+
+        results: List[Dict[str, Any]] = list(unresolved)
+        if targets:
+            with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="bulk-deploy") as pool:
+                # Her iş, çağıranın context'iyle (oturum anahtarı vb.) çalışsın
+                futures = [pool.submit(contextvars.copy_context().run, run_item, t) for t in targets]
+                results.extend(f.result() for f in futures)
+
+        succeeded = sum(1 for r in results if r["status"] == "success")
+        failed = len(results) - succeeded
+
+        if not results:
+            status = "error"
+            message = "Seçiciye uyan deployment bulunamadı"
+        elif failed == 0:
+            status = "success"
+            message = f"Toplu {operation}: {succeeded} deployment'ın tamamı başarılı"
+        elif succeeded == 0:
+            status = "error"
+            message = f"Toplu {operation}: {failed} deployment'ın hiçbiri başarılı olmadı"
+        else:
+            status = "partial_success"
+            message = f"Toplu {operation}: {succeeded} başarılı, {failed} başarısız"
+
+        return {
+            "status": status,
+            "operation": operation,
+            "cluster_id": self.active_cluster_id,
+            "total": len(results),
+            "succeeded": succeeded,
+            "failed": failed,
+            "results": results,
+            "message": message
+        }
+
+    def bulk_scale_deployments(
+        self,
+        replicas: int,
+        deployment_names: Optional[Union[List[str], str]] = None,
+        namespace: Optional[str] = None,
+        name_pattern: Optional[str] = None,
+        max_concurrency: int = BULK_MAX_CONCURRENCY
+    ) -> Dict[str, Any]:
+        """Birden fazla deployment'ı tek seferde aynı replica sayısına ölçekler"""
+        if not deployment_names and not namespace and not name_pattern:
+            return {
+                "status": "error",
+                "message": "Toplu işlem için deployment_names, namespace veya name_pattern seçicilerinden en az biri gerekli",
+                "cluster_id": self.active_cluster_id
+            }
+        try:
+            replicas = int(replicas)
+        except (TypeError, ValueError):
+            return {
+                "status": "error",
+                "message": f"Geçersiz replica sayısı: {replicas}",
+                "cluster_id": self.active_cluster_id
+            }
+
+        try:
+            selection = self._select_deployments(deployment_names, namespace, name_pattern)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"[DeploymentAPI] Toplu ölçeklendirme için deployment listesi alınamadı: {e}")
+            return {
+                "status": "error",
+                "message": f"Deployment listesi alınamadı: {str(e)}",
+                "cluster_id": self.active_cluster_id
+            }
+
+        return self._run_bulk(
+            "ölçeklendirme",
+            selection["targets"],
+            selection["unresolved"],
+            lambda t: self.scale_deployment(t["deployment_name"], t["namespace"], replicas),
+            max_concurrency
+        )
+
+    def bulk_redeploy_deployments(
+        self,
+        deployment_names: Optional[Union[List[str], str]] = None,
+        namespace: Optional[str] = None,
+        name_pattern: Optional[str] = None,
+        max_concurrency: int = BULK_MAX_CONCURRENCY
+    ) -> Dict[str, Any]:
+        """Birden fazla deployment için tek seferde rolling restart tetikler"""
+        if not deployment_names and not namespace and not name_pattern:
+            return {
+                "status": "error",
+                "message": "Toplu işlem için deployment_names, namespace veya name_pattern seçicilerinden en az biri gerekli",
+                "cluster_id": self.active_cluster_id
+            }
+
+        try:
+            selection = self._select_deployments(deployment_names, namespace, name_pattern)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"[DeploymentAPI] Toplu yeniden dağıtım için deployment listesi alınamadı: {e}")
+            return {
+                "status": "error",
+                "message": f"Deployment listesi alınamadı: {str(e)}",
+                "cluster_id": self.active_cluster_id
+            }
+
+        return self._run_bulk(
+            "yeniden dağıtım",
+            selection["targets"],
+            selection["unresolved"],
+            lambda t: self.redeploy_deployment(t["deployment_name"], t["namespace"]),
+            max_concurrency
+        )
@@ -0,0 +1,146 @@
+import time
+import random
+import logging
+from typing import Dict, Any, Generator, Optional
+
+from cancellation import RequestCancelled, current_cancel_token
+
+logger = logging.getLogger(__name__)
+
+
+def _first_present(data: Dict[str, Any], *keys: str) -> Optional[Any]:
+    for key in keys:
+        if isinstance(data, dict) and data.get(key) is not None:
+            return data.get(key)
+    return None
+
+
+def _read_rollout_state(detail: Dict[str, Any]) -> Dict[str, Optional[int]]:
+    """Deployment detayından replica sayılarını okur (düz veya Kubernetes 'spec/status' formatı)"""
+    spec = detail.get("spec") or {}
+    status = detail.get("status") if isinstance(detail.get("status"), dict) else {}
+    metadata = detail.get("metadata") or {}
+
+    return {
+        "desired": _first_present(spec, "replicas") if spec else _first_present(detail, "replicas"),
+        "ready": _first_present(status, "readyReplicas", "ready_replicas")
+                 if status else _first_present(detail, "ready_replicas", "readyReplicas"),
+        "updated": _first_present(status, "updatedReplicas", "updated_replicas")
+                   if status else _first_present(detail, "updated_replicas", "updatedReplicas"),
+        "unavailable": _first_present(status, "unavailableReplicas", "unavailable_replicas")
+                       if status else _first_present(detail, "unavailable_replicas", "unavailableReplicas"),
+        "generation": _first_present(metadata, "generation") or _first_present(detail, "generation"),
+        "observed_generation": _first_present(status, "observedGeneration", "observed_generation")
+                               or _first_present(detail, "observed_generation", "observedGeneration"),
+    }
+
+
+class RolloutTracker:
+    """Image güncelleme ve redeploy sonrası rollout'u LLM kullanmadan takip eder"""
+
+    def __init__(
+        self,
+        deployment_api,
+        timeout: float = 180.0,
+        initial_delay: float = 1.0,
+        max_delay: float = 15.0,
+        jitter: float = 0.3
+    ):
+        self.deployment_api = deployment_api
+        self.timeout = timeout
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    def _next_delay(self, attempt: int) -> float:
+        """Üstel geri çekilme + jitter ile bir sonraki bekleme süresini hesaplar"""
+        delay = min(self.max_delay, self.initial_delay * (2 ** attempt))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _poll(self, deployment_name: str, namespace: str) -> Optional[Dict[str, Optional[int]]]:
+        result = self.deployment_api.show_deployment(deployment_name, namespace)
+        if result.get("status") == "success":
+            state = _read_rollout_state(result.get("deployment_detail") or {})
+            if state["desired"] is not None and state["ready"] is not None:
+                return state
+
+        # Detayda replica bilgisi yoksa pod listesine bak
+        pods = self.deployment_api.get_deployment_pods(namespace_name=namespace, deployment_name=deployment_name)
+        if pods.get("status") != "success":
+            return None
+        return {
+            "desired": pods.get("pod_count"),
+            "ready": pods.get("running_pods"),
+            "updated": None,
+            "unavailable": (pods.get("pod_count") or 0) - (pods.get("running_pods") or 0),
+            "generation": None,
+            "observed_generation": None,
+        }
+
+    @staticmethod
+    def _is_converged(state: Dict[str, Optional[int]]) -> bool:
+        desired = state["desired"]
+        if desired is None or state["ready"] is None:
+            return False
+        if state["generation"] is not None and state["observed_generation"] is not None \
+                and state["observed_generation"] < state["generation"]:
+            return False
+        if state["updated"] is not None and state["updated"] < desired:
+            return False
+        if state["unavailable"]:
+            return False
+        return state["ready"] >= desired
+
+    @staticmethod
+    def _format_state(state: Dict[str, Optional[int]]) -> str:
+        text = f"{state['ready']}/{state['desired']} hazır"
+        if state["updated"] is not None:
+            text += f", {state['updated']}/{state['desired']} güncel"
+        return text
+
+    def track(self, deployment_name: str, namespace: str) -> Generator[str, None, None]:
+        """Rollout tamamlanana veya süre dolana kadar ilerleme satırlarını akış olarak döndürür"""
+        print(f"[RolloutTracker] Rollout takibi başladı: {namespace}/{deployment_name}")
+        started = time.monotonic()
+        deadline = started + self.timeout
+        last_line = None
+        attempt = 0
+
+        yield f"\n\n⏳ `{deployment_name}` rollout'u takip ediliyor...\n\n"
+
+        while True:
+            # İlk sorguda da beklenir; controller değişikliği henüz görmemiş olabilir
+            delay = min(self._next_delay(attempt), max(0.0, deadline - time.monotonic()))
+            # Bekleme iptal edilebilir; yeni istek veya sıfırlama takibi hemen durdurur
+            cancel_token = current_cancel_token.get()
+            if cancel_token is None:
+                time.sleep(delay)
+            elif cancel_token.wait(delay):
+                print(f"[RolloutTracker] Rollout takibi iptal edildi: {namespace}/{deployment_name}")
+                raise RequestCancelled(cancel_token.reason)
+            attempt += 1
+
+            elapsed = int(time.monotonic() - started)
+            try:
+                state = self._poll(deployment_name, namespace)
+            except Exception as e:
+                logger.warning(f"[RolloutTracker] Durum sorgulanamadı ({deployment_name}): {e}")
+                state = None
+
+            if state and self._is_converged(state):
+                print(f"[RolloutTracker] Rollout tamamlandı: {namespace}/{deployment_name} ({elapsed}s)")
+                yield f"✅ `{deployment_name}` rollout'u tamamlandı: {self._format_state(state)} ({elapsed}s)\n\n"
+                return
+
+            line = self._format_state(state) if state else "durum alınamadı"
+            if line != last_line:
+                last_line = line
+                yield f"🔄 `{deployment_name}`: {line} ({elapsed}s)\n\n"
+
+            if time.monotonic() >= deadline:
+                print(f"[RolloutTracker] Rollout takibi zaman aşımına uğradı: {namespace}/{deployment_name}")
+                yield (
+                    f"⚠️ `{deployment_name}` rollout'u {int(self.timeout)} saniye içinde tamamlanmadı "
+                    f"(son durum: {line}). Durumu daha sonra tekrar kontrol edebilirsiniz.\n\n"
+                )
+                return
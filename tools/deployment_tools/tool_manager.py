@@ -2,195 +2,278 @@
 
 from typing import Dict, Any
 
-class DeploymentToolManager:
-    """Deployment araçlarını yöneten API tool manager"""
-    
-    def __init__(self, active_cluster_id: str):
-        self.active_cluster_id = active_cluster_id
-        self.tools = self._define_tools()
+from tools.tool_registry import tool_registry
+from tools.deployment_tools.deployment_tools import DeploymentAPITools
 
-    def _define_tools(self) -> Dict[str, Any]:
-        """Deployment işlemleri için mevcut araçları tanımlar"""
-        return {
-            "list_deployments": {
-                "summary": "Tüm namespace'lerdeki deployment'ları özet bilgileriyle listeler.",
-                "description": (
-                    "Bu araç, cluster'daki tüm deployment'ların bir listesini döndürür. Her bir deployment için adı, "
-                    "bulunduğu namespace, istenen ve hazır olan replica sayıları (örn: 3/3) ve ne kadar süredir çalıştığı "
-                    "gibi temel durum bilgilerini içerir."
-                ),
-                "method": "GET",
-                "path": f"/deployments/{self.active_cluster_id}/instant",
-                "parameters": []
+# Deployment araçlarının tanımları. Path'lerdeki {cluster_id} çalıştırma anında aktif cluster ile doldurulur.
+DEPLOYMENT_TOOL_SPECS: Dict[str, Any] = {
+    "list_deployments": {
+        "summary": "Tüm namespace'lerdeki deployment'ları özet bilgileriyle listeler.",
+        "keywords": ["listele", "göster", "hepsi", "deploymentlar"],
+        "description": (
+            "Bu araç, cluster'daki tüm deployment'ların bir listesini döndürür. Her bir deployment için adı, "
+            "bulunduğu namespace, istenen ve hazır olan replica sayıları (örn: 3/3) ve ne kadar süredir çalıştığı "
+            "gibi temel durum bilgilerini içerir."
+        ),
+        "method": "GET",
+        "cacheable": True,
+        "path": "/deployments/{cluster_id}/instant",
+        "parameters": []
+    },
+
+    "show_deployment": {
+        "summary": "Belirli bir deployment'ın genel durumunu ve üst düzey bilgilerini gösterir.",
+        "keywords": ["durum", "detay", "bilgi", "göster"],
+        "description": (
+            "Bu araç, ismi ve namespace'i belirtilen tek bir deployment hakkında özet durum bilgisi sağlar."
+        ),
+        "method": "GET",
+        "path": "/deployments/show",
+        "parameters": [
+            {
+                "name": "deployment_name",
+                "in": "query",
+                "required": True,
+                "type": "string",
+                "description": "Detayları görüntülenecek deployment'ın tam adı."
             },
-            
-            "show_deployment": {
-                "summary": "Belirli bir deployment'ın genel durumunu ve üst düzey bilgilerini gösterir.",
-                "description": (
-                    "Bu araç, ismi ve namespace'i belirtilen tek bir deployment hakkında özet durum bilgisi sağlar."
-                ),
-                "method": "GET",
-                "path": "/deployments/show",
-                "parameters": [
-                    {
-                        "name": "deployment_name",
-                        "in": "query",
-                        "required": True,
-                        "type": "string",
-                        "description": "Detayları görüntülenecek deployment'ın tam adı."
-                    },
-                    {
-                        "name": "namespace",
-                        "in": "query", 
-                        "required": True,
-                        "type": "string",
-                        "description": "Deployment'ın bulunduğu namespace'in adı, örneğin 'default'."
-                    }
-                ]
+            {
+                "name": "namespace",
+                "in": "query", 
+                "required": True,
+                "type": "string",
+                "description": "Deployment'ın bulunduğu namespace'in adı, örneğin 'default'."
+            }
+        ]
+    },
+
+    "scale_deployment": {
+        "summary": "Bir deployment'ın replica sayısını değiştirir.",
+        "keywords": ["ölçekle", "pod sayısı", "replica", "artır", "azalt", "yap"],
+        "description": (
+            "Bu araç, bir deployment'ın pod sayısını (replica) belirtilen sayıya ayarlar. Bu işlem, uygulamayı "
+            "daha fazla trafik için büyütmek veya kaynak tasarrufu için küçültmek amacıyla kullanılır."
+        ),
+        "method": "POST",
+        "path": "/deployments/scale",
+        "parameters": [
+            {
+                "name": "deployment_name",
+                "in": "body",
+                "required": True,
+                "type": "string",
+                "description": "Ölçeklendirilecek deployment'ın adı."
             },
-            
-            "scale_deployment": {
-                "summary": "Bir deployment'ın replica sayısını değiştirir.",
-                "description": (
-                    "Bu araç, bir deployment'ın pod sayısını (replica) belirtilen sayıya ayarlar. Bu işlem, uygulamayı "
-                    "daha fazla trafik için büyütmek veya kaynak tasarrufu için küçültmek amacıyla kullanılır."
-                ),
-                "method": "POST",
-                "path": "/deployments/scale",
-                "parameters": [
-                    {
-                        "name": "deployment_name",
-                        "in": "body",
-                        "required": True,
-                        "type": "string",
-                        "description": "Ölçeklendirilecek deployment'ın adı."
-                    },
-                    {
-                        "name": "namespace",
-                        "in": "body",
-                        "required": True, 
-                        "type": "string",
-                        "description": "Deployment'ın bulunduğu namespace'in adı."
-                    },
-                    {
-                        "name": "replicas",
-                        "in": "body",
-                        "required": True,
-                        "type": "integer",
-                        "description": "Ulaşılması hedeflenen yeni replica sayısı. Örneğin: 3, 5, 10."
-                    }
-                ]
+            {
+                "name": "namespace",
+                "in": "body",
+                "required": True, 
+                "type": "string",
+                "description": "Deployment'ın bulunduğu namespace'in adı."
             },
-            
-            "redeploy_deployment": {
-                "summary": "Bir deployment'ı yeniden başlatarak çalışan tüm pod'ları yeniler.",
-                "description": (
-                    "Bu araç, bir deployment için 'rolling restart' işlemi tetikler. Mevcut pod'lar sırayla sonlandırılır "
-                    "ve yerlerine yenileri oluşturulur."
-                ),
-                "method": "POST",
-                "path": "/deployments/redeploy",
-                "parameters": [
-                    {
-                        "name": "deployment_name",
-                        "in": "body",
-                        "required": True,
-                        "type": "string",
-                        "description": "Yeniden dağıtılacak deployment'ın adı."
-                    },
-                    {
-                        "name": "namespace",
-                        "in": "body",
-                        "required": True,
-                        "type": "string", 
-                        "description": "Deployment'ın bulunduğu namespace'in adı."
-                    }
-                ]
+            {
+                "name": "replicas",
+                "in": "body",
+                "required": True,
+                "type": "integer",
+                "description": "Ulaşılması hedeflenen yeni replica sayısı. Örneğin: 3, 5, 10."
+            }
+        ]
+    },
+
+    "redeploy_deployment": {
+        "summary": "Bir deployment'ı yeniden başlatarak çalışan tüm pod'ları yeniler.",
+        "keywords": ["yeniden başlat", "restart", "redeploy"],
+        "description": (
+            "Bu araç, bir deployment için 'rolling restart' işlemi tetikler. Mevcut pod'lar sırayla sonlandırılır "
+            "ve yerlerine yenileri oluşturulur."
+        ),
+        "method": "POST",
+        "path": "/deployments/redeploy",
+        "parameters": [
+            {
+                "name": "deployment_name",
+                "in": "body",
+                "required": True,
+                "type": "string",
+                "description": "Yeniden dağıtılacak deployment'ın adı."
             },
-            
-            "get_deployment_config": {
-                "summary": "Bir deployment'ın tam ve detaylı YAML/JSON yapılandırmasını alır.",
-                "description": (
-                    "Bu araç, bir deployment'ın kaynak tanımının tamamını döndürür. Bu, kullanılan "
-                    "container imajı, ortam değişkenleri, volume bağlantıları, kaynak limitleri "
-                    "gibi tüm teknik ayarları içerir."
-                ),
-                "method": "GET",
-                "path": "/deployments/config",
-                "parameters": [
-                    {
-                        "name": "deployment_name",
-                        "in": "query",
-                        "required": True,
-                        "type": "string",
-                        "description": "Konfigürasyonu alınacak deployment'ın adı."
-                    },
-                    {
-                        "name": "namespace",
-                        "in": "query",
-                        "required": True,
-                        "type": "string",
-                        "description": "Deployment'ın bulunduğu namespace'in adı."
-                    }
-                ]
+            {
+                "name": "namespace",
+                "in": "body",
+                "required": True,
+                "type": "string", 
+                "description": "Deployment'ın bulunduğu namespace'in adı."
+            }
+        ]
+    },
+
+    "get_deployment_config": {
+        "summary": "Bir deployment'ın tam ve detaylı YAML/JSON yapılandırmasını alır.",
+        "keywords": ["config", "yaml", "yapılandırma", "manifest"],
+        "description": (
+            "Bu araç, bir deployment'ın kaynak tanımının tamamını döndürür. Bu, kullanılan "
+            "container imajı, ortam değişkenleri, volume bağlantıları, kaynak limitleri "
+            "gibi tüm teknik ayarları içerir."
+        ),
+        "method": "GET",
+        "path": "/deployments/config",
+        "parameters": [
+            {
+                "name": "deployment_name",
+                "in": "query",
+                "required": True,
+                "type": "string",
+                "description": "Konfigürasyonu alınacak deployment'ın adı."
             },
-            
-            "get_deployment_pods": {
-                "summary": "Belirli bir deployment tarafından yönetilen tüm pod'ları listeler.",
-                "description": (
-                    "Bu araç, belirtilen deployment'a ait olan ve şu anda çalışan veya çalışmaya çalışan tüm pod'ların "
-                    "bir listesini döndürür."
-                ),
-                "method": "GET",
-                "path": "/deployments/{deployment_name}/pods",
-                "parameters": [
-                    {
-                        "name": "namespace_name",
-                        "in": "query",
-                        "required": True,
-                        "type": "string",
-                        "description": "Deployment'ın ve pod'ların bulunduğu namespace'in adı."
-                    },
-                    {
-                        "name": "deployment_name",
-                        "in": "path",
-                        "required": True,
-                        "type": "string",
-                        "description": "Pod'ları listelenecek olan deployment'ın adı."
-                    }
-                ]
+            {
+                "name": "namespace",
+                "in": "query",
+                "required": True,
+                "type": "string",
+                "description": "Deployment'ın bulunduğu namespace'in adı."
+            }
+        ]
+    },
+
+    "get_deployment_pods": {
+        "summary": "Belirli bir deployment tarafından yönetilen tüm pod'ları listeler.",
+        "keywords": ["podlar", "pod listesi", "pod durumu"],
+        "description": (
+            "Bu araç, belirtilen deployment'a ait olan ve şu anda çalışan veya çalışmaya çalışan tüm pod'ların "
+            "bir listesini döndürür."
+        ),
+        "method": "GET",
+        "path": "/deployments/{deployment_name}/pods",
+        "parameters": [
+            {
+                "name": "namespace_name",
+                "in": "query",
+                "required": True,
+                "type": "string",
+                "description": "Deployment'ın ve pod'ların bulunduğu namespace'in adı."
             },
-            
-            "update_deployment_image": {
-                "summary": "Bir deployment'ın kullandığı container imajını günceller.",
-                "description": (
-                    "Bu araç, bir deployment'ın pod'larında çalışan uygulamanın container imajını yeni bir versiyonla "
-                    "değiştirmek için kullanılır."
-                ),
-                "method": "PATCH",
-                "path": "/deployments/image",
-                "parameters": [
-                    {
-                        "name": "deployment_name",
-                        "in": "body",
-                        "required": True,
-                        "type": "string",
-                        "description": "İmajı güncellenecek deployment'ın adı."
-                    },
-                    {
-                        "name": "namespace",
-                        "in": "body",
-                        "required": True,
-                        "type": "string",
-                        "description": "Deployment'ın bulunduğu namespace'in adı."
-                    },
-                    {
-                        "name": "image",
-                        "in": "body",
-                        "required": True,
-                        "type": "string",
-                        "description": "Kullanılacak yeni container imajının tam adı ve etiketi. Örneğin: 'harbor.bulut.ai/liman/app:v1.2'"
-                    }
-                ]
+            {
+                "name": "deployment_name",
+                "in": "path",
+                "required": True,
+                "type": "string",
+                "description": "Pod'ları listelenecek olan deployment'ın adı."
             }
-        }
\ No newline at end of file
+        ]
+    },
+
+    "update_deployment_image": {
+        "summary": "Bir deployment'ın kullandığı container imajını günceller.",
+        "keywords": ["imaj", "image", "versiyon", "sürüm", "tag"],
+        "description": (
+            "Bu araç, bir deployment'ın pod'larında çalışan uygulamanın container imajını yeni bir versiyonla "
+            "değiştirmek için kullanılır."
+        ),
+        "method": "PATCH",
+        "path": "/deployments/image",
+        "parameters": [
+            {
+                "name": "deployment_name",
+                "in": "body",
+                "required": True,
+                "type": "string",
+                "description": "İmajı güncellenecek deployment'ın adı."
+            },
+            {
+                "name": "namespace",
+                "in": "body",
+                "required": True,
+                "type": "string",
+                "description": "Deployment'ın bulunduğu namespace'in adı."
+            },
+            {
+                "name": "image",
+                "in": "body",
+                "required": True,
+                "type": "string",
+                "description": "Kullanılacak yeni container imajının tam adı ve etiketi. Örneğin: 'harbor.bulut.ai/liman/app:v1.2'"
+            }
+        ]
+    },
+
+    "bulk_scale_deployments": {
+        "summary": "Birden fazla deployment'ın replica sayısını tek seferde değiştirir.",
+        "keywords": ["toplu", "bütün", "hepsi", "ölçekle", "replica"],
+        "description": (
+            "Bu araç, isim listesiyle ya da namespace/isim deseni seçicisiyle belirlenen birden fazla deployment'ı "
+            "aynı replica sayısına ölçekler. İşlemler sınırlı eşzamanlılıkla paralel yürütülür ve her deployment için "
+            "ayrı sonuç döner. Örneğin: 'payments namespace'indeki tüm deployment'ları 0'a indir' veya "
+            "'api-* ile başlayan deployment'ları 3 replica yap'."
+        ),
+        "method": "POST",
+        "path": "/deployments/scale",
+        "parameters": [
+            {
+                "name": "replicas",
+                "in": "body",
+                "required": True,
+                "type": "integer",
+                "description": "Tüm hedef deployment'lar için ulaşılması hedeflenen replica sayısı."
+            },
+            {
+                "name": "deployment_names",
+                "in": "body",
+                "required": False,
+                "type": "array",
+                "description": "Ölçeklendirilecek deployment adlarının listesi. 'namespace/isim' formatı da kabul edilir."
+            },
+            {
+                "name": "namespace",
+                "in": "body",
+                "required": False,
+                "type": "string",
+                "description": "Sadece bu namespace'deki deployment'ları hedefler."
+            },
+            {
+                "name": "name_pattern",
+                "in": "body",
+                "required": False,
+                "type": "string",
+                "description": "Deployment adları için glob deseni. Örneğin: 'api-*'."
+            }
+        ]
+    },
+
+    "bulk_redeploy_deployments": {
+        "summary": "Birden fazla deployment'ı tek seferde yeniden başlatır (rolling restart).",
+        "keywords": ["toplu", "bütün", "hepsi", "yeniden başlat", "restart"],
+        "description": (
+            "Bu araç, isim listesiyle ya da namespace/isim deseni seçicisiyle belirlenen birden fazla deployment için "
+            "'rolling restart' tetikler. İşlemler sınırlı eşzamanlılıkla paralel yürütülür ve her deployment için "
+            "ayrı sonuç döner. Örneğin: 'frontend namespace'indeki bütün deployment'ları yeniden başlat'."
+        ),
+        "method": "POST",
+        "path": "/deployments/redeploy",
+        "parameters": [
+            {
+                "name": "deployment_names",
+                "in": "body",
+                "required": False,
+                "type": "array",
+                "description": "Yeniden başlatılacak deployment adlarının listesi. 'namespace/isim' formatı da kabul edilir."
+            },
+            {
+                "name": "namespace",
+                "in": "body",
+                "required": False,
+                "type": "string",
+                "description": "Sadece bu namespace'deki deployment'ları hedefler."
+            },
+            {
+                "name": "name_pattern",
+                "in": "body",
+                "required": False,
+                "type": "string",
+                "description": "Deployment adları için glob deseni. Örneğin: 'worker-*'."
+            }
+        ]
+    }
+}
+
+DEPLOYMENT_TOOLS = tool_registry.register("deployment", DEPLOYMENT_TOOL_SPECS, DeploymentAPITools)
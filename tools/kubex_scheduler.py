@@ -0,0 +1,197 @@
+import time
+import logging
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Optional, Tuple
+
+from cancellation import CancellationToken, RequestCancelled, current_cancel_token
+
+logger = logging.getLogger(__name__)
+
+# Adil kuyruk için isteği yapan kullanıcı oturumunun anahtarı (AgentManager tarafından ayarlanır)
+current_session_key: ContextVar[str] = ContextVar("kubex_session_key", default="default")
+
+# Kubex tarafında ağır çalışan uç noktalar (cluster'a bağlanan / Helm çalıştıran)
+HEAVY_ENDPOINT_MARKERS = (
+    "/deployments/config",
+    "/install",
+    "/update",
+    "/summary",
+)
+
+# Uç nokta sınıfı -> (başlangıç limiti, en düşük limit, en yüksek limit, hedef gecikme sn)
+ENDPOINT_CLASS_LIMITS: Dict[str, Tuple[float, int, int, float]] = {
+    "light": (8.0, 1, 16, 2.0),
+    "heavy": (2.0, 1, 4, 15.0),
+}
+
+
+def classify_endpoint(method: str, url: str) -> str:
+    """İsteği 'heavy' veya 'light' uç nokta sınıfına ayırır"""
+    if any(marker in url for marker in HEAVY_ENDPOINT_MARKERS):
+        return "heavy"
+    return "light"
+
+
+class _Waiter:
+    def __init__(self):
+        self.event = threading.Event()
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+
+
+class AdaptiveLimiter:
+    """AIMD ile ayarlanan eşzamanlılık limiti ve oturumlar arası round-robin adil kuyruk"""
+
+    def __init__(self, initial_limit: float, min_limit: int, max_limit: int, latency_target: float):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._last_decrease = 0.0
+
+        self._completed = 0
+        self._overloads = 0
+        self._waited = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _queue_depth_locked(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def acquire(self, session_key: str, cancel_token: Optional[CancellationToken] = None) -> float:
+        """Slot alınana kadar bekler; kuyrukta geçen süreyi döndürür. Token iptal edilirse kuyruktan çıkar"""
+        with self._lock:
+            if self._in_flight < int(self.limit) and not self._queues:
+                self._in_flight += 1
+                return 0.0
+            waiter = _Waiter()
+            self._queues.setdefault(session_key, deque()).append(waiter)
+
+        unregister = cancel_token.on_cancel(waiter.event.set) if cancel_token else None
+        waiter.event.wait()
+        if unregister:
+            unregister()
+        waited = time.monotonic() - waiter.enqueued_at
+        with self._lock:
+            if not waiter.granted:
+                self._remove_waiter_locked(session_key, waiter)
+                raise RequestCancelled(cancel_token.reason)
+            self._waited += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+        return waited
+
+    def _remove_waiter_locked(self, session_key: str, waiter: _Waiter):
+        queue = self._queues.get(session_key)
+        if queue is None:
+            return
+        try:
+            queue.remove(waiter)
+        except ValueError:
+            pass
+        if not queue:
+            del self._queues[session_key]
+
+    def release(self, latency: float, status_code: Optional[int], cancelled: bool = False):
+        """Slotu bırakır ve gözlenen gecikme / durum koduna göre limiti günceller; iptal edilen istek limiti etkilemez"""
+        if cancelled:
+            with self._lock:
+                self._in_flight -= 1
+                self._dispatch_locked()
+            return
+
+        overloaded = status_code is None or status_code == 429 or status_code >= 500 \
+            or latency > self.latency_target
+        now = time.monotonic()
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+            if overloaded:
+                self._overloads += 1
+                # Aynı aşırı yük dalgasında birden fazla kez yarıya inmeyi önle
+                if now - self._last_decrease > self.latency_target:
+                    self.limit = max(float(self.min_limit), self.limit / 2)
+                    self._last_decrease = now
+                    logger.warning(f"[KubexScheduler] Limit düşürüldü -> {self.limit:.1f}")
+            else:
+                self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+            self._dispatch_locked()
+
+    def _dispatch_locked(self):
+        while self._queues and self._in_flight < int(self.limit):
+            session_key, queue = next(iter(self._queues.items()))
+            waiter = queue.popleft()
+            del self._queues[session_key]
+            if queue:
+                # Oturumu sıranın sonuna at: her oturum sırayla bir istek gönderir
+                self._queues[session_key] = queue
+            self._in_flight += 1
+            waiter.granted = True
+            waiter.event.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self._in_flight,
+                "queue_depth": self._queue_depth_locked(),
+                "queued_sessions": len(self._queues),
+                "completed": self._completed,
+                "overloads": self._overloads,
+                "waited_requests": self._waited,
+                "avg_wait_seconds": round(self._total_wait / self._waited, 3) if self._waited else 0.0,
+                "max_wait_seconds": round(self._max_wait, 3),
+            }
+
+
+class KubexScheduler:
+    """Kubex çağrıları için cluster ve uç nokta sınıfı bazında istemci tarafı zamanlayıcı"""
+
+    def __init__(self, class_limits: Optional[Dict[str, Tuple[float, int, int, float]]] = None):
+        self.class_limits = class_limits or ENDPOINT_CLASS_LIMITS
+        self._limiters: Dict[Tuple[str, str], AdaptiveLimiter] = {}
+        self._lock = threading.Lock()
+
+    def _limiter(self, cluster_id: str, endpoint_class: str) -> AdaptiveLimiter:
+        key = (str(cluster_id), endpoint_class)
+        with self._lock:
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                limiter = AdaptiveLimiter(*self.class_limits[endpoint_class])
+                self._limiters[key] = limiter
+            return limiter
+
+    @contextmanager
+    def slot(self, cluster_id: Optional[str], method: str, url: str):
+        """Bir Kubex isteği için slot ayırır; çağıran, yanıt durum kodunu outcome'a yazar.
+
+        Aktif isteğin iptal token'ı iptal edilirse kuyrukta bekleyen çağrı gönderilmeden RequestCancelled fırlatır.
+        """
+        limiter = self._limiter(cluster_id or "global", classify_endpoint(method, url))
+        cancel_token = current_cancel_token.get()
+        limiter.acquire(current_session_key.get(), cancel_token)
+        outcome = {"status_code": None}
+        started = time.monotonic()
+        try:
+            if cancel_token is not None and cancel_token.cancelled:
+                outcome["cancelled"] = True
+                cancel_token.raise_if_cancelled()
+            yield outcome
+        finally:
+            limiter.release(time.monotonic() - started, outcome["status_code"], outcome.get("cancelled", False))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {f"{cluster}/{cls}": limiter.stats() for (cluster, cls), limiter in limiters.items()}
+
+
+# Süreç genelinde tüm KubexSession'lar tarafından paylaşılır
+kubex_scheduler = KubexScheduler()
@@ -0,0 +1,117 @@
+import copy
+import json
+import requests
+from urllib.parse import urlsplit
+from typing import Any, Callable, Dict, Optional
+
+from tools.single_flight import kubex_single_flight
+from tools.kubex_scheduler import kubex_scheduler, classify_endpoint
+from cancellation import RequestCancelled, raise_if_cancelled
+from resilience import resilience, endpoint_keys
+from tracing import tracer, current_span
+
+
+class KubexSession(requests.Session):
+    """Kubex API çağrıları için ortak HTTP oturumu.
+
+    Eşzamanlı ve birebir aynı GET isteklerini (method + URL + params) süreç genelinde
+    tek bir uçuştaki isteğe bağlar; sonuç tüm bekleyenlerle paylaşılır. Gerçekten
+    gönderilen her istek, cluster ve uç nokta sınıfı bazındaki zamanlayıcıdan slot alır.
+    İstekler ortak dayanıklılık katmanından geçer: araçların verdiği timeout üst sınırdır, GET'lerin okuma
+    süresi gözlenen gecikmeden türetilir ve bağlantı hatalarında tekrar denenir; Kubex çöktüğünde açılan
+    devre kesici çağrıları beklemeden CircuitOpenError (requests.ConnectionError) ile reddeder.
+    İptal edilmiş bir isteğin henüz gönderilmemiş çağrıları RequestCancelled ile sonlanır.
+    """
+
+    __attrs__ = requests.Session.__attrs__ + ["cluster_id_provider"]
+
+    def __init__(self, cluster_id_provider: Optional[Callable[[], Any]] = None):
+        super().__init__()
+        self.cluster_id_provider = cluster_id_provider
+
+    def bound_to(self, cluster_id_provider: Callable[[], Any]) -> "KubexSession":
+        """Aynı bağlantı havuzunu paylaşan, farklı cluster kaynağına bağlı bir kopya döndürür"""
+        clone = copy.copy(self)
+        clone.cluster_id_provider = cluster_id_provider
+        return clone
+
+    def _cluster_id(self, kwargs: Dict[str, Any]) -> Optional[str]:
+        for key in ("params", "json"):
+            payload = kwargs.get(key)
+            if isinstance(payload, dict) and payload.get("cluster_id") is not None:
+                return str(payload["cluster_id"])
+        if self.cluster_id_provider:
+            return str(self.cluster_id_provider())
+        return None
+
+    @staticmethod
+    def _single_flight_key(method: str, url: str, params: Optional[Dict[str, Any]]) -> str:
+        params_key = json.dumps(params or {}, sort_keys=True, default=str)
+        return f"{method.upper()} {url} {params_key}"
+
+    def _send_scheduled(self, method, url, **kwargs):
+        cluster_id = self._cluster_id(kwargs)
+        ceiling = kwargs.pop("timeout", None)
+        headers = kwargs.pop("headers", None)
+        endpoint_class = classify_endpoint(method, url)
+        breaker_key, timeout_key = endpoint_keys("kubex", method, url, endpoint_class, cluster_id=cluster_id)
+        parent = current_span.get()
+        tool = parent.attributes.get("tool") if parent is not None and parent.name == "tool" else None
+
+        with tracer.span("kubex.http", **{"http.method": method.upper(), "http.route": urlsplit(url).path,
+                                          "cluster.id": cluster_id, "endpoint.class": endpoint_class,
+                                          "tool": tool}) as span:
+            attempts = []
+
+            def send(timeout):
+                attempts.append(timeout)
+                # Tekrar denemeler arasındaki bekleme slot tutulmadan yapılır
+                with kubex_scheduler.slot(cluster_id, method, url) as outcome:
+                    # Trace kimliği Kubex API'ye W3C traceparent başlığıyla iletilir
+                    response = super(KubexSession, self).request(
+                        method, url, timeout=timeout, headers=tracer.inject_headers(headers), **kwargs
+                    )
+                    outcome["status_code"] = response.status_code
+                    return response
+
+            try:
+                response = resilience.call(breaker_key, timeout_key, send, idempotent=method.upper() == "GET",
+                                           timeout=ceiling, record_latency=not kwargs.get("stream"))
+            finally:
+                span.set_attribute("attempts", len(attempts))
+            span.set_attribute("http.status_code", response.status_code)
+            if response.status_code >= 500:
+                span.set_error(f"HTTP {response.status_code}")
+            return response
+
+    def request(self, method, url, *args, **kwargs):
+        raise_if_cancelled()
+        if args:
+            return super().request(method, url, *args, **kwargs)
+
+        # Sadece idempotent ve tamamen okunmuş (stream olmayan) yanıtlar paylaşılabilir
+        if method.upper() != "GET" or kwargs.get("stream"):
+            return self._send_scheduled(method, url, **kwargs)
+
+        key = self._single_flight_key(method, url, kwargs.get("params"))
+        while True:
+            try:
+                return kubex_single_flight.do(key, lambda: self._send_scheduled(method, url, **kwargs))
+            except RequestCancelled:
+                # Paylaşılan çağrının sahibi iptal edildi; bu istek iptal edilmediyse çağrıyı kendisi gönderir
+                raise_if_cancelled()
+
+
+def get_single_flight_stats() -> Dict[str, int]:
+    """Kubex single-flight sayaçlarını döndürür ('saved' = paylaşılarak kazanılan çağrı sayısı)"""
+    return kubex_single_flight.stats()
+
+
+def get_scheduler_stats() -> Dict[str, Dict[str, Any]]:
+    """Cluster/uç nokta sınıfı bazında limit, kuyruk derinliği ve bekleme süresi metriklerini döndürür"""
+    return kubex_scheduler.stats()
+
+
+def get_resilience_stats() -> Dict[str, Any]:
+    """Devre kesici durumları, uyarlanır zaman aşımları ve tekrar deneme sayısını döndürür"""
+    return resilience.stats()
@@ -2,6 +2,8 @@ import requests
 import logging
 from typing import Dict, Any, List
 
+from tools.kubex_session import KubexSession
+
 logger = logging.getLogger(__name__)
 
 class NamespaceAPITools:
@@ -9,7 +11,7 @@ class NamespaceAPITools:
     
     def __init__(self, base_url: str,active_cluster_id):
         self.base_url = base_url.rstrip('/')
-        self.session = requests.Session()
+        self.session = KubexSession(cluster_id_provider=lambda: self.active_cluster_id)
         self.active_cluster_id = active_cluster_id
         
     def list_namespaces(self) -> Dict[str, Any]:
@@ -0,0 +1,236 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+import requests
+from typing import Dict, Any, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# OpenAPI dokümanının yeri: yerel dosya yolu veya URL (örn. http://10.67.67.195:8000/openapi.json)
+OPENAPI_SPEC_ENV = "KUBEX_OPENAPI_SPEC"
+
+# Yazma yapan (GET dışı) uç noktalardan araç üretilmesine izin verilen araç adları, virgülle ayrılmış
+OPENAPI_WRITE_TOOLS_ENV = "KUBEX_OPENAPI_WRITE_TOOLS"
+
+# Okunamayan doküman bu süre dolmadan yeniden denenmez
+LOAD_RETRY_SECONDS = 30.0
+
+# Path'in ilk segmenti -> agent kategorisi
+PATH_PREFIX_CATEGORIES = {
+    "clusters": "cluster",
+    "namespaces": "namespace",
+    "deployments": "deployment",
+    "repositories": "repository",
+}
+
+HTTP_METHODS = ("get", "post", "put", "patch", "delete")
+
+# Varsayılan olarak yalnızca okuma uç noktaları araç olur; diğerleri açık izin listesi gerektirir
+DEFAULT_GENERATED_METHODS = ("get",)
+
+OPENAPI_TYPES = {
+    "string": "string",
+    "integer": "integer",
+    "number": "number",
+    "boolean": "boolean",
+    "array": "array",
+    "object": "object",
+}
+
+_document_cache: Dict[str, Dict[str, Any]] = {}
+_failed_at: Dict[str, float] = {}
+_loading: Set[str] = set()
+_document_lock = threading.Lock()
+
+
+def normalize_path(path: str) -> str:
+    """Path parametre adlarını yok sayarak karşılaştırma için normalleştirir"""
+    return re.sub(r"\{[^}]+\}", "{}", path.rstrip("/"))
+
+
+def _load_document(location: str) -> Optional[Dict[str, Any]]:
+    """OpenAPI dokümanını dosyadan veya URL'den bir kez okur; okunamazsa None döner.
+
+    Okuma kilit dışında yapılır: başka bir thread okurken veya son hatadan sonra LOAD_RETRY_SECONDS dolmadan
+    beklemeden None döner. Sadece başarılı okuma cache'lenir.
+    """
+    with _document_lock:
+        if location in _document_cache:
+            return _document_cache[location]
+        failed_at = _failed_at.get(location)
+        if location in _loading or (failed_at is not None and time.monotonic() - failed_at < LOAD_RETRY_SECONDS):
+            return None
+        _loading.add(location)
+
+    document = None
+    try:
+        if re.match(r"^https?://", location):
+            response = requests.get(location, timeout=10)
+            response.raise_for_status()
+            document = response.json()
+        else:
+            with open(location, encoding="utf-8") as f:
+                document = json.load(f)
+        print(f"[OpenAPICatalog] OpenAPI dokümanı yüklendi: {location}")
+    except (requests.exceptions.RequestException, OSError, ValueError) as e:
+        logger.error(f"[OpenAPICatalog] OpenAPI dokümanı okunamadı ({location}): {e}")
+    finally:
+        with _document_lock:
+            _loading.discard(location)
+            if document is None:
+                _failed_at[location] = time.monotonic()
+            else:
+                _document_cache[location] = document
+                _failed_at.pop(location, None)
+    return document
+
+
+def _resolve(schema: Dict[str, Any], document: Dict[str, Any], depth: int = 0) -> Dict[str, Any]:
+    """'$ref' ve tek elemanlı allOf sarmalayıcılarını çözer"""
+    if depth > 5 or not isinstance(schema, dict):
+        return schema or {}
+    if "$ref" in schema:
+        target: Any = document
+        for part in schema["$ref"].lstrip("#/").split("/"):
+            target = target.get(part, {}) if isinstance(target, dict) else {}
+        return _resolve(target, document, depth + 1)
+    if len(schema.get("allOf", [])) == 1:
+        return _resolve(schema["allOf"][0], document, depth + 1)
+    return schema
+
+
+def _tool_name(operation: Dict[str, Any], method: str, path: str) -> str:
+    operation_id = operation.get("operationId")
+    if operation_id:
+        # FastAPI varsayılan operationId'si: <fonksiyon>_<path>_<method>
+        suffix = re.sub(r"\W", "_", path) + "_" + method
+        if operation_id.endswith(suffix) and len(operation_id) > len(suffix):
+            operation_id = operation_id[:-len(suffix)]
+        return re.sub(r"\W+", "_", operation_id).strip("_").lower()
+    return re.sub(r"\W+", "_", f"{method}_{path}").strip("_").lower()
+
+
+def _operation_parameters(operation: Dict[str, Any], path_item: Dict[str, Any], document: Dict[str, Any]) -> List[Dict[str, Any]]:
+    parameters = []
+    for raw in path_item.get("parameters", []) + operation.get("parameters", []):
+        param = _resolve(raw, document)
+        if param.get("in") not in ("path", "query"):
+            continue
+        schema = _resolve(param.get("schema", {}), document)
+        parameters.append({
+            "name": param["name"],
+            "in": param["in"],
+            "required": bool(param.get("required", param["in"] == "path")),
+            "type": OPENAPI_TYPES.get(schema.get("type"), "string"),
+            "description": param.get("description") or schema.get("title") or param["name"]
+        })
+
+    body = _resolve(operation.get("requestBody", {}), document)
+    body_schema = _resolve(body.get("content", {}).get("application/json", {}).get("schema", {}), document)
+    required_fields = set(body_schema.get("required", []))
+    for name, prop in body_schema.get("properties", {}).items():
+        prop = _resolve(prop, document)
+        parameters.append({
+            "name": name,
+            "in": "body",
+            "required": name in required_fields,
+            "type": OPENAPI_TYPES.get(prop.get("type"), "string"),
+            "description": prop.get("description") or prop.get("title") or name
+        })
+    return parameters
+
+
+def write_allowlist() -> Set[str]:
+    """GET dışı uç noktalarından araç üretilecek araç adları (KUBEX_OPENAPI_WRITE_TOOLS)"""
+    return {name.strip() for name in os.environ.get(OPENAPI_WRITE_TOOLS_ENV, "").split(",") if name.strip()}
+
+
+def generated_tool_specs(category: str, location: Optional[str] = None,
+                         allowed_writes: Optional[Set[str]] = None) -> Optional[Dict[str, Dict[str, Any]]]:
+    """OpenAPI dokümanından verilen kategoriye ait araç tanımlarını üretir.
+
+    GET uç noktaları her zaman, yazma uç noktaları yalnızca araç adı izin listesindeyse üretilir.
+    Doküman ayarlı ama (henüz) okunamadıysa None döner; çağıran daha sonra tekrar dener.
+    """
+    location = location or os.environ.get(OPENAPI_SPEC_ENV)
+    if not location:
+        return {}
+    document = _load_document(location)
+    if document is None:
+        return None
+    allowed_writes = write_allowlist() if allowed_writes is None else allowed_writes
+
+    specs: Dict[str, Dict[str, Any]] = {}
+    for path, path_item in document.get("paths", {}).items():
+        prefix = path.strip("/").split("/")[0]
+        if PATH_PREFIX_CATEGORIES.get(prefix) != category:
+            continue
+        for method in HTTP_METHODS:
+            operation = path_item.get(method)
+            if not operation or operation.get("deprecated"):
+                continue
+            name = _tool_name(operation, method, path)
+            if method not in DEFAULT_GENERATED_METHODS and name not in allowed_writes:
+                continue
+            summary = operation.get("summary") or f"{method.upper()} {path}"
+            specs[name] = {
+                "summary": summary,
+                "description": operation.get("description") or summary,
+                "method": method.upper(),
+                "path": path,
+                "parameters": _operation_parameters(operation, path_item, document),
+                "generated": True
+            }
+    return specs
+
+
+def call_operation(api: Any, spec: Dict[str, Any], **parameters: Any) -> Dict[str, Any]:
+    """Üretilmiş bir araç tanımını, agent'ın API nesnesinin oturumu üzerinden HTTP isteğine çevirir"""
+    params_by_location: Dict[str, Dict[str, Any]] = {"path": {}, "query": {}, "body": {}}
+    for param in spec["parameters"]:
+        name = param["name"]
+        if name in parameters:
+            params_by_location[param["in"]][name] = parameters[name]
+        elif name == "cluster_id":
+            params_by_location[param["in"]][name] = api.active_cluster_id
+
+    try:
+        path = spec["path"].format(**params_by_location["path"])
+    except KeyError as e:
+        return {"status": "error", "message": f"Eksik path parametresi: {e}", "cluster_id": api.active_cluster_id}
+
+    url = f"{api.base_url}{path}"
+    print(f"[OpenAPICatalog] {spec['method']} {url}")
+    try:
+        response = api.session.request(
+            spec["method"],
+            url,
+            params=params_by_location["query"] or None,
+            json=params_by_location["body"] or None,
+            timeout=30
+        )
+        response.raise_for_status()
+        data = response.json() if response.content else None
+        return {
+            "status": "success",
+            "cluster_id": api.active_cluster_id,
+            "data": data,
+            "message": f"{spec['summary']} işlemi başarılı"
+        }
+    except requests.exceptions.RequestException as e:
+        logger.error(f"[OpenAPICatalog] İstek başarısız ({spec['method']} {url}): {e}")
+        return {
+            "status": "error",
+            "message": f"{spec['summary']} işlemi başarısız: {str(e)}",
+            "cluster_id": api.active_cluster_id
+        }
+    except ValueError:
+        return {
+            "status": "success",
+            "cluster_id": api.active_cluster_id,
+            "data": response.text,
+            "message": f"{spec['summary']} işlemi başarılı"
+        }
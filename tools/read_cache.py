@@ -0,0 +1,102 @@
+import json
+import time
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+# Cache'te tutulacak okuma sonuçları için varsayılan ömür (saniye)
+READ_CACHE_TTL_SECONDS = 15.0
+
+_MISSING = object()
+
+
+def is_cacheable_tool(spec: Dict[str, Any]) -> bool:
+    """Tanımında açıkça "cacheable": True olan, GET ile çalışan ve cluster_id dışında zorunlu parametresi olmayan araç mı?
+
+    Bellekteki veriyi okuyan araçlar (iş durumu, sağlık kontrolü) bu işareti taşımaz; önbelleğe alınmaz ve önden çalıştırılmaz.
+    """
+    if spec.get("cacheable") is not True or spec.get("method") != "GET":
+        return False
+    return not any(
+        p.get("required") and p.get("name") != "cluster_id"
+        for p in spec.get("parameters", [])
+    )
+
+
+def is_cacheable_result(result: Any) -> bool:
+    return not (isinstance(result, dict) and result.get("status") == "error")
+
+
+class ToolReadCache:
+    """Parametresiz okuma araçlarının sonuçlarını cluster bazında kısa süreli saklar.
+
+    Aynı cluster'da yazma yapan bir araç çalıştığında o cluster'ın tüm kayıtları silinir.
+    """
+
+    def __init__(self, ttl: float = READ_CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, str, str, str], Tuple[float, Any]] = {}
+        # cluster -> yazma sayacı; okuma sürerken yazma olduysa sonuç cache'e yazılmaz
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    @staticmethod
+    def make_key(category: str, cluster_id: Any, tool_name: str, parameters: Optional[Dict[str, Any]] = None):
+        params_key = json.dumps(parameters or {}, sort_keys=True, default=str)
+        return (category, str(cluster_id), tool_name, params_key)
+
+    def get(self, key) -> Any:
+        """Geçerli kayıt varsa sonucu, yoksa None döndürür"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and entry[0] > now:
+                self._hits += 1
+                return entry[1]
+            if entry is not _MISSING:
+                del self._entries[key]
+            self._misses += 1
+            return None
+
+    def peek(self, key) -> bool:
+        """Sayaçları etkilemeden geçerli kayıt var mı bakar"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[0] > time.monotonic()
+
+    def generation(self, cluster_id: Any) -> int:
+        with self._lock:
+            return self._generations.get(str(cluster_id), 0)
+
+    def put(self, key, result: Any, generation: Optional[int] = None):
+        if not is_cacheable_result(result):
+            return
+        with self._lock:
+            if generation is not None and generation != self._generations.get(key[1], 0):
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, result)
+
+    def invalidate_cluster(self, cluster_id: Any):
+        cluster_id = str(cluster_id)
+        with self._lock:
+            self._generations[cluster_id] = self._generations.get(cluster_id, 0) + 1
+            stale = [k for k in self._entries if k[1] == cluster_id]
+            for k in stale:
+                del self._entries[k]
+            if stale:
+                self._invalidations += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "invalidations": self._invalidations
+            }
+
+
+# Süreç genelinde tüm agent'lar tarafından paylaşılır
+tool_read_cache = ToolReadCache()
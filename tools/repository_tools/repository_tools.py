@@ -1,7 +1,13 @@
+import copy
 import requests
 import logging
 from typing import Dict, Any, List, Optional
 
+from job_manager import get_job_manager, Job
+from tools.kubex_session import KubexSession
+from tools.read_cache import tool_read_cache
+from tools.resource_index import resource_index
+
 logger = logging.getLogger(__name__)
 
 class RepositoryAPITools:
@@ -9,9 +15,31 @@ class RepositoryAPITools:
     
     def __init__(self, base_url: str, active_cluster_id):
         self.base_url = base_url.rstrip('/')
-        self.session = requests.Session()
+        self.session = KubexSession(cluster_id_provider=lambda: self.active_cluster_id)
         self.active_cluster_id = active_cluster_id
-        
+        self.job_manager = get_job_manager()
+
+    def _submit_job(self, operation: str, func_name: str, description: str, **kwargs) -> Dict[str, Any]:
+        """Uzun süren bir işlemi, o anki cluster'a sabitlenmiş bir kopya üzerinden arka plana gönderir"""
+        if not self.active_cluster_id or self.active_cluster_id == "None":
+            return {"status": "error", "message": "Aktif cluster seçilmedi. Lütfen önce bir cluster seçin."}
+        # Kullanıcı iş bitmeden cluster değiştirirse iş yanlış cluster'a gitmesin
+        pinned = copy.copy(self)
+        pinned.session = self.session.bound_to(lambda: pinned.active_cluster_id)
+        return self.job_manager.submit(
+            self.active_cluster_id,
+            operation,
+            getattr(pinned, func_name),
+            description=description,
+            on_finish=pinned._invalidate_reads,
+            **kwargs
+        )
+
+    def _invalidate_reads(self, job: Job):
+        """İş bitince bu cluster için saklanan okuma sonuçları ve isim envanteri artık eski"""
+        tool_read_cache.invalidate_cluster(job.cluster_id)
+        resource_index.invalidate(self.base_url, job.cluster_id)
+
     def list_repositories(self) -> Dict[str, Any]:
         """Belirtilen cluster'daki tüm Helm repository'lerini listeler"""
         try:
@@ -151,6 +179,10 @@ class RepositoryAPITools:
             }
     
     def update_repositories(self) -> Dict[str, Any]:
+        """Repository güncellemesini arka plan işi olarak başlatır ve hemen döner"""
+        return self._submit_job("update_repositories", "_update_repositories_sync", "Helm repository güncellemesi")
+
+    def _update_repositories_sync(self) -> Dict[str, Any]:
         """Cluster'daki tüm Helm repository'lerini günceller"""
         try:
             url = f"{self.base_url}/repositories/{self.active_cluster_id}/update"
@@ -177,6 +209,18 @@ class RepositoryAPITools:
             }
     
     def install_chart(self, **kwargs) -> Dict[str, Any]:
+        """Chart kurulumunu arka plan işi olarak başlatır ve hemen döner"""
+        chart = kwargs.get('chart')
+        name = kwargs.get('name')
+        namespace = kwargs.get('namespace')
+        return self._submit_job(
+            "install_chart",
+            "_install_chart_sync",
+            f"'{chart}' chart kurulumu ({namespace}/{name})",
+            **kwargs
+        )
+
+    def _install_chart_sync(self, **kwargs) -> Dict[str, Any]:
         """Helm chart'ı cluster'a yükler"""
         try:
             # Extract required parameters
@@ -270,4 +314,29 @@ class RepositoryAPITools:
                 "status": "error",
                 "message": f"Helm servisi yanıt vermiyor: {str(e)}",
                 "healthy": False
-            }
\ No newline at end of file
+            }
+
+    def get_job_status(self, job_id: Optional[str] = None) -> Dict[str, Any]:
+        """Arka plan işinin durumunu veya aktif cluster'daki son işleri döndürür"""
+        if job_id:
+            job = self.job_manager.get_job(str(job_id).strip(), cluster_id=self.active_cluster_id)
+            if not job:
+                return {
+                    "status": "error",
+                    "message": f"'{job_id}' ID'li arka plan işi bulunamadı",
+                    "job_id": job_id
+                }
+            return {
+                "status": "success",
+                "job": job.to_dict(),
+                "message": f"'{job.job_id}' işinin durumu: {job.status.value}"
+            }
+
+        jobs = self.job_manager.list_jobs(cluster_id=self.active_cluster_id)[:10]
+        return {
+            "status": "success",
+            "cluster_id": self.active_cluster_id,
+            "job_count": len(jobs),
+            "jobs": [j.to_dict() for j in jobs],
+            "message": f"Bu cluster için {len(jobs)} arka plan işi bulundu"
+        }
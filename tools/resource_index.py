@@ -0,0 +1,226 @@
+import time
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Envanterin yeniden yüklenmeden kullanılabileceği süre (saniye)
+INVENTORY_TTL_SECONDS = 60.0
+# Bulunamayan bir isim için envanter en az bu kadar eskiyse bir kez tazelenir
+REFRESH_ON_MISS_AGE_SECONDS = 10.0
+# Yükleme başarısız olursa bu süre boyunca yeniden denenmez; her istek Kubex'e tekrar yüklenmez
+LOAD_FAILURE_BACKOFF_SECONDS = 15.0
+
+# Otomatik düzeltme eşikleri: benzerlik (1 - düzenleme mesafesi / uzunluk) ve ikinci adaya fark
+MIN_CORRECTION_SIMILARITY = 0.7
+MIN_CORRECTION_MARGIN = 0.1
+MAX_EDIT_DISTANCE = 2
+
+# Parametre adı -> kaynak türü (araç tanımında parametreye "resource" verilerek değiştirilebilir)
+DEFAULT_PARAM_RESOURCES = {
+    "deployment_name": "deployment",
+    "namespace": "namespace",
+    "namespace_name": "namespace",
+    "repository_name": "repository",
+}
+
+
+def resource_kind(param_spec: Dict[str, Any]) -> Optional[str]:
+    """Parametrenin işaret ettiği kaynak türü ("deployment", "namespace", "repository") veya None"""
+    if "resource" in param_spec:
+        return param_spec["resource"]
+    return DEFAULT_PARAM_RESOURCES.get(param_spec.get("name"))
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Yer değiştirmeyi (ngnix/nginx) tek hata sayan Damerau-Levenshtein (OSA) mesafesi"""
+    previous_previous: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i]
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous_previous[j - 2] + 1)
+            current.append(value)
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+class NameMatcher:
+    """İsim listesi üzerinde trigram aday filtresi + düzenleme mesafesi ile bulanık eşleme"""
+
+    def __init__(self, names: Iterable[str]):
+        self.names = sorted(set(names))
+        self._by_lower = {n.lower(): n for n in self.names}
+        self._postings: Dict[str, Set[str]] = {}
+        for name in self.names:
+            for gram in _trigrams(name):
+                self._postings.setdefault(gram, set()).add(name)
+
+    def candidates(self, query: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """(isim, benzerlik) listesini azalan benzerlikle döndürür"""
+        grams = _trigrams(query)
+        shared: Dict[str, int] = {}
+        for gram in grams:
+            for name in self._postings.get(gram, ()):
+                shared[name] = shared.get(name, 0) + 1
+
+        scored = []
+        for name, count in shared.items():
+            if count / len(grams) < 0.2:
+                continue
+            distance = edit_distance(query.lower(), name.lower())
+            scored.append((name, 1 - distance / max(len(query), len(name)), distance))
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return [(name, similarity) for name, similarity, _ in scored[:limit]]
+
+    def resolve(self, query: str) -> Tuple[Optional[str], List[str]]:
+        """Tam eşleşme veya tek ve yeterince yakın aday varsa ismi, yoksa None + adayları döndürür"""
+        exact = self._by_lower.get(query.lower())
+        if exact:
+            return exact, [exact]
+
+        candidates = self.candidates(query)
+        if not candidates:
+            return None, []
+        best, best_similarity = candidates[0]
+        runner_up = candidates[1][1] if len(candidates) > 1 else 0.0
+        if (best_similarity >= MIN_CORRECTION_SIMILARITY
+                and best_similarity - runner_up >= MIN_CORRECTION_MARGIN
+                and edit_distance(query.lower(), best.lower()) <= MAX_EDIT_DISTANCE):
+            return best, [name for name, _ in candidates]
+        return None, [name for name, _ in candidates]
+
+
+@dataclass
+class ResourceInventory:
+    """Tek bir cluster'ın isim envanteri"""
+    deployments: Dict[str, Set[str]] = field(default_factory=dict)  # deployment adı -> namespace'ler
+    namespaces: List[str] = field(default_factory=list)
+    repositories: List[str] = field(default_factory=list)
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    def __post_init__(self):
+        self._matchers: Dict[str, NameMatcher] = {}
+
+    def names(self, kind: str) -> List[str]:
+        if kind == "deployment":
+            return sorted(self.deployments)
+        if kind == "namespace":
+            return sorted(set(self.namespaces) | {ns for nss in self.deployments.values() for ns in nss})
+        if kind == "repository":
+            return sorted(self.repositories)
+        return []
+
+    def matcher(self, kind: str) -> NameMatcher:
+        matcher = self._matchers.get(kind)
+        if matcher is None:
+            matcher = self._matchers[kind] = NameMatcher(self.names(kind))
+        return matcher
+
+    def namespaces_for(self, deployment_name: str) -> List[str]:
+        return sorted(self.deployments.get(deployment_name, ()))
+
+    def deployments_in(self, namespace: Optional[str] = None) -> List[str]:
+        return sorted(name for name, nss in self.deployments.items() if namespace is None or namespace in nss)
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.loaded_at
+
+
+def build_inventory(deployment_records: Any, namespaces: Any, repositories: Any) -> ResourceInventory:
+    """Kubex yanıtlarından (eksik olabilir) envanter oluşturur"""
+    deployments: Dict[str, Set[str]] = {}
+    for record in deployment_records or []:
+        if isinstance(record, dict) and record.get("name"):
+            deployments.setdefault(record["name"], set()).add(record.get("namespace") or "default")
+
+    namespace_names = []
+    for item in namespaces or []:
+        name = item.get("name") if isinstance(item, dict) else item
+        if name:
+            namespace_names.append(str(name))
+
+    repository_names = []
+    for item in repositories or []:
+        name = item.get("name") if isinstance(item, dict) else item
+        if name:
+            repository_names.append(str(name))
+
+    return ResourceInventory(deployments=deployments, namespaces=namespace_names, repositories=repository_names)
+
+
+class ResourceIndex:
+    """Cluster başına isim envanterini TTL ile bellekte tutar; yükleme işini çağıranın loader'ı yapar"""
+
+    def __init__(self, ttl: float = INVENTORY_TTL_SECONDS, failure_backoff: float = LOAD_FAILURE_BACKOFF_SECONDS):
+        self.ttl = ttl
+        self.failure_backoff = failure_backoff
+        self._inventories: Dict[Tuple[str, str], ResourceInventory] = {}
+        # Anahtar -> son başarısız yükleme zamanı (monotonic)
+        self._failed_at: Dict[Tuple[str, str], float] = {}
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _key_lock(self, key) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def peek(self, base_url: str, cluster_id: Any) -> Optional[ResourceInventory]:
+        """Yükleme yapmadan, bellekteki envanteri (eski olsa bile) döndürür"""
+        with self._lock:
+            return self._inventories.get((base_url, str(cluster_id)))
+
+    def get(self, base_url: str, cluster_id: Any, loader: Callable[[], ResourceInventory],
+            max_age: Optional[float] = None) -> Optional[ResourceInventory]:
+        """Geçerli envanteri döndürür; yoksa veya max_age'den eskiyse loader ile yeniden yükler.
+
+        Son yükleme başarısız olduysa bekleme süresi dolana kadar loader çağrılmaz, eldeki (eski) envanter döner.
+        """
+        key = (base_url, str(cluster_id))
+        max_age = self.ttl if max_age is None else max_age
+        inventory = self.peek(base_url, cluster_id)
+        if inventory is not None and inventory.age < max_age:
+            return inventory
+
+        with self._key_lock(key):
+            inventory = self.peek(base_url, cluster_id)
+            if inventory is not None and inventory.age < max_age:
+                return inventory
+            with self._lock:
+                failed_at = self._failed_at.get(key)
+            if failed_at is not None and time.monotonic() - failed_at < self.failure_backoff:
+                return inventory
+            try:
+                inventory = loader()
+            except Exception as e:
+                logger.warning(f"[ResourceIndex] Envanter yüklenemedi ({cluster_id}): {e}")
+                with self._lock:
+                    self._failed_at[key] = time.monotonic()
+                return inventory
+            with self._lock:
+                self._inventories[key] = inventory
+                self._failed_at.pop(key, None)
+            print(f"[ResourceIndex] Envanter yüklendi (cluster: {cluster_id}): "
+                  f"{len(inventory.deployments)} deployment, {len(inventory.names('namespace'))} namespace, "
+                  f"{len(inventory.repositories)} repository")
+            return inventory
+
+    def invalidate(self, base_url: str, cluster_id: Any):
+        with self._lock:
+            self._inventories.pop((base_url, str(cluster_id)), None)
+            self._failed_at.pop((base_url, str(cluster_id)), None)
+
+
+# Süreç genelinde tek index
+resource_index = ResourceIndex()
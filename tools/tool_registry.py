@@ -0,0 +1,237 @@
+import json
+import hashlib
+import inspect
+import logging
+import threading
+import importlib
+from collections import OrderedDict
+from functools import partial
+from typing import Dict, Any, Callable, Optional, Type
+
+from tools import openapi_catalog
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_SPEC_KEYS = ("summary", "description", "method", "path", "parameters")
+REQUIRED_PARAM_KEYS = ("name", "in", "required", "type")
+ALLOWED_METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE"}
+ALLOWED_PARAM_LOCATIONS = {"path", "query", "body"}
+
+# Önbellekte tutulacak en fazla prompt metni (araç seti parmak izi başına bir kayıt, LRU)
+PROMPT_CACHE_SIZE = 64
+
+# Kategori -> elle yazılmış araç tanımlarının modülü; ilk get_catalog çağrısında import edilir
+CATEGORY_MODULES = {
+    "cluster": "tools.cluster_tools.tool_manager",
+    "namespace": "tools.namespace_tools.tool_manager",
+    "deployment": "tools.deployment_tools.tool_manager",
+    "repository": "tools.repository_tools.tool_manager",
+}
+
+
+class ToolSpecError(ValueError):
+    """Araç tanımı geçersiz olduğunda kayıt sırasında fırlatılır"""
+
+
+class ToolCatalog(dict):
+    """Doğrulanmış araç seti; içerik parmak izi prompt önbelleğinin anahtarıdır"""
+
+    def __init__(self, category: str, specs: Dict[str, Any]):
+        super().__init__(specs)
+        self.category = category
+        self.fingerprint = catalog_fingerprint(specs)
+
+
+def catalog_fingerprint(tools: Dict[str, Any]) -> str:
+    payload = json.dumps(tools, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _make_executor(func: Callable[..., Any], spec: Dict[str, Any]) -> Callable[..., Any]:
+    """API metodu için, sadece tanımlı parametreleri ileten genel bir çalıştırıcı üretir"""
+    signature = inspect.signature(func)
+    accepts_kwargs = any(p.kind == inspect.Parameter.VAR_KEYWORD for p in signature.parameters.values())
+    declared = {p["name"] for p in spec["parameters"]}
+    accepted = declared if accepts_kwargs else declared & set(signature.parameters)
+
+    def executor(api: Any, **parameters: Any) -> Any:
+        call_params = {k: v for k, v in parameters.items() if k in accepted}
+        ignored = set(parameters) - accepted
+        if ignored:
+            logger.warning(f"[ToolRegistry] '{func.__name__}' için tanımsız parametreler yok sayıldı: {sorted(ignored)}")
+        return func(api, **call_params)
+
+    executor.__name__ = func.__name__
+    return executor
+
+
+class ToolRegistry:
+    """Tüm agent kategorilerinin araç tanımlarını, çalıştırıcılarını ve prompt parçalarını tutar"""
+
+    def __init__(self):
+        self._catalogs: Dict[str, ToolCatalog] = {}
+        self._executors: Dict[str, Dict[str, Callable[..., Any]]] = {}
+        self._prompt_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._loaded = set()
+        # Elle yazılmış araçları yüklenmiş ama OpenAPI araçları henüz eklenememiş kategoriler
+        self._openapi_pending = set()
+        self._lock = threading.Lock()
+        self._load_lock = threading.RLock()
+
+    def _validate_spec(self, category: str, name: str, spec: Dict[str, Any]):
+        """Tanımın yapısını (zorunlu alanlar, metot, parametreler) doğrular"""
+        where = f"{category}.{name}"
+        missing = [k for k in REQUIRED_SPEC_KEYS if k not in spec]
+        if missing:
+            raise ToolSpecError(f"{where}: eksik alanlar {missing}")
+        if spec["method"] not in ALLOWED_METHODS:
+            raise ToolSpecError(f"{where}: geçersiz HTTP metodu '{spec['method']}'")
+
+        if spec.get("cacheable") and spec["method"] != "GET":
+            raise ToolSpecError(f"{where}: yalnızca GET araçları 'cacheable' olabilir")
+
+        keywords = spec.get("keywords", [])
+        if not isinstance(keywords, list) or not all(isinstance(k, str) for k in keywords):
+            raise ToolSpecError(f"{where}: 'keywords' bir metin listesi olmalı")
+
+        for param in spec["parameters"]:
+            param_missing = [k for k in REQUIRED_PARAM_KEYS if k not in param]
+            if param_missing:
+                raise ToolSpecError(f"{where}: parametre {param.get('name')} için eksik alanlar {param_missing}")
+            if param["in"] not in ALLOWED_PARAM_LOCATIONS:
+                raise ToolSpecError(f"{where}: '{param['name']}' için geçersiz konum '{param['in']}'")
+
+    def _validate(self, category: str, name: str, spec: Dict[str, Any], api_class: Type) -> Callable[..., Any]:
+        """Tanımı doğrular ve API sınıfındaki metodun imzasıyla eşleştirir"""
+        self._validate_spec(category, name, spec)
+        where = f"{category}.{name}"
+        func = getattr(api_class, name, None)
+        if not callable(func):
+            raise ToolSpecError(f"{where}: {api_class.__name__} sınıfında '{name}' metodu yok")
+
+        signature = inspect.signature(func)
+        accepts_kwargs = any(p.kind == inspect.Parameter.VAR_KEYWORD for p in signature.parameters.values())
+        declared = {p["name"] for p in spec["parameters"]}
+        if not accepts_kwargs:
+            unknown = declared - set(signature.parameters) - {"cluster_id"}
+            if unknown:
+                raise ToolSpecError(f"{where}: metot imzasında olmayan parametreler {sorted(unknown)}")
+        undeclared = [
+            p.name for p in list(signature.parameters.values())[1:]
+            if p.default is inspect.Parameter.empty
+            and p.kind in (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY)
+            and p.name not in declared
+        ]
+        if undeclared:
+            raise ToolSpecError(f"{where}: zorunlu metot parametreleri tanımda yok {undeclared}")
+        return func
+
+    def register(self, category: str, specs: Dict[str, Any], api_class: Type) -> ToolCatalog:
+        """Araç tanımlarını bir kez doğrular, çalıştırıcıları bağlar ve kataloğu kaydeder"""
+        executors = {
+            name: _make_executor(self._validate(category, name, spec, api_class), spec)
+            for name, spec in specs.items()
+        }
+        catalog = ToolCatalog(category, specs)
+        with self._lock:
+            self._catalogs[category] = catalog
+            self._executors[category] = executors
+        return catalog
+
+    def _merge_generated(self, category: str):
+        """OpenAPI'den üretilen araçları ekler; aynı isim veya aynı uç noktaya sahip elle yazılmış araç önceliklidir.
+
+        Doküman kilit dışında okunur; okunamazsa kategori bekleyen olarak kalır ve sonraki kullanımda tekrar denenir.
+        """
+        generated = openapi_catalog.generated_tool_specs(category)
+        if generated is None:
+            return
+
+        with self._load_lock:
+            if category not in self._openapi_pending:
+                return
+            self._openapi_pending.discard(category)
+            if generated:
+                self._add_generated(category, generated)
+
+    def _add_generated(self, category: str, generated: Dict[str, Dict[str, Any]]):
+        specs = dict(self._catalogs.get(category, {}))
+        executors = dict(self._executors.get(category, {}))
+        covered = {(s["method"], openapi_catalog.normalize_path(s["path"])) for s in specs.values()}
+        added = 0
+        for name, spec in generated.items():
+            if name in specs or (spec["method"], openapi_catalog.normalize_path(spec["path"])) in covered:
+                continue
+            try:
+                self._validate_spec(category, name, spec)
+            except ToolSpecError as e:
+                logger.warning(f"[ToolRegistry] OpenAPI aracı atlandı: {e}")
+                continue
+            specs[name] = spec
+            executors[name] = partial(openapi_catalog.call_operation, spec=spec)
+            added += 1
+
+        if added:
+            with self._lock:
+                self._catalogs[category] = ToolCatalog(category, specs)
+                self._executors[category] = executors
+            print(f"[ToolRegistry] '{category}' kategorisine OpenAPI'den {added} araç eklendi")
+
+    def _ensure_loaded(self, category: str):
+        """Kategorinin araçlarını ilk kullanımda yükler: önce elle yazılmış modül, sonra (eklenene kadar) OpenAPI"""
+        if category not in self._loaded:
+            with self._load_lock:
+                if category not in self._loaded:
+                    module_path = CATEGORY_MODULES.get(category)
+                    if module_path:
+                        importlib.import_module(module_path)
+                    self._openapi_pending.add(category)
+                    self._loaded.add(category)
+        if category in self._openapi_pending:
+            self._merge_generated(category)
+
+    def get_catalog(self, category: str) -> ToolCatalog:
+        self._ensure_loaded(category)
+        return self._catalogs[category]
+
+    def get_executor(self, category: str, tool_name: str) -> Optional[Callable[..., Any]]:
+        self._ensure_loaded(category)
+        return self._executors.get(category, {}).get(tool_name)
+
+    def categories(self):
+        return list(CATEGORY_MODULES.keys())
+
+    def render_tools_prompt(self, tools: Dict[str, Any]) -> str:
+        """Araç listesinin prompt metnini üretir; aynı araç seti için önbellekten döner"""
+        fingerprint = getattr(tools, "fingerprint", None) or catalog_fingerprint(tools)
+        with self._lock:
+            cached = self._prompt_cache.get(fingerprint)
+            if cached is not None:
+                self._prompt_cache.move_to_end(fingerprint)
+                return cached
+
+        tools_description_lines = []
+        for name, details in tools.items():
+            param_list = [
+                f"{p['name']} ({p.get('in', 'N/A')})"
+                for p in details.get("parameters", [])
+                if p.get('name') and p.get('name') != "cluster_id"
+            ]
+            params_str = ", ".join(param_list) if param_list else "Yok"
+            tools_description_lines.append(
+                f"  - Arac Adi: '{name}'\n"
+                f"  - Aciklama: {details.get('summary', '')}\n"
+                f"  - Gerekli Parametreler: {params_str}"
+            )
+        rendered = "\n".join(tools_description_lines)
+
+        with self._lock:
+            self._prompt_cache[fingerprint] = rendered
+            self._prompt_cache.move_to_end(fingerprint)
+            while len(self._prompt_cache) > PROMPT_CACHE_SIZE:
+                self._prompt_cache.popitem(last=False)
+        return rendered
+
+
+# Süreç genelinde tek registry; kategoriler ilk kullanımda tembel olarak yüklenir
+tool_registry = ToolRegistry()
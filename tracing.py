@@ -0,0 +1,277 @@
+# tracing.py
+
+import os
+import json
+import time
+import queue
+import uuid
+import logging
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, List, Optional
+
+from cancellation import RequestCancelled
+
+logger = logging.getLogger(__name__)
+
+# Ayarlanırsa biten span'ler bu dosyaya OTLP/JSON satırları olarak eklenir; varsayılan olarak dışa aktarma kapalıdır
+TRACE_FILE_ENV = "KUBEX_TRACE_FILE"
+SERVICE_NAME = "kubex-assistant"
+
+# Dosya bu boyutu aşınca "<dosya>.1" olarak döndürülür (tek yedek tutulur)
+TRACE_FILE_MAX_BYTES = 50 * 1024 * 1024
+# Yazıcı thread'i geride kalırsa kuyruğa sığmayan span'ler atlanır; istek yolu dosya yazımını beklemez
+EXPORT_QUEUE_SIZE = 10000
+
+# Debug panelindeki şelale görünümü için bellekte tutulan son trace sayısı
+RECENT_TRACES = 50
+
+
+class Span:
+    """Bir işlem aşamasının zamanlaması; trace_id tüm tur boyunca, span_id aşama başına benzersizdir"""
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent_id: Optional[str],
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.events: List[Dict[str, Any]] = []
+        self.status = "ok"
+        self.status_message: Optional[str] = None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes):
+        self.events.append({"name": name, "time_ns": time.time_ns(), "attributes": attributes})
+
+    def set_error(self, message: str):
+        self.status, self.status_message = "error", message
+
+    def record_error(self, error: BaseException):
+        if isinstance(error, GeneratorExit):
+            # Tüketici akışı erken kapattı (ör. karar JSON'u tamamlandı); hata değildir
+            return
+        self.attributes["error.type"] = type(error).__name__
+        if isinstance(error, RequestCancelled):
+            self.status, self.status_message = "cancelled", str(error) or "İstek iptal edildi."
+        else:
+            self.set_error(f"{type(error).__name__}: {error}")
+
+    @property
+    def elapsed_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def end(self):
+        """Span'i kapatır ve dışa aktarır; ikinci çağrı etkisizdir"""
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        self.tracer._on_end(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id, "span_id": self.span_id, "parent_id": self.parent_id,
+            "name": self.name, "start_ns": self.start_ns, "end_ns": self.end_ns,
+            "duration_ms": round(self.elapsed_ms, 2), "attributes": dict(self.attributes),
+            "events": list(self.events), "status": self.status, "status_message": self.status_message,
+        }
+
+
+# O an açık olan span; thread'lere contextvars.copy_context() ile taşınır
+current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+class Tracer:
+    """Tur başına trace: yönlendirme, araç seçimi, her Kubex HTTP çağrısı ve özet için alt span'ler.
+
+    Son trace'ler debug paneli için bellekte tutulur. KUBEX_TRACE_FILE ayarlıysa biten span'ler
+    arka plandaki bir yazıcı thread'i ile OTLP/JSON (otlpjsonfile ile okunabilir) satırları olarak dosyaya yazılır.
+    """
+
+    def __init__(self, export_path: Optional[str] = None, recent: int = RECENT_TRACES,
+                 max_bytes: int = TRACE_FILE_MAX_BYTES):
+        self._export_path = export_path
+        self._max_bytes = max_bytes
+        self._export_queue: Optional["queue.Queue[Dict[str, Any]]"] = None
+        self._export_started = False
+        self._dropped = 0
+        self._recent: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._recent_limit = recent
+        self._listeners: List[Callable[[Span], None]] = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: Callable[[Span], None]):
+        """Biten her span için çağrılacak fonksiyonu kaydeder (ör. metrikler)"""
+        self._listeners.append(listener)
+
+    def start_span(self, name: str, attributes: Optional[Dict[str, Any]] = None,
+                   parent: Optional[Span] = None, root: bool = False) -> Span:
+        """Etkinleştirmeden span başlatır (generator'lar ve turlar için); çağıran end() ile kapatır"""
+        parent = None if root else (parent or current_span.get())
+        if parent is None:
+            return Span(self, name, uuid.uuid4().hex, None, attributes)
+        return Span(self, name, parent.trace_id, parent.span_id, attributes)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Aktif span'in altında bir span açar ve blok boyunca aktif span yapar"""
+        span = self.start_span(name, attributes)
+        reset = current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            try:
+                current_span.reset(reset)
+            except ValueError:
+                # Generator başka bir bağlamda kapatıldı; o bağlamda span zaten aktif değil
+                pass
+            span.end()
+
+    def inject_headers(self, headers: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """Aktif span'i W3C traceparent başlığı olarak ekler (Kubex API'ye giden istekler için)"""
+        headers = dict(headers or {})
+        span = current_span.get()
+        if span is not None:
+            headers["traceparent"] = f"00-{span.trace_id}-{span.span_id}-01"
+        return headers
+
+    def _on_end(self, span: Span):
+        record = span.to_dict()
+        with self._lock:
+            spans = self._recent.get(span.trace_id)
+            if spans is None:
+                spans = self._recent[span.trace_id] = []
+                while len(self._recent) > self._recent_limit:
+                    self._recent.popitem(last=False)
+            spans.append(record)
+        self._enqueue_export(record)
+        for listener in self._listeners:
+            try:
+                listener(span)
+            except Exception as e:
+                logger.warning(f"[Tracing] Span dinleyicisi başarısız: {e}")
+
+    def _enqueue_export(self, record: Dict[str, Any]):
+        """Dışa aktarma açıksa span'i yazıcı kuyruğuna bırakır; kuyruk doluysa span atlanır"""
+        if not self._export_started:
+            with self._lock:
+                if not self._export_started:
+                    path = self._export_path if self._export_path is not None else os.environ.get(TRACE_FILE_ENV, "")
+                    if path:
+                        self._export_queue = queue.Queue(maxsize=EXPORT_QUEUE_SIZE)
+                        threading.Thread(target=self._export_loop, args=(path,),
+                                         name="kubex-trace-export", daemon=True).start()
+                        print(f"[Tracing] Trace dosyası: {path}")
+                    self._export_started = True
+        if self._export_queue is None:
+            return
+        try:
+            self._export_queue.put_nowait(record)
+        except queue.Full:
+            self._dropped += 1
+            if self._dropped == 1:
+                logger.warning("[Tracing] Dışa aktarma kuyruğu dolu; span'ler dosyaya yazılmadan atlanıyor")
+
+    def _export_loop(self, path: str):
+        """Kuyruktaki span'leri dosyaya yazar; dosya boyut sınırını aşınca döndürür"""
+        export_file = None
+        while True:
+            record = self._export_queue.get()
+            try:
+                if export_file is None:
+                    export_file = open(path, "a", encoding="utf-8")
+                export_file.write(json.dumps(_otlp_line(record), ensure_ascii=False, default=str) + "\n")
+                if export_file.tell() >= self._max_bytes:
+                    export_file.close()
+                    export_file = None
+                    os.replace(path, path + ".1")
+                elif self._export_queue.empty():
+                    # Kuyruk boşalınca bir kez diske yaz; her span'de flush yapılmaz
+                    export_file.flush()
+            except (OSError, ValueError) as e:
+                logger.warning(f"[Tracing] Span yazılamadı ({path}): {e}")
+                if export_file is not None:
+                    export_file.close()
+                    export_file = None
+
+    def get_trace(self, trace_id: Optional[str]) -> List[Dict[str, Any]]:
+        """Bellekteki trace'in biten span'lerini başlangıç sırasına göre döndürür"""
+        with self._lock:
+            spans = list(self._recent.get(trace_id, ())) if trace_id else []
+        return sorted(spans, key=lambda s: s["start_ns"])
+
+
+def _otlp_line(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Span kaydını tek span'lik bir OTLP/JSON resourceSpans satırına çevirir"""
+    otlp_span = {
+        "traceId": record["trace_id"], "spanId": record["span_id"], "parentSpanId": record["parent_id"] or "",
+        "name": record["name"], "kind": 3 if record["name"].startswith(("kubex.", "llm.")) else 1,
+        "startTimeUnixNano": str(record["start_ns"]), "endTimeUnixNano": str(record["end_ns"]),
+        "attributes": _otlp_attributes(record["attributes"]),
+        "events": [{"name": e["name"], "timeUnixNano": str(e["time_ns"]),
+                    "attributes": _otlp_attributes(e["attributes"])} for e in record["events"]],
+        "status": {"code": 2, "message": record["status_message"]} if record["status"] == "error" else {"code": 1},
+    }
+    return {"resourceSpans": [{
+        "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME})},
+        "scopeSpans": [{"scope": {"name": "kubex.tracing"}, "spans": [otlp_span]}],
+    }]}
+
+
+def format_waterfall(spans: List[Dict[str, Any]], width: int = 40) -> str:
+    """Trace'i metin şelalesi olarak çizer: her satırda girintili span adı, zaman çubuğu ve süre"""
+    if not spans:
+        return "Trace bulunamadı."
+    start = min(s["start_ns"] for s in spans)
+    end = max(s["end_ns"] or s["start_ns"] for s in spans)
+    total = max(end - start, 1)
+    ids = {s["span_id"] for s in spans}
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for s in spans:
+        parent = s["parent_id"] if s["parent_id"] in ids else None
+        children.setdefault(parent, []).append(s)
+
+    lines = []
+
+    def walk(parent: Optional[str], depth: int):
+        for s in children.get(parent, []):
+            offset = int((s["start_ns"] - start) / total * width)
+            length = max(1, int(((s["end_ns"] or end) - s["start_ns"]) / total * width))
+            bar = " " * offset + "█" * min(length, width - offset)
+            label = ("  " * depth + s["name"])[:28]
+            detail = s["attributes"].get("http.route") or s["attributes"].get("tool") or s["attributes"].get("agent") or ""
+            mark = {"error": " ✗", "cancelled": " ⊘"}.get(s["status"], "")
+            lines.append(f"{label:<28} {bar:<{width}} {s['duration_ms']:>8.1f} ms{mark} {detail}".rstrip())
+            walk(s["span_id"], depth + 1)
+
+    walk(None, 0)
+    return "\n".join(lines)
+
+
+# Süreç genelinde paylaşılır
+tracer = Tracer()
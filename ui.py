@@ -1,10 +1,16 @@
 import streamlit as st
 import logging
-import re, json
+import json
 from typing import Dict, Any # Ekleme: Tip denetimi için
 
 from ollama import OllamaClient
 from agent_manager import AgentManager
+from cancellation import RequestCancelled
+from tracing import format_waterfall
+from metrics import start_metrics_server
+from ui_rendering import (
+    fragment, prepare_message, render_content, render_history, split_thinking, StreamRenderer, HISTORY_PAGE_SIZE
+)
 
 # --- Logger Kurulumu ---
 logging.basicConfig(level=logging.INFO)
@@ -17,6 +23,12 @@ st.set_page_config(
     layout="wide"
 )
 
+# Bellekte (ve ekranda) tutulan son mesaj sayısı; eskileri sohbet kaydından istenince yüklenir
+UI_MESSAGE_WINDOW = 50
+
+# Prometheus /metrics uç noktası (KUBEX_METRICS_PORT); Streamlit yeniden çalıştırmalarında tekrar başlatılmaz
+start_metrics_server()
+
 # --- Session State Başlatma ---
 if "agent_manager" not in st.session_state:
     st.session_state.agent_manager = None
@@ -28,45 +40,32 @@ if "agent_manager" not in st.session_state:
     st.session_state.cluster_list_data = [] # İşlenmiş veriyi saklamak için yeni state
     st.session_state.show_welcome = True # Karşılama ekranı kontrolü
 
+def add_message(role: str, content: str):
+    """Mesajı ekrana ve sohbet kaydına ekler; bellekte sadece son UI_MESSAGE_WINDOW mesaj kalır"""
+    st.session_state.messages.append(prepare_message({"role": role, "content": content}))
+    manager = st.session_state.agent_manager
+    if manager:
+        manager.record_message(role, content)
+    if len(st.session_state.messages) > UI_MESSAGE_WINDOW:
+        reloaded = manager.load_messages(UI_MESSAGE_WINDOW) if manager else []
+        st.session_state.messages = reloaded or st.session_state.messages[-UI_MESSAGE_WINDOW:]
+
 def parse_and_display_response(full_response: str):
     """LLM yanıtını ayrıştırır ve 'think' etiketlerini expander içine alır."""
-    thinking_pattern = re.compile(r"<think>(.*?)</think>", re.DOTALL)
-    thinking_content = ""
-    main_content = full_response
-
-    match = thinking_pattern.search(full_response)
-    if match:
-        thinking_content = match.group(1).strip()
-        main_content = thinking_pattern.sub("", full_response).strip()
-
-    if main_content:
-        st.markdown(main_content)
-    if thinking_content:
-        with st.expander("Modelin Düşünce Adımları 🧠"):
-            st.markdown(f"```\n{thinking_content}\n```")
+    render_content(*split_thinking(full_response))
             
 def stream_with_parse(response_generator):
-    """Streaming generator'ı sararak parse uyumlu hale getirir"""
-    response_container = st.empty()
-    full_response = ""
-    
-    for chunk in response_generator:
-        full_response += chunk
-        
-        # Her chunk'ta sadece ana içeriği göster (think tag'leri gizle)
-        import re
-        display_content = re.sub(r"<think>.*?</think>", "", full_response, flags=re.DOTALL).strip()
-        
-        response_container.empty()
-        with response_container.container():
-            st.markdown(display_content)
-    
-    # Streaming bitince final parse et
-    response_container.empty()
-    with response_container.container():
-        parse_and_display_response(full_response)
-    
-    return full_response
+    """Streaming generator'ı artımlı ve kısıtlı sıklıkta çizer; ham yanıtı döndürür"""
+    renderer = StreamRenderer(st.empty())
+    try:
+        for chunk in response_generator:
+            renderer.feed(chunk)
+    finally:
+        # Yeni bir mesajla çalıştırma yarıda kesilirse akışı hemen kapat; Ollama üretimi durur
+        close = getattr(response_generator, "close", None)
+        if close:
+            close()
+    return renderer.finish()
 
 def show_welcome_screen():
     """Karşılama ekranı - mevcut araçları ve kategorileri gösterir"""
@@ -151,7 +150,9 @@ def show_welcome_screen():
         
     return True
 # --- Kenar Çubuğu (Sidebar) ---
-with st.sidebar:
+# Fragment: kenar çubuğundaki etkileşimler sohbet geçmişini yeniden çizdirmez
+@fragment
+def render_sidebar():
     st.header("⚙️ Yapılandırma")
     ollama_url = st.text_input("Ollama URL", value="http://ai.ikaganacar.com")
     kubex_url = st.text_input("Kubex URL", value="http://10.67.67.195:8000")
@@ -162,7 +163,16 @@ with st.sidebar:
             try:
                 client = OllamaClient(ollama_url=ollama_url,kubex_url=kubex_url, model_name=model_name)
                 if client.test_connection():
-                    st.session_state.agent_manager = AgentManager(client)
+                    manager = AgentManager(client)
+                    # Sayfa adresindeki oturum kimliğiyle önceki sohbet (yeniden başlatmadan sonra da) geri yüklenir
+                    session_id = st.query_params.get("sid")
+                    if session_id:
+                        manager.default_session = manager.create_session(session_id)
+                    st.query_params["sid"] = manager.session_id
+                    st.session_state.messages = manager.load_messages(UI_MESSAGE_WINDOW)
+                    st.session_state.show_welcome = not st.session_state.messages
+                    st.session_state.history_visible = HISTORY_PAGE_SIZE
+                    st.session_state.agent_manager = manager
                     st.session_state.connected = True
                     st.success(f"Başarıyla bağlanıldı!\n\n**Model:** {model_name}")
                     st.rerun()
@@ -253,6 +263,32 @@ with st.sidebar:
                         for i, ctx in enumerate(agent.conversation_context[-3:]):
                             st.caption(f"**Etkileşim {i+1}:** User: {ctx['user'][:50]}...")
 
+                sf_stats = status.get("kubex_single_flight")
+                if sf_stats:
+                    st.caption(
+                        f"**Kubex single-flight:** {sf_stats['requests']} istek, "
+                        f"{sf_stats['executed']} gerçek çağrı, {sf_stats['saved']} çağrı tasarrufu"
+                    )
+
+                scheduler_stats = status.get("kubex_scheduler")
+                if scheduler_stats:
+                    st.caption("**Kubex zamanlayıcı (cluster/sınıf):**")
+                    st.json(scheduler_stats, expanded=False)
+
+                spec_stats = status.get("speculative_execution")
+                if spec_stats:
+                    cache_stats = spec_stats["read_cache"]
+                    st.caption(
+                        f"**Önden çalıştırma:** {spec_stats['started']} başlatıldı, "
+                        f"{spec_stats['claimed_in_flight']} çalışırken sahiplenildi | "
+                        f"**Okuma cache:** {cache_stats['hits']} isabet, {cache_stats['misses']} ıska"
+                    )
+
+                trace_spans = st.session_state.agent_manager.get_last_trace()
+                if trace_spans:
+                    st.caption(f"**Son istek izi** (`{trace_spans[0]['trace_id']}`):")
+                    st.code(format_waterfall(trace_spans), language=None)
+
         if st.session_state.agent_manager.current_agent:
             st.divider()
             st.subheader("🔧 Aktif Araçlar")
@@ -314,13 +350,23 @@ with st.sidebar:
                 st.session_state.messages = []
                 st.session_state.pending_action = None
                 st.session_state.show_welcome = True  # Karşılama ekranını tekrar göster
+                st.session_state.history_visible = HISTORY_PAGE_SIZE
                 if st.session_state.agent_manager:
-                    st.session_state.agent_manager.reset_all_contexts()
+                    manager = st.session_state.agent_manager
+                    manager.reset_all_contexts()
+                    # Kayıt yalnızca eklemeli: temiz bir sohbet için aynı cluster'da yeni oturum başlat
+                    cluster_id, cluster_name = manager.active_cluster_id, manager.active_cluster_name
+                    manager.default_session = manager.create_session()
+                    manager.set_active_cluster(cluster_id, cluster_name)
+                    st.query_params["sid"] = manager.session_id
                 # Cluster listesini de sıfırla ki tekrar çekilsin
                 st.session_state.cluster_list = [] 
                 st.success("Tüm bağlamlar temizlendi!")
                 st.rerun()
 
+with st.sidebar:
+    render_sidebar()
+
 # --- Ana Sohbet Arayüzü ---
 st.title("🧩 KUBEX Multi-Agent Asistanı")
 
@@ -329,10 +375,15 @@ st.title("🧩 KUBEX Multi-Agent Asistanı")
 if st.session_state.show_welcome and len(st.session_state.messages) == 0:
     show_welcome_screen()
 else:
-    # Geçmiş sohbet mesajlarını ekrana yazdır
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            parse_and_display_response(message["content"])
+    # Sadece son mesajlar çizilir; eskiler bellekten, sonra sohbet kaydından sayfalanır
+    manager = st.session_state.agent_manager
+    if manager:
+        render_history(
+            older_available=lambda first_id: manager.count_messages(before_id=first_id) > 0,
+            load_older=lambda first_id: manager.load_messages(UI_MESSAGE_WINDOW, before_id=first_id)
+        )
+    else:
+        render_history()
 
 # --- Sohbet Girişi ve Form Yönetimi ---
 if st.session_state.connected:
@@ -381,6 +432,25 @@ if st.session_state.connected:
                             collected_params[param] = ""
                     else:
                         collected_params[param] = None
+                elif options := st.session_state.agent_manager.get_parameter_options(
+                        pending["tool_name"], param, pending.get("extracted_params")):
+                    # Envanterden aranabilir seçim; listede olmayan değer elle de yazılabilir
+                    selected = st.selectbox(
+                        question,
+                        options,
+                        index=None,
+                        placeholder="Aramak için yazın..." if param != "chart" else "Repository seçin...",
+                        key=f"param_{param}_{i}_select"
+                    )
+                    typed = st.text_input(
+                        "Chart adı" if param == "chart" else "Listede yoksa elle yazın",
+                        key=f"param_{param}_{i}",
+                        placeholder="Örn: nginx" if param == "chart" else f"Örn: {param}_degeri"
+                    ).strip()
+                    if param == "chart" and selected and typed and "/" not in typed:
+                        collected_params[param] = f"{selected}{typed}"
+                    else:
+                        collected_params[param] = typed or selected or ""
                 else:
                     # Normal text input
                     collected_params[param] = st.text_input(
@@ -434,14 +504,14 @@ if st.session_state.connected:
                                 # Streaming with parse
                                 full_response_content = stream_with_parse(response_generator)
                                 
-                                st.session_state.messages.append({
-                                    "role": "assistant", 
-                                    "content": full_response_content
-                                })
+                                add_message("assistant", full_response_content)
                                 
                                 st.session_state.pending_action = None
                                 st.rerun()
                                 
+                            except RequestCancelled:
+                                st.info("İşlem iptal edildi.")
+                                st.session_state.pending_action = None
                             except Exception as e:
                                 st.error(f"İşlem sırasında hata oluştu: {str(e)}")
                                 st.session_state.pending_action = None
@@ -455,7 +525,7 @@ if st.session_state.connected:
             # Karşılama ekranını gizle
             st.session_state.show_welcome = False
             
-            st.session_state.messages.append({"role": "user", "content": prompt})
+            add_message("user", prompt)
             with st.chat_message("user"):
                 st.markdown(prompt)
 
@@ -470,16 +540,12 @@ if st.session_state.connected:
                     else:
                         # Streaming with parse
                         full_response_content = stream_with_parse(response)
-                        st.session_state.messages.append({
-                            "role": "assistant", 
-                            "content": full_response_content
-                        })
+                        add_message("assistant", full_response_content)
                         
+                except RequestCancelled:
+                    st.info("İşlem iptal edildi.")
                 except Exception as e:
                     error_msg = f"Bir hata oluştu: {str(e)}"
                     st.error(error_msg)
-                    st.session_state.messages.append({
-                        "role": "assistant", 
-                        "content": error_msg
-                    })
+                    add_message("assistant", error_msg)
 
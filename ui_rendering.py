@@ -0,0 +1,175 @@
+# ui_rendering.py
+
+import re
+import time
+from typing import Dict, Any, List, Tuple, Callable, Optional
+
+import streamlit as st
+
+THINK_PATTERN = re.compile(r"<think>(.*?)</think>", re.DOTALL)
+
+# Her çizimde gösterilen mesaj sayısı; eskiler sayfa sayfa açılır
+HISTORY_PAGE_SIZE = 20
+
+# Akış sırasında ekranın en fazla yenilenme sıklığı; cümle sonunda daha erken (ama MIN aralıktan sık değil) yenilenir
+STREAM_MAX_FPS = 8
+STREAM_MIN_FLUSH_INTERVAL = 0.05
+_SENTENCE_END = (".", "!", "?", ":", "\n")
+
+# Streamlit >= 1.37'de st.fragment, daha eskilerde experimental_fragment; ikisi de yoksa normal fonksiyon
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+
+def split_thinking(text: str) -> Tuple[str, str]:
+    """Yanıtı (ana içerik, düşünce) olarak ayırır; <think> blokları ana içerikten çıkarılır"""
+    match = THINK_PATTERN.search(text)
+    if not match:
+        return text.strip(), ""
+    return THINK_PATTERN.sub("", text).strip(), match.group(1).strip()
+
+
+def prepare_message(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Mesajın ayrıştırılmış halini mesajın içinde saklar; her mesaj bir kez ayrıştırılır"""
+    if "main" not in message:
+        message["main"], message["thinking"] = split_thinking(str(message.get("content", "")))
+    return message
+
+
+def render_content(main: str, thinking: str):
+    if main:
+        st.markdown(main)
+    if thinking:
+        with st.expander("Modelin Düşünce Adımları 🧠"):
+            st.markdown(f"```\n{thinking}\n```")
+
+
+def render_message(message: Dict[str, Any]):
+    prepare_message(message)
+    with st.chat_message(message["role"]):
+        render_content(message["main"], message["thinking"])
+
+
+@fragment
+def render_history(older_available: Optional[Callable[[str], bool]] = None,
+                   load_older: Optional[Callable[[str], List[Dict[str, Any]]]] = None):
+    """Sadece son mesaj penceresini çizer; daha eskiler önce bellekten, sonra sohbet kaydından sayfalanır.
+
+    Fragment olduğu için 'daha eski' düğmesi sayfanın geri kalanını yeniden çizdirmez.
+    """
+    messages = st.session_state.messages
+    visible = st.session_state.setdefault("history_visible", HISTORY_PAGE_SIZE)
+    hidden_in_memory = len(messages) > visible
+    first_id = messages[0].get("id") if messages else None
+
+    if hidden_in_memory or (first_id and older_available and older_available(first_id)):
+        def show_older():
+            if not hidden_in_memory and load_older:
+                st.session_state.messages = load_older(first_id) + st.session_state.messages
+            st.session_state.history_visible = visible + HISTORY_PAGE_SIZE
+
+        st.button("⬆️ Daha eski mesajları göster", on_click=show_older, key="history_show_older")
+
+    for message in messages[-visible:]:
+        render_message(message)
+
+
+class ThinkStreamSplitter:
+    """<think>...</think> bloklarını akış sırasında durum makinesiyle ayırır; etiket chunk sınırında bölünebilir"""
+
+    OPEN, CLOSE = "<think>", "</think>"
+
+    def __init__(self):
+        self.in_think = False
+        self._pending = ""
+        self.main_parts: List[str] = []
+        self.thinking_parts: List[str] = []
+
+    @staticmethod
+    def _partial_tag_length(text: str, tag: str) -> int:
+        """text'in sonunda, tag'in başlangıcı olabilecek en uzun parçanın uzunluğu"""
+        for length in range(min(len(tag) - 1, len(text)), 0, -1):
+            if text.endswith(tag[:length]):
+                return length
+        return 0
+
+    def _emit(self, text: str) -> str:
+        if not text:
+            return ""
+        if self.in_think:
+            self.thinking_parts.append(text)
+            return ""
+        self.main_parts.append(text)
+        return text
+
+    def feed(self, chunk: str) -> str:
+        """Chunk'ı işler ve ana içeriğe yeni eklenen metni döndürür"""
+        buffer = self._pending + chunk
+        self._pending = ""
+        visible = []
+        while buffer:
+            tag = self.CLOSE if self.in_think else self.OPEN
+            index = buffer.find(tag)
+            if index >= 0:
+                visible.append(self._emit(buffer[:index]))
+                buffer = buffer[index + len(tag):]
+                self.in_think = not self.in_think
+                continue
+            keep = self._partial_tag_length(buffer, tag)
+            visible.append(self._emit(buffer[:len(buffer) - keep]))
+            self._pending = buffer[len(buffer) - keep:]
+            break
+        return "".join(visible)
+
+    def finish(self) -> Tuple[str, str]:
+        """Akış bitince (ana içerik, düşünce) döndürür; yarım kalan etiket parçası metne geri eklenir"""
+        self._emit(self._pending)
+        self._pending = ""
+        return "".join(self.main_parts).strip(), "".join(self.thinking_parts).strip()
+
+
+class StreamRenderer:
+    """Akan yanıtı artımlı olarak çizer: chunk'lar biriktirilir, ekran en fazla STREAM_MAX_FPS sıklıkla
+    veya cümle sonlarında yenilenir; <think> içeriği akış sırasında gösterilmez"""
+
+    def __init__(self, container=None, max_fps: float = STREAM_MAX_FPS,
+                 min_interval: float = STREAM_MIN_FLUSH_INTERVAL):
+        self.container = container if container is not None else st.empty()
+        self.frame_interval = 1.0 / max_fps
+        self.min_interval = min_interval
+        self.splitter = ThinkStreamSplitter()
+        self._raw_parts: List[str] = []
+        self._last_flush = 0.0
+        self._dirty = False
+        self.flushes = 0
+
+    def feed(self, chunk: str):
+        self._raw_parts.append(chunk)
+        visible = self.splitter.feed(chunk)
+        if visible:
+            self._dirty = True
+        elif not self.splitter.main_parts and self.splitter.in_think and self.flushes == 0:
+            self._dirty = True  # Henüz ana içerik yok: düşünme durumunu göster
+
+        now = time.monotonic()
+        elapsed = now - self._last_flush
+        sentence_end = visible.rstrip(" ").endswith(_SENTENCE_END)
+        if self._dirty and (elapsed >= self.frame_interval or (sentence_end and elapsed >= self.min_interval)):
+            self._flush(now)
+
+    def _flush(self, now: float):
+        main = "".join(self.splitter.main_parts).strip()
+        if main:
+            self.container.markdown(main + " ▌")
+        else:
+            self.container.caption("🧠 Düşünüyor...")
+        self._last_flush = now
+        self._dirty = False
+        self.flushes += 1
+
+    def finish(self) -> str:
+        """Son hali (düşünce adımları expander'da) çizer ve ham yanıtı döndürür"""
+        main, thinking = self.splitter.finish()
+        self.container.empty()
+        with self.container.container():
+            render_content(main, thinking)
+        return "".join(self._raw_parts)